@@ -0,0 +1,176 @@
+# api.py
+"""
+In-memory entry point for embedding the parsers, e.g. in a bot:
+
+    lookups = Lookups.from_files(meta_dir="metadata")
+    results = parse_drop("path/to/bundles", lookups)
+    results.sections["ShowdownParser"]
+
+Nothing is printed or written; lookups (including the WR table) stay warm across calls.
+"""
+import os
+from collections.abc import Mapping
+from carresolver import CarResolver
+from assetextractor import extract_bundle_to_memory, _walk_source
+from eventdataparser import EventDataParser
+from milestonedataparser import MilestoneDataParser
+from showdownparser import ShowdownParser
+from tournamentparser import TournamentParser
+from logs import level_override
+from textstore import MemoryStore
+from utils import (
+    debug_log, find_localisation_name, translation_mapping, build_translation_lookup,
+    build_collection_lookup, find_collection_file, load_shop_time_gated_events
+)
+
+
+class Lookups:
+    """Translations, shop promotions, collection slots and WR data shared by every parse_drop call."""
+
+    def __init__(self, translations=None, shop_data=None, collections=None, car_stats_map=None):
+        self.translations = translations
+        self.shop_data = shop_data
+        self.collections = collections
+        self.car_stats_map = car_stats_map
+        self._resolver = None
+
+    @classmethod
+    def from_files(cls, translation_path=None, meta_dir=None):
+        translations = build_translation_lookup(translation_path) if translation_path else None
+        shop_data, collections = None, None
+        if meta_dir:
+            shop_data, _ = load_shop_time_gated_events(meta_dir)
+            collections = build_collection_lookup(find_collection_file(meta_dir))
+        return cls(translations, shop_data, collections)
+
+    def ensure_wr_data(self):
+        if self.car_stats_map is not None:
+            return self.car_stats_map
+        car_stats_map = ShowdownParser(console=False, text_output=False).fetch_wr_data()
+        # Keep a failed (empty) fetch out of the cache so the next call retries
+        if car_stats_map:
+            self.car_stats_map = car_stats_map
+        return car_stats_map
+
+    def resolver(self, translations=None):
+        """CarResolver kept warm across calls; a drop with its own translations gets a fresh one."""
+        if translations is not None and translations is not self.translations:
+            return CarResolver(translations, self.car_stats_map, self.shop_data)
+        if self._resolver is None:
+            self._resolver = CarResolver(self.translations, self.car_stats_map, self.shop_data)
+        self._resolver.set_wr_data(self.car_stats_map)
+        return self._resolver
+
+
+class Results:
+    """Structured output of parse_drop: per parser records, ordered sections and rendered text."""
+
+    def __init__(self):
+        self.textassets = []
+        self.records = {}
+        self.sections = {}
+        self.text = {}
+        self.errors = {}
+        self.missing_translations = []
+        self.missing_wr_data = []
+        self.unknown_cars = []
+
+    def to_dict(self):
+        return {
+            "textassets": self.textassets,
+            "records": self.records,
+            "sections": self.sections,
+            "text": self.text,
+            "errors": self.errors,
+            "missing_translations": self.missing_translations,
+            "missing_wr_data": self.missing_wr_data,
+            "unknown_cars": self.unknown_cars,
+        }
+
+
+def _bundle_sources(source):
+    """Yield (bundle, name) pairs for a path, a folder of bundles, bytes or a list of those."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source), "bundle"
+    elif isinstance(source, (str, os.PathLike)):
+        source = os.fspath(source)
+        if os.path.isdir(source):
+            for root, _, files in _walk_source(source):
+                for file_name in sorted(files):
+                    if "ASTC" in file_name:
+                        yield os.path.join(root, file_name), file_name
+        else:
+            yield source, os.path.basename(source)
+    elif isinstance(source, tuple) and len(source) == 2 and isinstance(source[0], str):
+        yield bytes(source[1]), source[0]
+    else:
+        for item in source:
+            yield from _bundle_sources(item)
+
+
+def extract_to_memory(source):
+    """Extract bundles (see _bundle_sources) into {"TextAsset": {...}, "MonoBehaviour": {...}}."""
+    extracted = {"TextAsset": {}, "MonoBehaviour": {}}
+    for bundle, name in _bundle_sources(source):
+        try:
+            out = extract_bundle_to_memory(bundle, name)
+        except Exception as e:
+            debug_log(f"Error processing file {name}: {e}", "error")
+            continue
+        extracted["TextAsset"].update(out["TextAsset"])
+        extracted["MonoBehaviour"].update(out["MonoBehaviour"])
+    return extracted
+
+
+def parse_drop(source, lookups=None, debug=False, crdb_mode=False, file_filter=None, log_level="error"):
+    """
+    Parse a game drop entirely in memory and return a Results object.
+
+    source is a {filename: str | bytes} TextAsset mapping, the output of extract_to_memory,
+    or anything extract_to_memory accepts (bundle paths, a folder of bundles, bundle bytes,
+    (name, bytes) pairs or a list of those). Missing translations are taken from the drop's
+    Localisation MonoBehaviour; the WR table is fetched once and kept on lookups.
+    """
+    lookups = lookups or Lookups()
+    results = Results()
+    with level_override(log_level):
+        if isinstance(source, Mapping) and isinstance(source.get("TextAsset"), Mapping):
+            extracted = source
+        elif isinstance(source, Mapping):
+            extracted = {"TextAsset": source, "MonoBehaviour": {}}
+        else:
+            extracted = extract_to_memory(source)
+
+        translations = lookups.translations
+        if translations is None:
+            monos = extracted.get("MonoBehaviour", {})
+            name = find_localisation_name(list(monos))
+            translations = translation_mapping(monos[name]) if name and isinstance(monos[name], dict) else {}
+
+        store = MemoryStore(extracted["TextAsset"])
+        results.textassets = store.names()
+        car_stats_map = lookups.ensure_wr_data()
+        resolver = lookups.resolver(translations)
+        options = dict(store=store, translations=translations, debug=debug, file_filter=file_filter,
+                       console=False, text_output=False)
+        parsers = [
+            EventDataParser(shop_data=lookups.shop_data, resolver=resolver, **options),
+            MilestoneDataParser(resolver=resolver, **options),
+            ShowdownParser(shop_data=lookups.shop_data, crdb_mode=crdb_mode, car_stats_map=car_stats_map, resolver=resolver, **options),
+            TournamentParser(collections=lookups.collections, resolver=resolver, **options),
+        ]
+        for parser in parsers:
+            name = type(parser).__name__
+            try:
+                records = parser.parse_records()
+                results.records[name] = records
+                results.sections[name] = [{"file": f, "text": text} for f, text in parser.sections(records)]
+                results.text[name] = parser.render(records)
+            except Exception as e:
+                results.errors[name] = str(e)
+
+        showdown = parsers[2]
+        results.missing_translations = sorted(showdown.missing_translations)
+        results.missing_wr_data = sorted(showdown.missing_wr_data)
+        results.unknown_cars = sorted(showdown.unknown_cars)
+    return results
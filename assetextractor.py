@@ -0,0 +1,572 @@
+# assetextractor.py
+import os
+import sys
+import gc
+import json
+import time
+import queue
+import heapq
+import traceback
+import multiprocessing
+from collections import namedtuple
+import UnityPy
+from utils import debug_log, get_arg_value, get_rss_mb, get_peak_rss_mb, is_localisation_name, translation_mapping
+from sharding import shard_of, bundle_shard_key
+from tracing import span, tracer
+
+# Isolated mode defaults: recycle a worker after this many bundles or above this RSS
+DEFAULT_RECYCLE_AFTER = 25
+DEFAULT_MAX_RSS_MB = 1500
+# How long a worker that exited with code 0 mid-bundle may take to deliver its stats
+CLEAN_EXIT_GRACE = 5.0
+
+# Output folders at the top of the source folder never contain bundles
+OUTPUT_DIRS = {"TextAsset", "MonoBehaviour", "Texture2D", "Sprite", "runs", "shards"}
+
+# Object types bundle_index records; each one can be written on its own
+INDEXED_TYPES = ("Texture2D", "Sprite", "TextAsset")
+
+# One bundle to extract; tier orders lookup-bearing bundles ahead of texture-only ones
+BundleTask = namedtuple("BundleTask", ["path", "size", "extract_textures", "tier"])
+
+
+def _walk_source(source_folder):
+    for root, dirs, files in os.walk(source_folder):
+        dirs[:] = [
+            d for d in dirs
+            if not d.startswith('.') and d not in {'__pycache__'}
+            and not (root == source_folder and d in OUTPUT_DIRS)
+        ]
+        yield root, dirs, files
+
+
+def count_bundles(source_folder):
+    return sum(1 for _, _, files in _walk_source(source_folder) for file_name in files if "ASTC" in file_name)
+
+
+def _tally(type_stats, type_name, started, dest=None):
+    t = type_stats.setdefault(type_name, {"seconds": 0.0, "objects": 0, "bytes": 0})
+    t["seconds"] += time.perf_counter() - started
+    t["objects"] += 1
+    if dest and os.path.exists(dest):
+        t["bytes"] += os.path.getsize(dest)
+
+
+def _bundle_kind(file_name):
+    """(extract_resources, extract_metadata) flags from a bundle's file name."""
+    file_name_lower = file_name.lower()
+    return "resources" in file_name_lower, "metadata" in file_name_lower
+
+
+def _bundle_base_name(file_name):
+    bundle_base_name = os.path.splitext(file_name)[0]  # Remove extension
+    if "." in bundle_base_name:
+        bundle_base_name = bundle_base_name.split('.')[0]  # Remove .ASTC.xxx suffix
+    return bundle_base_name
+
+
+def _textasset_filename(container_path):
+    return os.path.splitext(os.path.basename(container_path).upper())[0] + ".txt"
+
+
+def _asset_name(container_path, type_name):
+    """File name an object is written under, also the name bundle_index looks assets up by."""
+    if type_name == "TextAsset":
+        return _textasset_filename(container_path)
+    return os.path.splitext(os.path.basename(container_path).upper())[0] + ".png"
+
+
+def index_entries(env, file_name):
+    """Index records for the objects extract_bundle can write, without reading any of them."""
+    entries = [
+        {"container": path, "type": obj.type.name, "name": _asset_name(path, obj.type.name), "path_id": obj.path_id}
+        for path, obj in env.container.items() if obj.type.name in INDEXED_TYPES
+    ]
+    extract_resources, extract_metadata = _bundle_kind(file_name)
+    if not (extract_resources or extract_metadata) and any(obj.type.name == "MonoBehaviour" for obj in env.objects):
+        # MonoBehaviours are written one file per bundle, so the bundle is the unit here
+        entries.append({"container": None, "type": "MonoBehaviour", "name": f"{_bundle_base_name(file_name)}.json", "path_id": None})
+    return entries
+
+
+def write_image(obj, path, destination_folder, debug_mode=False):
+    data = obj.read()
+    dest = os.path.join(destination_folder, obj.type.name, _asset_name(path, obj.type.name))
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if debug_mode:
+        debug_log(f"Writing {obj.type.name} to: {dest}", "debug")
+    data.image.save(dest)
+    return dest
+
+
+def write_textasset(obj, path, destination_folder, debug_mode=False):
+    data = obj.read()
+    dest = os.path.join(destination_folder, "TextAsset", _textasset_filename(path))
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if debug_mode:
+        debug_log(f"Writing TextAsset to: {dest}", "debug")
+    with open(dest, 'w', encoding='utf-8', errors='surrogatepass') as f:
+        f.write(str(data.m_Script))
+    return dest
+
+
+def write_monobehaviours(mono_to_save, out_path):
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8') as f:
+        if len(mono_to_save) == 1:
+            json.dump(mono_to_save[0], f, ensure_ascii=False, indent=4)
+        else:
+            json.dump(mono_to_save, f, ensure_ascii=False, indent=4)
+    return out_path
+
+
+def _select_monobehaviours(env, bundle_base_name):
+    """Read every MonoBehaviour typetree of a bundle and pick the ones to save."""
+    all_mono = []
+    is_camera_anim_bundle = bundle_base_name == "CarCameraAnimationLibrary"
+
+    for obj in env.objects:
+        if obj.type.name == "MonoBehaviour":
+            try:
+                if obj.serialized_type and obj.serialized_type.nodes:
+                    tree = obj.read_typetree()
+                    m_name = tree.get("m_Name", "")
+                    # Add size for smart selection (only the camera library picks by size)
+                    size = len(json.dumps(tree)) if is_camera_anim_bundle else 0
+                    all_mono.append((tree, m_name, size, obj.path_id))
+            except Exception as e:
+                debug_log(f"Error reading MonoBehaviour {obj.path_id}: {e}", "error")
+
+    if not all_mono:
+        return []
+    if is_camera_anim_bundle:
+        # Prefer one with matching name, else largest
+        named_match = [item for item in all_mono if item[1] == bundle_base_name]
+        if named_match:
+            selected = named_match[0][0]  # tree
+        else:
+            selected = max(all_mono, key=lambda x: x[2])[0]  # largest by size
+
+        debug_log(f"Saved 1 MonoBehaviour (filtered main library) → {bundle_base_name}.json", "info")
+        if named_match:
+            debug_log(f"  → Selected by name: '{bundle_base_name}'", "debug")
+        else:
+            debug_log(f"  → Selected largest (size ~{max(all_mono, key=lambda x: x[2])[2]} chars)", "debug")
+        return [selected]
+
+    # Save all for other bundles
+    debug_log(f"Saved {len(all_mono)} MonoBehaviour(s) → {bundle_base_name}.json", "info")
+    return [item[0] for item in all_mono]
+
+
+def extract_bundle_to_memory(source, name=None):
+    """Extract the TextAssets and MonoBehaviours of one bundle without touching the disk.
+
+    source is a bundle path or its bytes (pass name for bytes so the bundle kind and the
+    MonoBehaviour file name can be derived). Returns {"TextAsset": {filename: str},
+    "MonoBehaviour": {filename: object}} keyed like the files extract_bundle would write.
+    """
+    file_name = name or os.path.basename(source)
+    env = UnityPy.load(source)
+    extract_resources, extract_metadata = _bundle_kind(file_name)
+    out = {"TextAsset": {}, "MonoBehaviour": {}}
+
+    if extract_metadata or not (extract_resources or extract_metadata):
+        for path, obj in env.container.items():
+            if obj.type.name == "TextAsset":
+                try:
+                    out["TextAsset"][_textasset_filename(path)] = str(obj.read().m_Script)
+                except Exception as e:
+                    debug_log(f"Error reading TextAsset {path}: {e}", "error")
+
+    if not (extract_resources or extract_metadata):
+        bundle_base_name = _bundle_base_name(file_name)
+        mono_to_save = _select_monobehaviours(env, bundle_base_name)
+        if mono_to_save:
+            out["MonoBehaviour"][f"{bundle_base_name}.json"] = mono_to_save[0] if len(mono_to_save) == 1 else mono_to_save
+    return out
+
+
+def extract_bundle(file_path: str, destination_folder: str, debug_mode=False, extract_textures=True, localisation=None, index=None):
+    """Extract Texture2D/Sprite, TextAsset and MonoBehaviour objects from one ASTC bundle.
+
+    Returns per-asset-type totals: {type: {"seconds", "objects", "bytes"}}. When the bundle is the
+    localisation MonoBehaviour, its translation mapping is added to the localisation dict as
+    {file name: mapping}, and with -nolocjson the JSON file is not written at all. index, if
+    given, receives the bundle's index_entries.
+    """
+    file_name = os.path.basename(file_path)
+    type_stats = {}
+    with span("load", "extract"):
+        env = UnityPy.load(file_path)
+        if index is not None:
+            index.extend(index_entries(env, file_name))
+    extract_resources, extract_metadata = _bundle_kind(file_name)
+
+    # --- Texture2D and Sprite extraction (unchanged) ---
+    if extract_textures and (extract_resources or not (extract_resources or extract_metadata)):
+        with span("Texture2D/Sprite", "extract"):
+            for path, obj in env.container.items():
+                if obj.type.name in ["Texture2D", "Sprite"]:
+                    started = time.perf_counter()
+                    try:
+                        dest = write_image(obj, path, destination_folder, debug_mode)
+                        _tally(type_stats, obj.type.name, started, dest)
+                    except Exception as e:
+                        debug_log(f"Error writing {obj.type.name} {path}: {e}", "error")
+
+    # --- TextAsset extraction (unchanged) ---
+    if extract_metadata or not (extract_resources or extract_metadata):
+        with span("TextAsset", "extract"):
+            for path, obj in env.container.items():
+                if obj.type.name == "TextAsset":
+                    started = time.perf_counter()
+                    try:
+                        dest = write_textasset(obj, path, destination_folder, debug_mode)
+                        _tally(type_stats, "TextAsset", started, dest)
+                    except Exception as e:
+                        debug_log(f"Error writing TextAsset {path}: {e}", "error")
+
+    # --- MonoBehaviour extraction: ONE FILE PER BUNDLE (FIXED) ---
+    if not (extract_resources or extract_metadata):
+        with span("MonoBehaviour", "extract"):
+            mono_started = time.perf_counter()
+            bundle_base_name = _bundle_base_name(file_name)
+            mono_to_save = _select_monobehaviours(env, bundle_base_name)
+
+            if mono_to_save:
+                out_name = f"{bundle_base_name}.json"
+                out_path = os.path.join(destination_folder, "MonoBehaviour", out_name)
+                # Hand the localisation straight to the translation loader instead of a JSON round trip
+                in_memory = False
+                if localisation is not None and len(mono_to_save) == 1 and is_localisation_name(out_name):
+                    localisation[out_name] = translation_mapping(mono_to_save[0])
+                    in_memory = True
+                    debug_log(f"Localisation {out_name} kept in memory ({len(localisation[out_name])} entries)", "debug")
+
+                if in_memory and "-nolocjson" in sys.argv:
+                    _tally(type_stats, "MonoBehaviour", mono_started)
+                else:
+                    write_monobehaviours(mono_to_save, out_path)
+                    _tally(type_stats, "MonoBehaviour", mono_started, out_path)
+                type_stats["MonoBehaviour"]["objects"] = len(mono_to_save)
+
+    return type_stats
+
+
+def _measured_extract(file_path, destination_folder, debug_mode=False, extract_textures=True):
+    """Run extract_bundle and return its per-bundle time/memory record."""
+    stats = {
+        "bundle": os.path.basename(file_path),
+        "size_bytes": os.path.getsize(file_path) if os.path.exists(file_path) else 0,
+        "ok": True,
+        "error": None,
+        "pid": os.getpid(),
+        "types": {},
+        "localisation": {},
+        "path": file_path,
+        "index": [],
+    }
+    rss_before = get_rss_mb()
+    start = time.time()
+    try:
+        with span(stats["bundle"], "bundle", size_bytes=stats["size_bytes"]):
+            stats["types"] = extract_bundle(
+                file_path, destination_folder, debug_mode, extract_textures, stats["localisation"], stats["index"]
+            )
+    except Exception as e:
+        stats["ok"] = False
+        stats["error"] = str(e)
+        debug_log(f"Error processing file {stats['bundle']}: {e}", "error")
+        if debug_mode:
+            debug_log(f"Stack trace: {traceback.format_exc()}", "debug")
+    stats["seconds"] = time.time() - start
+    stats["rss_before_mb"] = rss_before
+    stats["rss_after_mb"] = get_rss_mb()
+    stats["rss_delta_mb"] = stats["rss_after_mb"] - rss_before
+    stats["peak_rss_mb"] = get_peak_rss_mb()
+    return stats
+
+
+def _isolated_worker(inbox, outbox, destination_folder, debug_mode, recycle_after, max_rss_mb, trace=False):
+    tracer.configure(trace)
+    handled = 0
+    while True:
+        task = inbox.get()
+        if task is None:
+            return
+        file_path, extract_textures = task
+        stats = _measured_extract(file_path, destination_folder, debug_mode, extract_textures)
+        handled += 1
+        gc.collect()
+        recycle = None
+        if handled >= recycle_after:
+            recycle = f"{handled} bundles"
+        elif stats["rss_after_mb"] > max_rss_mb:
+            recycle = f"RSS {stats['rss_after_mb']:.0f}MB > {max_rss_mb}MB"
+        stats["recycle"] = recycle
+        stats["trace"] = tracer.drain()
+        outbox.put(stats)
+        if recycle:
+            return
+
+
+def _run_isolated(bundle_paths, destination_folder, debug_mode, workers, recycle_after, max_rss_mb):
+    """Extract bundles in worker processes that are recycled after N bundles or above an RSS cap."""
+    ctx = multiprocessing.get_context("spawn")
+    outbox = ctx.Queue()
+    pending = list(reversed(bundle_paths))
+    active = {}  # worker id -> (process, inbox, current bundle)
+    results = []
+    recycles = 0
+    next_id = 0
+
+    def spawn():
+        nonlocal next_id
+        inbox = ctx.Queue()
+        proc = ctx.Process(
+            target=_isolated_worker,
+            args=(inbox, outbox, destination_folder, debug_mode, recycle_after, max_rss_mb, tracer.enabled),
+            daemon=True,
+        )
+        proc.start()
+        worker_id = next_id
+        next_id += 1
+        active[worker_id] = [proc, inbox, None]
+        return worker_id
+
+    def assign(worker_id):
+        if not pending:
+            return False
+        bundle = pending.pop()
+        active[worker_id][2] = bundle[0]
+        active[worker_id][1].put(bundle)
+        return True
+
+    for _ in range(min(workers, len(pending))):
+        assign(spawn())
+
+    def handle(stats):
+        nonlocal recycles
+        worker_id = next((wid for wid, entry in active.items() if entry[0].pid == stats["pid"] and entry[2]), None)
+        if worker_id is None:
+            # Already written off (or never assigned); counting it again would double the bundle
+            debug_log(f"Ignoring late result for {stats['bundle']} from worker {stats['pid']}", "debug")
+            return
+        results.append(stats)
+        proc, inbox, _ = active[worker_id]
+        active[worker_id][2] = None
+        exited.pop(worker_id, None)
+        if stats.get("recycle"):
+            recycles += 1
+            debug_log(f"Recycling extraction worker {proc.pid} after {stats['bundle']} ({stats['recycle']})", "debug")
+            proc.join()
+            del active[worker_id]
+            if pending:
+                assign(spawn())
+        elif not assign(worker_id):
+            inbox.put(None)
+
+    exited = {}  # worker id -> when it was first seen exited cleanly with a bundle still assigned
+    while any(entry[2] for entry in active.values()):
+        try:
+            handle(outbox.get(timeout=0.5))
+            continue
+        except queue.Empty:
+            pass
+
+        # A worker that exits right after reporting may be seen dead before its stats are read
+        while True:
+            try:
+                handle(outbox.get_nowait())
+            except queue.Empty:
+                break
+
+        # Reap workers that died mid-bundle (e.g. OOM-killed) and replace them
+        for worker_id, (proc, inbox, bundle) in list(active.items()):
+            if not bundle or proc.is_alive():
+                continue
+            if proc.exitcode == 0 and time.monotonic() - exited.setdefault(worker_id, time.monotonic()) < CLEAN_EXIT_GRACE:
+                # Recycling exits are clean; their stats are still on the way
+                continue
+            exited.pop(worker_id, None)
+            debug_log(f"Extraction worker {proc.pid} died while processing {os.path.basename(bundle)} (exit code {proc.exitcode})", "error", force=True)
+            results.append({
+                "bundle": os.path.basename(bundle),
+                "size_bytes": os.path.getsize(bundle) if os.path.exists(bundle) else 0,
+                "ok": False,
+                "error": f"worker exited with code {proc.exitcode}",
+                "pid": proc.pid,
+                "seconds": 0.0,
+                "rss_before_mb": 0.0,
+                "rss_after_mb": 0.0,
+                "rss_delta_mb": 0.0,
+                "peak_rss_mb": 0.0,
+                "recycle": "crashed",
+            })
+            recycles += 1
+            del active[worker_id]
+            if pending:
+                assign(spawn())
+
+    for proc, inbox, _ in active.values():
+        inbox.put(None)
+    for proc, _, _ in active.values():
+        proc.join(timeout=5)
+
+    return results, recycles
+
+
+def log_extraction_summary(bundle_stats, recycles=0, top_n=5):
+    if not bundle_stats:
+        return
+    total_mb = sum(s["size_bytes"] for s in bundle_stats) / (1024 * 1024)
+    peak = max(s["peak_rss_mb"] for s in bundle_stats)
+    debug_log(f"Extraction memory: {len(bundle_stats)} bundle(s), {total_mb:.1f}MB read, peak RSS {peak:.0f}MB, {recycles} worker recycle(s)", "info")
+    for s in sorted(bundle_stats, key=lambda s: s["rss_delta_mb"], reverse=True)[:top_n]:
+        debug_log(
+            f"  {s['bundle']}: +{s['rss_delta_mb']:.1f}MB RSS (after {s['rss_after_mb']:.0f}MB, peak {s['peak_rss_mb']:.0f}MB), "
+            f"{s['seconds']:.2f}s, {s['size_bytes'] / (1024 * 1024):.1f}MB on disk",
+            "info"
+        )
+
+
+def plan_bundles(source_folder, shard=None):
+    """
+    Walk the source once and stat every bundle: (tasks, astc_count), with tasks in walk order.
+    Bundles a shard leaves out entirely are counted but get no task.
+    """
+    tasks = []
+    astc_count = 0
+    debug_mode = "-debug" in sys.argv
+    for root, dirs, files in _walk_source(source_folder):
+        if debug_mode and any("ASTC" in f.upper() for f in files):
+            rel_path = os.path.relpath(root, source_folder)
+            debug_log(f"Scanning directory: {rel_path}", "debug")
+
+        for file_name in files:
+            if "ASTC" not in file_name:
+                continue
+
+            astc_count += 1
+            file_path = os.path.join(root, file_name)
+
+            # Sharded runs split texture decoding across shards; every shard still
+            # extracts TextAssets/MonoBehaviours so each node has the full lookups.
+            extract_textures = "-lazytextures" not in sys.argv
+            if shard and shard_of(bundle_shard_key(file_path, source_folder), shard[1]) != shard[0]:
+                if "resources" in file_name.lower():
+                    continue
+                extract_textures = False
+
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                size = 0
+            tasks.append(BundleTask(file_path, size, extract_textures, _bundle_tier(file_name, extract_textures)))
+    return tasks, astc_count
+
+
+def _bundle_tier(file_name, extract_textures):
+    """0 for metadata bundles, 1 for TextAsset/MonoBehaviour bundles, 2 for texture-only work."""
+    extract_resources, extract_metadata = _bundle_kind(file_name)
+    if extract_metadata:
+        return 0
+    if not extract_resources:
+        return 1
+    return 2 if extract_textures else 1
+
+
+def schedule_bundles(tasks):
+    """Lookup-bearing bundles first, largest first within each tier, so no huge bundle runs last."""
+    return sorted(tasks, key=lambda t: (t.tier, -t.size))
+
+
+def assign_workers(tasks, workers):
+    """
+    What the isolated pool does with schedule_bundles order: each bundle goes to the worker that
+    frees up first, estimated by bytes. Returns one [bytes, [tasks]] per worker.
+    """
+    loads = [[0, []] for _ in range(max(1, workers))]
+    heap = [(0, i) for i in range(len(loads))]
+    for task in schedule_bundles(tasks):
+        load, i = heapq.heappop(heap)
+        loads[i][0] += task.size
+        loads[i][1].append(task)
+        heapq.heappush(heap, (loads[i][0], i))
+    return loads
+
+
+def log_plan(tasks, workers):
+    total_mb = sum(t.size for t in tasks) / (1024 * 1024)
+    debug_log(f"Extraction plan: {len(tasks)} bundle(s), {total_mb:.1f}MB over {workers} worker(s)", "info", force=True)
+    loads = assign_workers(tasks, workers)
+    for i, (load, assigned) in enumerate(loads):
+        largest = max(assigned, key=lambda t: t.size) if assigned else None
+        debug_log(
+            f"  worker {i}: {len(assigned)} bundle(s), {load / (1024 * 1024):.1f}MB"
+            + (f", largest {os.path.basename(largest.path)} ({largest.size / (1024 * 1024):.1f}MB)" if largest else ""),
+            "info", force=True,
+        )
+    if tasks:
+        busiest = max(load for load, _ in loads)
+        mean = sum(load for load, _ in loads) / len(loads)
+        debug_log(f"  imbalance: busiest worker {busiest / mean if mean else 1:.2f}x the mean", "info", force=True)
+    return loads
+
+
+def unpack_all_assets(source_folder: str, destination_folder: str, bundle_stats=None, shard=None, localisation=None, index=None, plan=None):
+    """
+    Extract every bundle. localisation, if given, receives {file name: translation mapping} and
+    index {bundle path: index_entries}. -lazytextures leaves Texture2D/Sprite decoding to
+    'extract -asset NAME'; those objects are still indexed. plan is a plan_bundles result, so
+    the caller's walk is not repeated; isolated workers take bundles in schedule_bundles order.
+    """
+    debug_log("Extracting Resources...", "info")
+    astc_count = 0
+    failed_files = 0
+    debug_mode = "-debug" in sys.argv
+    isolated = "-isolated" in sys.argv
+    if bundle_stats is None:
+        bundle_stats = []
+    bundle_paths = []
+
+    try:
+        tasks, astc_count = plan if plan is not None else plan_bundles(source_folder, shard)
+        if isolated:
+            bundle_paths = [(t.path, t.extract_textures) for t in schedule_bundles(tasks)]
+        else:
+            for task in tasks:
+                if debug_mode:
+                    debug_log(f"Processing File: {os.path.basename(task.path)}", "debug")
+
+                stats = _measured_extract(task.path, destination_folder, debug_mode, task.extract_textures)
+                bundle_stats.append(stats)
+                if not stats["ok"]:
+                    failed_files += 1
+
+    except FileNotFoundError as e:
+        debug_log(f"Source folder {source_folder} not found: {e}", "error", force=True)
+        return 0, failed_files
+
+    recycles = 0
+    if isolated and bundle_paths:
+        workers = get_arg_value("-workers", 1, int)
+        recycle_after = get_arg_value("-recycle", DEFAULT_RECYCLE_AFTER, int)
+        max_rss_mb = get_arg_value("-maxrss", DEFAULT_MAX_RSS_MB, int)
+        debug_log(f"Isolated extraction: {workers} worker(s), recycle after {recycle_after} bundle(s) or {max_rss_mb}MB RSS", "info")
+        results, recycles = _run_isolated(bundle_paths, destination_folder, debug_mode, max(1, workers), max(1, recycle_after), max_rss_mb)
+        bundle_stats.extend(results)
+        failed_files += sum(1 for s in results if not s["ok"])
+
+    for stats in bundle_stats:
+        found = stats.pop("localisation", None)
+        if found and localisation is not None:
+            localisation.update(found)
+        tracer.extend(stats.pop("trace", None))
+        entries = stats.pop("index", None)
+        if index is not None and stats.get("ok") and stats.get("path"):
+            index[stats["path"]] = entries
+
+    log_extraction_summary(bundle_stats, recycles)
+    return astc_count, failed_files
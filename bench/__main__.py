@@ -0,0 +1,175 @@
+# bench/__main__.py
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.synthetic import generate_corpus
+from bench.harness import run_benchmarks, run_rounds, format_report
+from bench import history as bench_history
+from bench import scaling
+
+
+def _add_corpus_args(p, defaults=None):
+    d = dict(events=200, showdowns=40, tournaments=10, milestones=20, cars=3000, localisation=50000, noise=300)
+    d.update(defaults or {})
+    p.add_argument("--events", type=int, default=d["events"])
+    p.add_argument("--showdowns", type=int, default=d["showdowns"])
+    p.add_argument("--tournaments", type=int, default=d["tournaments"])
+    p.add_argument("--milestones", type=int, default=d["milestones"])
+    p.add_argument("--cars", type=int, default=d["cars"])
+    p.add_argument("--localisation", type=int, default=d["localisation"], help="Localisation table entries")
+    p.add_argument("--noise", type=int, default=d["noise"], help="Non-JSON TextAssets that every parser should skip")
+    p.add_argument("--scale", type=float, default=1.0, help="Multiply every corpus size by this factor")
+    p.add_argument("--seed", type=int, default=1234)
+
+
+def _corpus_kwargs(args):
+    s = args.scale
+    return dict(
+        events=int(args.events * s), showdowns=int(args.showdowns * s), tournaments=int(args.tournaments * s),
+        milestones=int(args.milestones * s), cars=int(args.cars * s), localisation_entries=int(args.localisation * s),
+        noise_files=int(args.noise * s), seed=args.seed,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Offline benchmarks on synthetic CSR2 data")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Write a synthetic corpus to a folder")
+    gen.add_argument("output")
+    _add_corpus_args(gen)
+
+    run = sub.add_parser("run", help="Benchmark loaders, parsers and hot paths")
+    run.add_argument("--corpus", help="Existing corpus folder (default: generate a temporary one)")
+    run.add_argument("--repeats", type=int, default=3)
+    run.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    run.add_argument("--json", help="Also write the results to this JSON file")
+    run.add_argument("--bundles", help="Folder of real ASTC bundles to benchmark extraction on")
+    _add_corpus_args(run)
+
+    cmp = sub.add_parser("compare", help="Record this revision's results and check them against a baseline")
+    cmp.add_argument("--corpus", help="Existing corpus folder (default: generate a temporary one)")
+    cmp.add_argument("--rounds", type=int, default=3, help="Benchmark processes; the confidence interval needs several")
+    cmp.add_argument("--repeats", type=int, default=3, help="Timed runs per metric in each round")
+    cmp.add_argument("--bundles", help="Folder of real ASTC bundles to benchmark extraction on")
+    cmp.add_argument("--results", nargs="+", metavar="JSON",
+                     help="Use `bench run --json` files (one per round) instead of running the benchmarks")
+    cmp.add_argument("--history", default=os.path.join(bench_history.REPO_ROOT, bench_history.HISTORY_FILE))
+    cmp.add_argument("--baseline", help="Revision (prefix) to compare against (default: the newest other recorded run)")
+    cmp.add_argument("--threshold", type=float, default=bench_history.DEFAULT_THRESHOLD,
+                     help="Allowed slowdown in percent before a metric counts as regressed")
+    cmp.add_argument("--metric-threshold", action="append", default=[], metavar="PATTERN=PCT",
+                     help="Per-metric threshold, e.g. 'micro.*=20' or peak_rss_mb=5 (repeatable, first match wins)")
+    cmp.add_argument("--confidence", type=float, default=bench_history.DEFAULT_CONFIDENCE)
+    cmp.add_argument("--fail", action="store_true", help="Exit with status 1 when a metric regressed")
+    cmp.add_argument("--no-save", action="store_true", help="Compare without recording this run in the history")
+    _add_corpus_args(cmp)
+
+    scale = sub.add_parser("scale", help="Fit how each loader and parser grows with drop size")
+    scale.add_argument("--sizes", default=",".join(map(str, scaling.DEFAULT_SIZES)), help="Drop sizes as multiples of the base corpus")
+    scale.add_argument("--repeats", type=int, default=3)
+    scale.add_argument("--max-exponent", type=float, default=scaling.DEFAULT_MAX_EXPONENT,
+                       help="Growth exponent above which a phase counts as superlinear")
+    scale.add_argument("--budget", type=float, help="Skip the larger sizes once one size takes longer than this many seconds")
+    scale.add_argument("--json", help="Also write the timings and fits to this JSON file")
+    scale.add_argument("--fail", action="store_true", help="Exit with status 1 when a phase is superlinear")
+    # The base corpus is the 1x size; --scale grows it for every size alike
+    _add_corpus_args(scale, scaling.BASE_CORPUS)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        info = generate_corpus(args.output, **_corpus_kwargs(args))
+        print(f"Synthetic corpus written to {args.output}: {info['counts']}")
+        return 0
+
+    if args.command == "run":
+        with tempfile.TemporaryDirectory(prefix="csr2bench_") as tmp:
+            root = args.corpus
+            if not root:
+                root = tmp
+                generate_corpus(root, **_corpus_kwargs(args))
+            results = run_benchmarks(root, repeats=args.repeats, memory=not args.no_memory, bundles=args.bundles)
+        print(format_report(results))
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as fh:
+                json.dump(results, fh, indent=2)
+        return 0
+
+    if args.command == "compare":
+        return compare_main(args)
+
+    if args.command == "scale":
+        return scale_main(args)
+
+
+def compare_main(args):
+    try:
+        thresholds = bench_history.parse_thresholds(args.metric_threshold, args.threshold)
+        history = bench_history.load_history(args.history)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if args.results:
+        rounds = []
+        for path in args.results:
+            with open(path, "r", encoding="utf-8") as fh:
+                rounds.append(json.load(fh))
+    else:
+        with tempfile.TemporaryDirectory(prefix="csr2bench_") as tmp:
+            root = args.corpus
+            if not root:
+                root = tmp
+                generate_corpus(root, **_corpus_kwargs(args))
+            try:
+                rounds = run_rounds(root, rounds=max(1, args.rounds), repeats=args.repeats, bundles=args.bundles)
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                return 2
+        print(format_report(rounds[-1]))
+        print()
+
+    current = bench_history.make_entry(rounds)
+    baseline = bench_history.find_baseline(history, current, args.baseline)
+    if not args.no_save:
+        bench_history.record(history, current)
+        bench_history.save_history(history, args.history)
+        print(f"Recorded {current['revision'][:10]}{' (dirty)' if current['dirty'] else ''} in {args.history}")
+
+    if baseline is None:
+        wanted = f"revision {args.baseline}" if args.baseline else "another revision"
+        print(f"No recorded run of {wanted} to compare against yet")
+        return 2 if args.baseline else 0
+
+    rows = bench_history.compare(baseline, current, thresholds, args.confidence)
+    print(bench_history.format_comparison(baseline, current, rows, args.confidence))
+    if args.fail and any(row["status"] == "regressed" for row in rows):
+        return 1
+    return 0
+
+
+def scale_main(args):
+    try:
+        sizes = scaling.parse_sizes(args.sizes)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    result = scaling.run_scaling(sizes, _corpus_kwargs(args), repeats=args.repeats, budget=args.budget)
+    rows = scaling.analyse(result, args.max_exponent)
+    print(scaling.format_scaling(result, rows, args.max_exponent))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"max_exponent": args.max_exponent, **result, "fits": rows}, fh, indent=2)
+    if args.fail and any(row["status"] == "superlinear" for row in rows):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# bench/harness.py
+import io
+import os
+import gc
+import sys
+import json
+import time
+import tempfile
+import statistics
+import subprocess
+import threading
+import tracemalloc
+import contextlib
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+from logs import level_override
+from utils import (
+    debug_log, build_translation_lookup, build_collection_lookup, load_shop_time_gated_events,
+    find_collection_file, is_match, translate_model_name_with_suffix, get_peak_rss_mb
+)
+from eventdataparser import EventDataParser
+from milestonedataparser import MilestoneDataParser
+from showdownparser import ShowdownParser
+from tournamentparser import TournamentParser
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def local_wr_server(root):
+    """Serve root over HTTP on 127.0.0.1 so ShowdownParser can fetch wr.json offline."""
+    handler = lambda *a, **kw: _QuietHandler(*a, directory=root, **kw)
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/wr.json"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def measure(fn, repeats=3, memory=True):
+    """
+    Time fn over several runs and report the tracemalloc peak of one extra run. fn's prints and
+    log messages below error level are dropped, so they neither land in the report (not even as
+    -warnlimit summaries at exit) nor cost time in the measurement.
+    """
+    timings = []
+    result = None
+    for _ in range(repeats):
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()), level_override("error"):
+            start = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - start)
+    peak_kb = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()), level_override("error"):
+            fn()
+        peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return {
+        "seconds": statistics.median(timings),
+        "runs": timings,
+        "peak_kb": peak_kb,
+    }, result
+
+
+def _text_bytes(text_dir):
+    return sum(os.path.getsize(os.path.join(text_dir, f)) for f in os.listdir(text_dir) if f.endswith(".txt"))
+
+
+def benchmark_extraction(bundle_folder, repeats=3, memory=True):
+    """Time extract_bundle over every ASTC bundle below bundle_folder into a scratch folder."""
+    # UnityPy is only needed when real bundles are benchmarked
+    from assetextractor import plan_bundles, extract_bundle
+    tasks, _ = plan_bundles(bundle_folder)
+    with tempfile.TemporaryDirectory(prefix="csr2bench_extract_") as dest:
+        def extract():
+            for task in tasks:
+                extract_bundle(task.path, dest, extract_textures=task.extract_textures)
+        stats, _ = measure(extract, repeats, memory)
+    stats["bundles"] = len(tasks)
+    stats["mb"] = sum(task.size for task in tasks) / (1024 * 1024)
+    stats["bundles_per_sec"] = len(tasks) / stats["seconds"] if stats["seconds"] else None
+    return stats
+
+
+def run_benchmarks(root, repeats=3, micro_ops=20000, memory=True, bundles=None):
+    """
+    Benchmark loaders, every parser's process() and the matching hot paths on a corpus at root,
+    plus bundle extraction when a folder of real bundles is given.
+    """
+    text_dir = os.path.join(root, "TextAsset")
+    mono_dir = os.path.join(root, "MonoBehaviour")
+    meta_dir = os.path.join(root, "metadata")
+    results = {"loaders": {}, "parsers": {}, "micro": {}, "extract": {}}
+    text_files = len([f for f in os.listdir(text_dir) if f.endswith(".txt")])
+    text_mb = _text_bytes(text_dir) / (1024 * 1024)
+
+    # ---- loaders ----
+    translation_path = os.path.join(mono_dir, "Localisation_EN.json")
+    stats, translations = measure(lambda: build_translation_lookup(translation_path), repeats, memory)
+    stats["items"] = len(translations)
+    results["loaders"]["build_translation_lookup"] = stats
+
+    stats, (shop_data, _) = measure(lambda: load_shop_time_gated_events(meta_dir), repeats, memory)
+    stats["items"] = len(shop_data["ShopTimeGatedEvents"]["GENERATED_TimeGatedCarPromotions"]) if shop_data else 0
+    results["loaders"]["load_shop_time_gated_events"] = stats
+
+    collection_file = find_collection_file(meta_dir)
+    stats, collections = measure(lambda: build_collection_lookup(collection_file), repeats, memory)
+    stats["items"] = len(collections)
+    results["loaders"]["build_collection_lookup"] = stats
+
+    # ---- parsers ----
+    with local_wr_server(root) as wr_url:
+        def showdown():
+            parser = ShowdownParser(folder=text_dir, translations=translations, shop_data=shop_data)
+            parser.wr_url = wr_url
+            return parser.process()
+
+        parsers = {
+            "EventDataParser": lambda: EventDataParser(folder=text_dir, translations=translations, shop_data=shop_data).process(),
+            "MilestoneDataParser": lambda: MilestoneDataParser(folder=text_dir, translations=translations).process(),
+            "ShowdownParser": showdown,
+            "TournamentParser": lambda: TournamentParser(folder=text_dir, translations=translations, collections=collections).process(),
+        }
+        for name, fn in parsers.items():
+            stats, _ = measure(fn, repeats, memory)
+            stats["files"] = text_files
+            stats["files_per_sec"] = text_files / stats["seconds"] if stats["seconds"] else None
+            stats["mb_per_sec"] = text_mb / stats["seconds"] if stats["seconds"] else None
+            results["parsers"][name] = stats
+
+    # ---- hot paths ----
+    keys = [k for k in translations if not k.startswith("TEXT_")]
+    pairs = [(keys[i % len(keys)], keys[(i * 7 + 3) % len(keys)]) for i in range(micro_ops)] if keys else []
+
+    def run_is_match():
+        return sum(1 for a, b in pairs if is_match(a, b))
+
+    stats, _ = measure(run_is_match, repeats, memory=False)
+    stats["ops"] = len(pairs)
+    stats["ops_per_sec"] = len(pairs) / stats["seconds"] if stats["seconds"] else None
+    results["micro"]["is_match"] = stats
+
+    models = [keys[i % len(keys)] for i in range(max(1, micro_ops // 100))] if keys else []
+    models += [m.split("_")[0] + "_*" for m in models[:len(models) // 10]]
+
+    def run_translate():
+        return sum(len(translate_model_name_with_suffix(m, translations)) for m in models)
+
+    stats, _ = measure(run_translate, repeats, memory=False)
+    stats["ops"] = len(models)
+    stats["ops_per_sec"] = len(models) / stats["seconds"] if stats["seconds"] else None
+    results["micro"]["translate_model_name_with_suffix"] = stats
+
+    # ---- extraction ----
+    if bundles:
+        stats = benchmark_extraction(bundles, repeats, memory)
+        if stats["bundles"]:
+            results["extract"]["extract_bundle"] = stats
+        else:
+            debug_log(f"No ASTC bundles under {bundles}; extraction not benchmarked", "warn", force=True)
+
+    results["peak_rss_mb"] = get_peak_rss_mb()
+    results["corpus"] = {"text_files": text_files, "text_mb": text_mb}
+    results["repeats"] = repeats
+    return results
+
+
+def run_rounds(root, rounds=3, repeats=3, bundles=None):
+    """
+    run_benchmarks() once per round, each in a fresh `python -m bench run` process, so warm-up,
+    allocator state and peak RSS of one round do not carry over into the next.
+    """
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    with tempfile.TemporaryDirectory(prefix="csr2bench_rounds_") as tmp:
+        for i in range(rounds):
+            out = os.path.join(tmp, f"round{i}.json")
+            cmd = [sys.executable, "-m", "bench", "run", "--corpus", os.path.abspath(root),
+                   "--repeats", str(repeats), "--no-memory", "--json", out]
+            if bundles:
+                cmd += ["--bundles", os.path.abspath(bundles)]
+            proc = subprocess.run(cmd, cwd=repo_root, capture_output=True, text=True)
+            if proc.returncode:
+                raise RuntimeError(f"Benchmark round {i + 1} failed:\n{proc.stderr or proc.stdout}")
+            with open(out, "r", encoding="utf-8") as fh:
+                results.append(json.load(fh))
+    return results
+
+
+def format_report(results):
+    lines = []
+    corpus = results.get("corpus", {})
+    lines.append(f"Corpus: {corpus.get('text_files', '?')} TextAsset file(s), {corpus.get('text_mb', 0):.1f}MB")
+    lines.append("")
+    lines.append(f"{'phase':<44}{'median s':>10}{'throughput':>18}{'peak KB':>12}")
+    for section in ("loaders", "parsers", "micro", "extract"):
+        for name, stats in results.get(section, {}).items():
+            if "files_per_sec" in stats:
+                throughput = f"{stats['files_per_sec']:.0f} files/s"
+            elif "bundles_per_sec" in stats:
+                throughput = f"{stats['bundles_per_sec'] or 0:.1f} bundles/s"
+            elif "ops_per_sec" in stats:
+                throughput = f"{stats['ops_per_sec']:.0f} ops/s"
+            else:
+                throughput = f"{stats.get('items', 0)} items"
+            peak = f"{stats['peak_kb']:.0f}" if stats.get("peak_kb") is not None else "-"
+            lines.append(f"{section + '.' + name:<44}{stats['seconds']:>10.4f}{throughput:>18}{peak:>12}")
+    lines.append("")
+    lines.append(f"Peak RSS: {results.get('peak_rss_mb', 0):.0f}MB")
+    return "\n".join(lines)
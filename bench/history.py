@@ -0,0 +1,241 @@
+# bench/history.py
+"""
+Benchmark history per git revision and regression checks against a baseline.
+
+Every `bench compare` run stores the tracked metrics of one revision in a local JSON history:
+per-parser throughput, bundle extraction rate, is_match and translation lookup rates and peak RSS.
+Each metric keeps its samples per round (one process) and repeat, so a comparison can use the
+medians and a bootstrap confidence interval of the change instead of a single noisy number.
+"""
+import os
+import json
+import time
+import random
+import fnmatch
+import statistics
+import subprocess
+
+HISTORY_FILE = "bench_history.json"
+HISTORY_VERSION = 1
+DEFAULT_THRESHOLD = 10.0
+DEFAULT_CONFIDENCE = 0.95
+BOOTSTRAP_ROUNDS = 2000
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_revision(cwd=REPO_ROOT):
+    """(commit sha, subject, dirty) of the checkout, or ("unknown", "", True) outside git."""
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    try:
+        sha = git("rev-parse", "HEAD")
+        subject = git("log", "-1", "--format=%s")
+        dirty = bool(git("status", "--porcelain", "--untracked-files=no"))
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", "", True
+    return sha, subject, dirty
+
+
+def _rates(stats, count):
+    """Per-repeat rates (count / seconds) from a measure() result."""
+    return [count / s for s in stats.get("runs") or [stats["seconds"]] if s]
+
+
+def _round_metrics(results):
+    metrics = {}
+    for name, stats in results.get("parsers", {}).items():
+        if stats.get("files"):
+            metrics[f"parsers.{name}"] = (_rates(stats, stats["files"]), "files/s", True)
+    for name, stats in results.get("extract", {}).items():
+        if stats.get("bundles"):
+            metrics[f"extract.{name}"] = (_rates(stats, stats["bundles"]), "bundles/s", True)
+    for name, stats in results.get("micro", {}).items():
+        if stats.get("ops"):
+            metrics[f"micro.{name}"] = (_rates(stats, stats["ops"]), "ops/s", True)
+    if results.get("peak_rss_mb"):
+        metrics["peak_rss_mb"] = ([results["peak_rss_mb"]], "MB", False)
+    return metrics
+
+
+def tracked_metrics(rounds):
+    """
+    {metric: {"samples", "unit", "higher_is_better"}} for the paths `bench compare` guards, from
+    the run_benchmarks() results of each round. samples holds one list of repeats per round.
+    Metrics a round did not measure (no bundles given) are left out.
+    """
+    per_round = [_round_metrics(results) for results in rounds]
+    metrics = {}
+    for name, (_, unit, higher) in (per_round[0] if per_round else {}).items():
+        if all(name in m for m in per_round):
+            metrics[name] = {"samples": [m[name][0] for m in per_round], "unit": unit, "higher_is_better": higher}
+    return metrics
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return {"version": HISTORY_VERSION, "runs": []}
+    with open(path, "r", encoding="utf-8") as fh:
+        history = json.load(fh)
+    if history.get("version") != HISTORY_VERSION:
+        raise ValueError(f"{path} has history version {history.get('version')}, expected {HISTORY_VERSION}")
+    return history
+
+
+def save_history(history, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(history, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+def make_entry(rounds, revision=None):
+    """A history entry for the current checkout from the results of one or more rounds."""
+    sha, subject, dirty = revision or git_revision()
+    return {
+        "revision": sha,
+        "subject": subject,
+        "dirty": dirty,
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": rounds[0].get("corpus", {}),
+        "rounds": len(rounds),
+        "repeats": rounds[0].get("repeats"),
+        "metrics": tracked_metrics(rounds),
+    }
+
+
+def record(history, entry):
+    """Store entry as the result of its revision, replacing an earlier run of the same tree state."""
+    key = (entry["revision"], entry["dirty"])
+    history["runs"] = [r for r in history["runs"] if (r["revision"], r["dirty"]) != key] + [entry]
+    return entry
+
+
+def find_baseline(history, current, spec=None):
+    """
+    The newest run whose revision starts with spec, or by default the newest run of any other
+    tree state than current (so a dirty tree compares against its clean commit when recorded).
+    """
+    key = (current["revision"], current["dirty"])
+    candidates = [r for r in history["runs"] if (r["revision"], r["dirty"]) != key]
+    if spec:
+        candidates = [r for r in history["runs"] if r["revision"].startswith(spec) and r is not current]
+        # A clean run of the commit is a better baseline than an earlier dirty one
+        candidates.sort(key=lambda r: r["dirty"], reverse=True)
+    return candidates[-1] if candidates else None
+
+
+def parse_thresholds(specs, default=DEFAULT_THRESHOLD):
+    """[(pattern, percent)] from "PATTERN=PCT" specs, checked in order before the default."""
+    thresholds = []
+    for spec in specs or ():
+        pattern, sep, value = spec.rpartition("=")
+        try:
+            if not sep or not pattern:
+                raise ValueError
+            thresholds.append((pattern, float(value)))
+        except ValueError:
+            raise ValueError(f"Invalid threshold '{spec}', expected PATTERN=PERCENT (e.g. parsers.*=15)")
+    thresholds.append(("*", default))
+    return thresholds
+
+
+def threshold_for(metric, thresholds):
+    return next(pct for pattern, pct in thresholds if fnmatch.fnmatchcase(metric, pattern))
+
+
+def slowdown(base, current, higher_is_better):
+    """Relative slowdown of current against base: +0.1 is 10% slower (or 10% more memory)."""
+    if higher_is_better:
+        return base / current - 1 if current else float("inf")
+    return current / base - 1 if base else 0.0
+
+
+def _pooled_median(rounds):
+    return statistics.median(x for samples in rounds for x in samples)
+
+
+def confidence_interval(base, current, higher_is_better, confidence=DEFAULT_CONFIDENCE, rounds=BOOTSTRAP_ROUNDS):
+    """
+    Bootstrap interval of the slowdown between the pooled medians of base and current (lists of
+    per-round samples). Rounds are resampled first and their repeats second, since runs in one
+    process agree far better than runs in separate ones. None when a side has a single sample.
+    """
+    if sum(map(len, base)) < 2 or sum(map(len, current)) < 2:
+        return None
+    rnd = random.Random(0)
+
+    def resample(samples):
+        return [rnd.choices(r, k=len(r)) for r in rnd.choices(samples, k=len(samples))]
+
+    changes = sorted(
+        slowdown(_pooled_median(resample(base)), _pooled_median(resample(current)), higher_is_better)
+        for _ in range(rounds)
+    )
+    tail = (1 - confidence) / 2
+    return changes[int(tail * (rounds - 1))], changes[int(round((1 - tail) * (rounds - 1)))]
+
+
+def compare(baseline, current, thresholds, confidence=DEFAULT_CONFIDENCE):
+    """
+    One row per metric measured in both runs. A metric regresses when its median slowdown exceeds
+    its threshold and the confidence interval lies entirely above zero; a slowdown past the
+    threshold that the interval cannot tell from noise is reported as "noisy" instead.
+    """
+    rows = []
+    for metric, cur in current["metrics"].items():
+        base = baseline["metrics"].get(metric)
+        if not base:
+            continue
+        higher = cur["higher_is_better"]
+        change = slowdown(_pooled_median(base["samples"]), _pooled_median(cur["samples"]), higher)
+        interval = confidence_interval(base["samples"], cur["samples"], higher, confidence)
+        limit = threshold_for(metric, thresholds) / 100
+        if change > limit:
+            status = "regressed" if interval is None or interval[0] > 0 else "noisy"
+        elif change < -limit and (interval is None or interval[1] < 0):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({
+            "metric": metric,
+            "unit": cur["unit"],
+            "baseline": _pooled_median(base["samples"]),
+            "current": _pooled_median(cur["samples"]),
+            "slowdown": change,
+            "interval": interval,
+            "threshold": limit,
+            "status": status,
+        })
+    return rows
+
+
+def _describe(run):
+    dirty = " (dirty)" if run["dirty"] else ""
+    return f"{run['revision'][:10]}{dirty} {run['subject']} [{run['recorded']}]"
+
+
+def format_comparison(baseline, current, rows, confidence=DEFAULT_CONFIDENCE):
+    lines = [f"Baseline: {_describe(baseline)}", f"Current:  {_describe(current)}"]
+    if baseline.get("corpus") != current.get("corpus"):
+        lines.append(f"Note: corpora differ ({baseline.get('corpus')} vs {current.get('corpus')}), throughputs may not be comparable")
+    lines.append("")
+    ci = f"{confidence:.0%} CI"
+    lines.append(f"{'metric':<44}{'baseline':>14}{'current':>14}{'slowdown':>10}{ci:>20}{'limit':>8}  status")
+    for row in rows:
+        interval = row["interval"]
+        interval = f"[{interval[0]:+.1%}, {interval[1]:+.1%}]" if interval else "-"
+        lines.append(
+            f"{row['metric']:<44}{row['baseline']:>14.1f}{row['current']:>14.1f}{row['slowdown']:>+10.1%}"
+            f"{interval:>20}{row['threshold']:>8.0%}  {row['status']}"
+        )
+    missing = sorted(set(baseline["metrics"]) ^ set(current["metrics"]))
+    if missing:
+        lines.append("")
+        lines.append(f"Only measured in one run: {', '.join(missing)}")
+    regressed = [row["metric"] for row in rows if row["status"] == "regressed"]
+    lines.append("")
+    lines.append(f"{len(regressed)} regression(s)" + (f": {', '.join(regressed)}" if regressed else ""))
+    return "\n".join(lines)
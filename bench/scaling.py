@@ -0,0 +1,128 @@
+# bench/scaling.py
+"""
+Scaling checks: every loader and parser phase of run_benchmarks() on synthetic drops of growing
+size (1x, 4x, 16x, 64x by default), with the growth exponent of each phase fitted on log-log
+axes. 1.0 is linear; a phase whose fitted and last-step exponents both exceed the limit is
+flagged as superlinear, so quadratic paths show up before a season-start drop hits them.
+"""
+import math
+import time
+import tempfile
+
+from bench.synthetic import generate_corpus
+from bench.harness import run_benchmarks
+
+DEFAULT_SIZES = (1, 4, 16, 64)
+DEFAULT_MAX_EXPONENT = 1.2
+# The 1x drop; small enough that 64x still finishes in minutes
+BASE_CORPUS = {
+    "events": 10, "showdowns": 4, "tournaments": 2, "milestones": 2, "cars": 300,
+    "localisation": 5000, "noise": 20,
+}
+SCALED_SECTIONS = ("loaders", "parsers")
+# Below this a phase's time is mostly timer and interpreter noise, so its exponent means little
+MIN_SECONDS = 0.01
+
+
+def parse_sizes(spec):
+    """'1,4,16,64' → (1, 4, 16, 64); sizes must be positive and increasing."""
+    try:
+        sizes = tuple(int(s) for s in str(spec).split(",") if s.strip())
+    except ValueError:
+        sizes = ()
+    if len(sizes) < 2 or any(s <= 0 for s in sizes) or list(sizes) != sorted(set(sizes)):
+        raise ValueError(f"Invalid --sizes '{spec}', expected at least two increasing positive integers such as 1,4,16,64")
+    return sizes
+
+
+def fit_exponent(sizes, seconds):
+    """(exponent, r²) of the least-squares fit of log(seconds) against log(size)."""
+    points = [(math.log(s), math.log(t)) for s, t in zip(sizes, seconds) if t and t > 0]
+    if len(points) < 2:
+        return None, None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    syy = sum((y - mean_y) ** 2 for _, y in points)
+    exponent = sxy / sxx
+    r2 = sxy * sxy / (sxx * syy) if syy else 1.0
+    return exponent, r2
+
+
+def step_exponent(size_a, seconds_a, size_b, seconds_b):
+    """Exponent between two sizes; at the large end fixed costs no longer hide the growth."""
+    if not seconds_a or not seconds_b:
+        return None
+    return math.log(seconds_b / seconds_a) / math.log(size_b / size_a)
+
+
+def run_scaling(sizes=DEFAULT_SIZES, corpus=None, repeats=3, budget=None):
+    """
+    run_benchmarks() on a synthetic drop of each size (corpus counts times the size) and the
+    median seconds of every loader/parser phase per size. Once one size takes longer than budget
+    seconds, the larger ones are skipped.
+    """
+    corpus = dict(corpus or {})
+    result = {"sizes": [], "skipped": [], "files": [], "phases": {}, "wall_seconds": []}
+    for size in sizes:
+        if budget and result["wall_seconds"] and result["wall_seconds"][-1] > budget:
+            result["skipped"].append(size)
+            continue
+        started = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix=f"csr2scale_{size}x_") as root:
+            kwargs = {k: v * size if k != "seed" else v for k, v in corpus.items()}
+            generate_corpus(root, **kwargs)
+            results = run_benchmarks(root, repeats=repeats, micro_ops=0, memory=False)
+        result["sizes"].append(size)
+        result["files"].append(results["corpus"]["text_files"])
+        for section in SCALED_SECTIONS:
+            for name, stats in results.get(section, {}).items():
+                result["phases"].setdefault(f"{section}.{name}", []).append(stats["seconds"])
+        result["wall_seconds"].append(time.perf_counter() - started)
+    return result
+
+
+def analyse(result, max_exponent=DEFAULT_MAX_EXPONENT):
+    """One row per phase: its seconds per size, fitted and last-step exponents, r² and status."""
+    sizes = result["sizes"]
+    rows = []
+    for phase, seconds in result["phases"].items():
+        exponent, r2 = fit_exponent(sizes, seconds)
+        step = step_exponent(sizes[-2], seconds[-2], sizes[-1], seconds[-1]) if len(sizes) >= 2 else None
+        if exponent is None:
+            status = "n/a"
+        elif max(seconds) < MIN_SECONDS:
+            status = "too fast"
+        elif exponent > max_exponent and step is not None and step > max_exponent:
+            status = "superlinear"
+        else:
+            status = "ok"
+        rows.append({
+            "phase": phase, "seconds": seconds, "exponent": exponent, "step_exponent": step,
+            "r2": r2, "status": status,
+        })
+    return rows
+
+
+def format_scaling(result, rows, max_exponent=DEFAULT_MAX_EXPONENT):
+    sizes = result["sizes"]
+    lines = [f"Sizes: {', '.join(f'{s}x ({f} files)' for s, f in zip(sizes, result['files']))}"]
+    if result["skipped"]:
+        lines.append(f"Skipped (over budget): {', '.join(f'{s}x' for s in result['skipped'])}")
+    lines.append("")
+    header = "".join(f"{f'{s}x s':>11}" for s in sizes)
+    lines.append(f"{'phase':<40}{header}{'exponent':>10}{'last step':>11}{'r²':>7}  status")
+    for row in rows:
+        cells = "".join(f"{t:>11.4f}" for t in row["seconds"])
+        exponent = f"{row['exponent']:.2f}" if row["exponent"] is not None else "-"
+        step = f"{row['step_exponent']:.2f}" if row["step_exponent"] is not None else "-"
+        r2 = f"{row['r2']:.2f}" if row["r2"] is not None else "-"
+        lines.append(f"{row['phase']:<40}{cells}{exponent:>10}{step:>11}{r2:>7}  {row['status']}")
+    flagged = [row["phase"] for row in rows if row["status"] == "superlinear"]
+    lines.append("")
+    lines.append(
+        f"{len(flagged)} phase(s) grow faster than size^{max_exponent:g}" + (f": {', '.join(flagged)}" if flagged else "")
+    )
+    return "\n".join(lines)
@@ -0,0 +1,212 @@
+# bench/synthetic.py
+import os
+import json
+import random
+
+YEARS = list(range(1965, 2025))
+TIERS = ["T1", "T2", "T3", "T4", "T5"]
+STARS = ["3", "3P", "3G_2P", "2G_1P", "3G"]
+CAR_SUFFIXES = ["", "Reward", "RewardRecycled", "Gold"]
+
+
+def _car_ids(rnd, count):
+    cars = []
+    for i in range(count):
+        brand = f"Brand{i % 97:02d}"
+        model = f"Model{i:05d}"
+        suffix = CAR_SUFFIXES[i % len(CAR_SUFFIXES)] if i % 5 == 0 else ""
+        cars.append(f"{brand}_{model}{suffix}_{rnd.choice(YEARS)}")
+    return cars
+
+
+def _schedule(rnd, schedule_id=None):
+    start = 1700000000 + rnd.randint(0, 60 * 86400)
+    entry = {"Time_ActiveBetweenAny": [[start, start + 7 * 86400]]}
+    if schedule_id:
+        entry["id"] = schedule_id
+        entry["ScheduleID"] = schedule_id
+    return {"ScheduleList": [entry]}
+
+
+def _milestone_rewards(rnd, title, cars, variant):
+    levels = [
+        {"WinsRequired": wins, "RewardInfo": {"rewardType": 11, "name": rnd.choice(cars)}}
+        for wins in (5, 10, 15)
+    ]
+    if rnd.random() < 0.2:
+        levels.append({"WinsRequired": 20, "RewardInfo": {"rewardType": 44, "name": f"STICKER_{title}"}})
+    if variant == 0:
+        return {title: {"RewardLevels": levels}}
+    if variant == 1:
+        return levels
+    # Nested shape that only the recursive RewardLevels search finds
+    return {"Containers": {"Inner": {"Deep": [{"RewardLevels": [{"rewards": levels}]}]}}}
+
+
+def _event(rnd, title, cars, slots_per_event):
+    slots = []
+    for slot in range(1, slots_per_event + 1):
+        models = rnd.sample(cars, 4)
+        if slot % 3 == 0:
+            models.append(models[0].split("_")[0] + "_*")
+        slots.append({
+            "SlotIds": [f"{{Slot{slot}}}"],
+            "Restrictions": [{"RestrictionType": "CarModel", "Model": m} for m in models],
+        })
+    event = {
+        "EventSchedule": _schedule(rnd),
+        "LockinNamespaces": {"Namespaces": {title: {"LockinSlotsList": slots}}},
+        "EventMilestoneRewards": _milestone_rewards(rnd, title, cars, rnd.randint(0, 2)),
+        "GachaEventsCalendar": {"GachaEvents": [{
+            "GachaWeightAlterations": [
+                {"RewardType": 11, "RewardName": rnd.choice(cars), "AffectedGachaMachine": f"MACHINE_GOLD_{c}"}
+                for c in "AB"
+            ] + [{"RewardType": 3, "RewardName": "GOLD", "AffectedGachaMachine": "MACHINE_SILVER_A"}],
+        }]},
+    }
+    if rnd.random() < 0.1:
+        event["SpecialLadderEvents"] = {"LadderEvents": {"RaceEventGroups": [
+            {"CarPrizeForCompletionDetails": {"Car": rnd.choice(cars)}}
+        ]}}
+    return event
+
+
+def _showdown_event(rnd, cars, schedule_id, pin, models_per_showdown):
+    return {
+        "EventSchedule": _schedule(rnd, schedule_id),
+        "ShowdownEventsContainer": {"RaceEventGroups": [{
+            "PinPositionId": pin,
+            "RaceEvents": [{"Restrictions": [{"RestrictionType": "CarModels", "Models": rnd.sample(cars, models_per_showdown)}]}],
+        }]},
+    }
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False)
+
+
+def generate_corpus(root, events=200, showdowns=40, tournaments=10, milestones=20, cars=3000,
+                    localisation_entries=50000, noise_files=300, slots_per_event=6,
+                    models_per_showdown=24, seed=1234):
+    """Write a synthetic CSR2 drop (TextAsset, MonoBehaviour, metadata, wr.json) under root."""
+    rnd = random.Random(seed)
+    text_dir = os.path.join(root, "TextAsset")
+    mono_dir = os.path.join(root, "MonoBehaviour")
+    meta_dir = os.path.join(root, "metadata")
+    for d in (text_dir, mono_dir, meta_dir):
+        os.makedirs(d, exist_ok=True)
+
+    car_ids = _car_ids(rnd, cars)
+    translations_from, translations_to = [], []
+    # Leave ~3% of cars untranslated so missing-translation paths are exercised
+    for car in car_ids:
+        if rnd.random() > 0.03:
+            translations_from.append(f"TEXT_CAR_{car}_LONG")
+            translations_to.append(car.replace("_", " "))
+
+    promos = {}
+    event_titles = []
+    for i in range(events):
+        title = f"EVT_{i:05d}_{rnd.choice(YEARS[-5:])}"
+        event_titles.append(title)
+        translations_from.append(f"TEXT_{title}_TITLE")
+        translations_to.append(f"Synthetic Event {i}")
+        _write_json(os.path.join(text_dir, f"{title}.txt"), {title: _event(rnd, title, car_ids, slots_per_event)})
+        for car in rnd.sample(car_ids, 2):
+            promos.setdefault(car, []).append({"ScheduleIDList": [title], "quantity": rnd.choice([0, 100, 250])})
+
+        if i % 4 == 0:
+            sd_title = f"EVT_{i:05d}_SD"
+            sd = _showdown_event(rnd, car_ids, None, "SD_SPECIAL", models_per_showdown)
+            sd["ShowdownMilestoneRewards"] = {"RewardContainers": {sd_title: {"brackets": [
+                {"threshold": t, "rewards": [{"reward": {"rewardType": 11, "name": rnd.choice(car_ids)}}]}
+                for t in (100, 250)
+            ]}}}
+            _write_json(os.path.join(text_dir, f"{sd_title}.txt"), {sd_title: sd})
+
+    pins = ["SD_DEFAULT", "SD_ELITE_SHOWDOWN", "CHMPIONSHIP_SHOWDOWN"]
+    for i in range(showdowns):
+        schedule_id = f"SMP_SHOWDOWN_{i // 2 + 1}_W{i % 2 + 1}"
+        _write_json(
+            os.path.join(text_dir, f"{schedule_id}.txt"),
+            {schedule_id: _showdown_event(rnd, car_ids, schedule_id, pins[i % 3], models_per_showdown)},
+        )
+        if i % 2 == 1:
+            promos.setdefault(rnd.choice(car_ids), []).append({"ScheduleIDList": [schedule_id], "quantity": 500})
+
+    collection_slots = {}
+    for i in range(tournaments):
+        season = 244 + i
+        period = {}
+        for day in range(1, 4):
+            races = {}
+            for race in range(1, 4):
+                slot_id = f"coll_synth_{season}_{day}_{race}_Slot_1"
+                collection_slots[slot_id] = {"milestones": [{"names": [rnd.choice(car_ids)]}]}
+                races[f"Race{race}"] = {
+                    "SlotId": slot_id,
+                    "Restrictions": [rnd.choice([
+                        {"RestrictionType": "EPRange", "MinEP": 100, "MaxEP": 400},
+                        {"RestrictionType": "PPRange", "MinPP": 500, "MaxPP": 900},
+                        {"RestrictionType": "CarManufacturer"},
+                    ])],
+                    "RaceEvent": {"IsHalfMile": race % 2 == 0},
+                    "CooldownTime": 3600 * rnd.randint(1, 8),
+                }
+            period[f"Day{day}"] = races
+        config = {
+            "TournamentConfig": {"TournamentEvents": {str(season): {"PeriodDetails": period}}},
+            "EventSchedule": {"ScheduleList": [{"id": f"TOURNAMENTS_PARTS_GACHA_{season}", "Time_ActiveBetweenAny": [[1700000000, 1700600000]]}]},
+        }
+        _write_json(os.path.join(text_dir, f"TOURNAMENT_{season}.txt"), {f"TOURNAMENT_{season}": config})
+
+    for i in range(milestones):
+        title = str(100 + i)
+        _write_json(os.path.join(text_dir, f"{title}.txt"), {title: {
+            "EventSchedule": _schedule(rnd),
+            "CrewLeaderboardRewardDefinitions": {"SeasonalRewardCars": {title: {
+                "PrestigeCupCar": rnd.choice(car_ids), "secondaryPrizeCarDBid": rnd.choice(car_ids),
+            }}},
+        }})
+
+    for i in range(noise_files):
+        with open(os.path.join(text_dir, f"NOISE_{i:05d}.txt"), "w", encoding="utf-8") as fh:
+            fh.write("id,value\n" + "\n".join(f"{j},{rnd.random()}" for j in range(50)))
+
+    while len(translations_from) < localisation_entries:
+        n = len(translations_from)
+        translations_from.append(f"TEXT_UI_FILLER_{n}")
+        translations_to.append(f"Filler string {n}")
+    _write_json(os.path.join(mono_dir, "Localisation_EN.json"), {
+        "m_Name": "Localisation_EN", "TranslationsFrom": translations_from, "TranslationsTo": translations_to,
+    })
+
+    _write_json(os.path.join(meta_dir, "ShopTimeGatedEvents.meta"), {
+        "ShopTimeGatedEvents": {"GENERATED_TimeGatedCarPromotions": promos},
+    })
+    _write_json(os.path.join(meta_dir, "CollectionSlots.meta"), {"CollectionSlots": collection_slots})
+
+    wr = []
+    for car in car_ids:
+        if rnd.random() < 0.9:
+            wr.append({
+                "DB Name": car,
+                "WR-DYNO": f"{rnd.uniform(6, 14):.3f}",
+                "WR-BEST ET": rnd.choice(["n.A.", "0.000", f"{rnd.uniform(6, 14):.3f}"]),
+                "Un": rnd.choice(TIERS),
+                "★": rnd.choice(STARS),
+            })
+            if rnd.random() < 0.05:
+                wr.append(dict(wr[-1], **{"DB Name": car + "_EC"}))
+    _write_json(os.path.join(root, "wr.json"), wr)
+
+    return {
+        "root": root,
+        "cars": car_ids,
+        "event_titles": event_titles,
+        "counts": {
+            "events": events, "showdowns": showdowns, "tournaments": tournaments, "milestones": milestones,
+            "noise_files": noise_files, "localisation_entries": len(translations_from), "wr_entries": len(wr),
+        },
+    }
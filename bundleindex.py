@@ -0,0 +1,203 @@
+# bundleindex.py
+"""
+Persisted map from asset name to the bundle and path_id holding it, so a single asset can be
+pulled out of a drop without a full unpack_all_assets:
+
+    {"version": 1, "bundles": {"<bundle path>": {"size", "mtime_ns", "objects": [
+        {"container", "type", "name", "path_id"}, ...]}}}
+
+Bundles are re-scanned only when their size or mtime changed; scanning lists the container
+without reading any object. Updates are merged into the saved index under a lock file, so
+parallel -shard processes over the same folder keep each other's entries.
+"""
+import os
+import time
+import contextlib
+import UnityPy
+import jsoncodec
+from assetextractor import (
+    _walk_source, _bundle_base_name, _select_monobehaviours, index_entries,
+    write_image, write_textasset, write_monobehaviours
+)
+from utils import debug_log
+
+INDEX_FILE = "bundle_index.json"
+INDEX_VERSION = 1
+LOCK_TIMEOUT = 60.0
+# A lock older than this was left by a process that died holding it; holders keep it for a save
+LOCK_STALE_SECONDS = 30.0
+
+
+def index_path(source_folder="."):
+    return os.path.join(source_folder, INDEX_FILE)
+
+
+def _bundle_key(file_path, source_folder):
+    return os.path.relpath(file_path, source_folder).replace(os.sep, "/")
+
+
+def _signature(file_path):
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _bundle_files(source_folder):
+    return [
+        os.path.join(root, file_name)
+        for root, _, files in _walk_source(source_folder)
+        for file_name in files if "ASTC" in file_name
+    ]
+
+
+def load_index(source_folder="."):
+    """The saved index, or an empty one if it is missing, unreadable or from another version."""
+    path = index_path(source_folder)
+    empty = {"version": INDEX_VERSION, "bundles": {}}
+    if not os.path.isfile(path):
+        return empty
+    try:
+        index = jsoncodec.load_file(path)
+    except Exception as e:
+        debug_log(f"Ignoring unreadable bundle index {path}: {e}", "warn")
+        return empty
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return empty
+    return index
+
+
+def save_index(index, source_folder="."):
+    path = index_path(source_folder)
+    tmp_path = path + ".tmp"
+    jsoncodec.dump_file(index, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+@contextlib.contextmanager
+def _index_lock(source_folder, timeout=LOCK_TIMEOUT):
+    path = index_path(source_folder) + ".lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+                    debug_log(f"Removing stale lock {path}", "warn")
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {path}")
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _merge_and_save(source_folder, updates, removed=()):
+    """
+    Re-read the saved index under the lock, apply {bundle key: entry} updates, drop the removed
+    keys and bundles that are gone from disk, and save it. Returns the merged index, unsaved if
+    the lock timed out.
+    """
+    try:
+        with _index_lock(source_folder):
+            index = load_index(source_folder)
+            bundles = index["bundles"]
+            bundles.update(updates)
+            for key in [k for k in bundles if k in removed or not os.path.exists(os.path.join(source_folder, k))]:
+                del bundles[key]
+            save_index(index, source_folder)
+    except TimeoutError as e:
+        debug_log(f"Bundle index not saved: {e}", "warn")
+        index = load_index(source_folder)
+        index["bundles"].update(updates)
+        for key in removed:
+            index["bundles"].pop(key, None)
+    return index
+
+
+def update_index(source_folder, scanned):
+    """
+    Merge {bundle path: index_entries} collected during extraction into the saved index and drop
+    bundles that are gone from disk. Bundles not in scanned keep their previous entries.
+    """
+    updates = {}
+    for file_path, objects in scanned.items():
+        if not os.path.exists(file_path):
+            continue
+        size, mtime_ns = _signature(file_path)
+        updates[_bundle_key(file_path, source_folder)] = {"size": size, "mtime_ns": mtime_ns, "objects": objects}
+    index = _merge_and_save(source_folder, updates)
+    debug_log(f"Bundle index updated: {len(scanned)} bundle(s) scanned, {len(index['bundles'])} indexed", "debug")
+    return index
+
+
+def refresh_index(source_folder="."):
+    """Bring the saved index up to date, loading only bundles that are new or changed."""
+    index = load_index(source_folder)
+    old = index["bundles"]
+    bundles = {}
+    updates = {}
+    failed = set()
+    for file_path in _bundle_files(source_folder):
+        key = _bundle_key(file_path, source_folder)
+        size, mtime_ns = _signature(file_path)
+        entry = old.get(key)
+        if entry and entry.get("size") == size and entry.get("mtime_ns") == mtime_ns:
+            bundles[key] = entry
+            continue
+        try:
+            objects = index_entries(UnityPy.load(file_path), os.path.basename(file_path))
+        except Exception as e:
+            debug_log(f"Error indexing {key}: {e}", "error")
+            failed.add(key)
+            continue
+        bundles[key] = updates[key] = {"size": size, "mtime_ns": mtime_ns, "objects": objects}
+    # Scanning ran without the lock; only the merge into what is saved now holds it
+    if updates or set(bundles) != set(old):
+        index = _merge_and_save(source_folder, updates, failed)
+    debug_log(f"Bundle index: {len(index['bundles'])} bundle(s), {len(updates)} re-scanned", "info")
+    return index
+
+
+def find_assets(index, name, type_name=None):
+    """(bundle path, object) pairs whose name, name without extension or container path match."""
+    wanted = name.lower()
+    matches = []
+    for key, bundle in index["bundles"].items():
+        for obj in bundle["objects"]:
+            if type_name and obj["type"].lower() != type_name.lower():
+                continue
+            container = (obj["container"] or "").lower()
+            candidates = {obj["name"].lower(), os.path.splitext(obj["name"])[0].lower(), container, os.path.basename(container)}
+            if wanted in candidates:
+                matches.append((key, obj))
+    return matches
+
+
+def extract_asset(source_folder, bundle_key, obj, destination_folder, debug_mode=False):
+    """Load one bundle and write only the indexed object; returns the written path."""
+    file_path = os.path.join(source_folder, bundle_key)
+    env = UnityPy.load(file_path)
+    if obj["type"] == "MonoBehaviour":
+        mono_to_save = _select_monobehaviours(env, _bundle_base_name(os.path.basename(file_path)))
+        if not mono_to_save:
+            raise ValueError(f"No MonoBehaviour found in {bundle_key}")
+        return write_monobehaviours(mono_to_save, os.path.join(destination_folder, "MonoBehaviour", obj["name"]))
+
+    reader = next((o for path, o in env.container.items() if path == obj["container"] and o.path_id == obj["path_id"]), None)
+    if reader is None:
+        raise ValueError(f"{obj['container']} not found in {bundle_key}; run 'python main.py index' to refresh")
+    if obj["type"] == "TextAsset":
+        return write_textasset(reader, obj["container"], destination_folder, debug_mode)
+    return write_image(reader, obj["container"], destination_folder, debug_mode)
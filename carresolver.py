@@ -0,0 +1,115 @@
+# carresolver.py
+from collections import OrderedDict, namedtuple
+from schema import SHOP_PROMOTIONS
+from utils import car_suffix, translate_model_name_with_suffix
+
+DEFAULT_MAX_ENTRIES = 50000
+
+# translated is False when the id has no translation (pretty then falls back to the raw id);
+# wr is the raw car_stats_map entry or None; offers is a tuple of (schedule ids, quantity)
+CarRecord = namedtuple(
+    "CarRecord",
+    ["car_id", "pretty", "translated", "suffix", "color_suffix", "wr", "wr_time", "tier", "star", "wr_source", "offers"],
+)
+
+
+class CarResolver:
+    """
+    Run-scoped car lookups shared by every parser: each raw id is resolved once against the
+    translations, the WR table and the shop promotions. Both caches are LRUs bounded by
+    max_entries so long-lived library use (api.Lookups) does not grow without limit.
+    """
+
+    def __init__(self, translations=None, car_stats_map=None, shop_data=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.translations = translations or {}
+        self.car_stats_map = car_stats_map
+        self.shop_data = shop_data or {}
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._records = OrderedDict()
+        self._names = OrderedDict()
+        self._variants = OrderedDict()
+        self._keys = None
+        self._offers = None
+        self._by_schedule = None
+        # {"wr": car ids, "shop": schedule ids} looked up while a ResultCache records a file
+        self.deps = None
+
+    def _cached(self, cache, key, build):
+        if key in cache:
+            self.hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+        self.misses += 1
+        value = cache[key] = build()
+        if self.max_entries and len(cache) > self.max_entries:
+            cache.popitem(last=False)
+        return value
+
+    def set_wr_data(self, car_stats_map):
+        if car_stats_map is not self.car_stats_map:
+            self.car_stats_map = car_stats_map
+            self._records.clear()
+
+    @property
+    def keys(self):
+        if self._keys is None:
+            self._keys = list(self.translations.keys())
+        return self._keys
+
+    def variants(self, model, debug=False):
+        """Cached translate_model_name_with_suffix: (display, colored suffix, chosen key) per match."""
+        return self._cached(
+            self._variants, (model, debug),
+            lambda: tuple(translate_model_name_with_suffix(model, self.translations, debug_mode=debug, keys=self.keys)),
+        )
+
+    def resolve(self, car_id):
+        if self.deps is not None:
+            self.deps["wr"].add(car_id)
+        return self._record(car_id)
+
+    def _record(self, car_id):
+        return self._cached(self._records, car_id, lambda: self._build(car_id))
+
+    def _build(self, car_id):
+        pretty = self.translations.get(car_id)
+        wr = self.car_stats_map.get(car_id) if self.car_stats_map else None
+        display_time, star, tier, _, source = wr if wr else (None, None, None, None, "Dyno")
+        suffix, color_suffix = car_suffix(car_id)
+        return CarRecord(
+            car_id, pretty if pretty else car_id, bool(pretty), suffix, color_suffix,
+            wr, display_time, tier, star, source, self.offers().get(car_id, ()),
+        )
+
+    def name(self, car_id):
+        # Only the translation is used, so this is not a WR dependency. Same as the parsers' old
+        # translations.get(car_id, car_id): an empty translation stays "", unlike pretty
+        return self._cached(self._names, car_id, lambda: self.translations.get(car_id, car_id))
+
+    def offers(self):
+        """{car id: ((schedule ids), quantity), ...} from ShopTimeGatedEvents, built once."""
+        if self._offers is None:
+            self._offers = {
+                car_id: tuple((tuple(e.get("ScheduleIDList") or ()), e.get("quantity", 0)) for e in entries)
+                for car_id, entries in self._promotions().items()
+            }
+        return self._offers
+
+    def shop_entries(self, schedule_id):
+        """{car id: [promotion entries]} for the promotions listing schedule_id, in file order."""
+        if self.deps is not None:
+            self.deps["shop"].add(schedule_id)
+        if self._by_schedule is None:
+            by_schedule = {}
+            for car_id, entries in self._promotions().items():
+                for entry in entries:
+                    for sid in dict.fromkeys(entry.get("ScheduleIDList") or ()):
+                        by_schedule.setdefault(sid, {}).setdefault(car_id, []).append(entry)
+            self._by_schedule = by_schedule
+        return self._by_schedule.get(schedule_id, {})
+
+    def _promotions(self):
+        promos = SHOP_PROMOTIONS.get(self.shop_data)
+        return {car_id: entries for car_id, entries in promos.items() if isinstance(entries, list)}
@@ -0,0 +1,210 @@
+# diffdrop.py
+import os
+import re
+import difflib
+import jsoncodec
+from carresolver import CarResolver
+from eventdataparser import EventDataParser
+from milestonedataparser import MilestoneDataParser
+from showdownparser import ShowdownParser
+from tournamentparser import TournamentParser
+from logs import level_override
+from rundirs import RUNS_DIR
+from schema import SHOP_PROMOTIONS
+from sharding import textasset_group_key
+from snapshot import SNAPSHOT_SUFFIX, SnapshotStore, drop_hashes, load_snapshot
+from textstore import FolderStore
+from utils import (
+    debug_log, find_localisation_name, build_translation_lookup, load_shop_time_gated_events,
+    find_collection_file, build_collection_lookup
+)
+
+REPORT_FILE = "diff_report.json"
+TEXTASSET_PREFIX = "TextAsset/"
+LOOKUP_PREFIX = "lookup/"
+
+# Report section for each parser's output
+REPORT_SECTIONS = {
+    "EventDataParser": "events",
+    "MilestoneDataParser": "milestones",
+    "ShowdownParser": "showdowns",
+    "TournamentParser": "tournaments",
+}
+
+
+class DropSide:
+    """One side of a diff: a snapshot file, an extracted run folder or a bare TextAsset folder."""
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshot = None
+        self._lookups = None
+        if path.endswith(SNAPSHOT_SUFFIX):
+            self.snapshot = load_snapshot(path)
+            if self.snapshot is None:
+                raise ValueError(f"Could not load snapshot {path}")
+            self.hashes = self.snapshot["hashes"]
+            self.store = SnapshotStore(self.snapshot)
+            return
+        if not os.path.isdir(path):
+            raise ValueError(f"{path} is neither a snapshot nor a folder")
+        if os.path.isdir(os.path.join(path, "TextAsset")):
+            self.text_dir = os.path.join(path, "TextAsset")
+            self.mono_dir = os.path.join(path, "MonoBehaviour")
+            self.meta_dir = os.path.join(path, "metadata")
+            runs_dir = os.path.dirname(os.path.abspath(path))
+            if not os.path.isdir(self.meta_dir) and os.path.basename(runs_dir) == RUNS_DIR:
+                # Run folders hold only what the run extracted; metadata stays in the drop root
+                self.meta_dir = os.path.join(os.path.dirname(runs_dir), "metadata")
+        else:
+            self.text_dir, self.mono_dir, self.meta_dir = path, None, None
+        self.hashes = drop_hashes(self.text_dir, self.mono_dir or "", self.meta_dir or "")
+        self.store = FolderStore(self.text_dir)
+
+    def textasset_hashes(self):
+        return {
+            name[len(TEXTASSET_PREFIX):]: digest for name, digest in self.hashes.items()
+            if name.startswith(TEXTASSET_PREFIX) and not name.lower().endswith("_output.txt")
+        }
+
+    def lookup_hashes(self):
+        return {name[len(LOOKUP_PREFIX):]: digest for name, digest in self.hashes.items() if name.startswith(LOOKUP_PREFIX)}
+
+    def lookups(self):
+        """(translations, shop_data, collections), only built once a changed file needs parsing."""
+        if self._lookups is None:
+            if self.snapshot:
+                self._lookups = self.snapshot["translations"], self.snapshot["shop_data"], self.snapshot["collections"]
+            else:
+                translations, shop_data, collections = {}, None, {}
+                if self.mono_dir and os.path.isdir(self.mono_dir):
+                    filename = find_localisation_name(os.listdir(self.mono_dir))
+                    if filename:
+                        translations = build_translation_lookup(os.path.join(self.mono_dir, filename))
+                if self.meta_dir and os.path.isdir(self.meta_dir):
+                    shop_data, _ = load_shop_time_gated_events(self.meta_dir)
+                    collections = build_collection_lookup(find_collection_file(self.meta_dir))
+                self._lookups = translations, shop_data, collections
+        return self._lookups
+
+    def sections(self, file_filter, car_stats_map):
+        """{parser name: {file: text}} for the files passing file_filter."""
+        translations, shop_data, collections = self.lookups()
+        resolver = CarResolver(translations, car_stats_map, shop_data)
+        options = dict(store=self.store, translations=translations, file_filter=file_filter,
+                       console=False, text_output=False)
+        parsers = [
+            EventDataParser(shop_data=shop_data, resolver=resolver, **options),
+            MilestoneDataParser(resolver=resolver, **options),
+            ShowdownParser(shop_data=shop_data, car_stats_map=car_stats_map, resolver=resolver, **options),
+            TournamentParser(collections=collections, resolver=resolver, **options),
+        ]
+        result = {}
+        # Per-file parser chatter would drown the change summary
+        with level_override("warn"):
+            for parser in parsers:
+                name = type(parser).__name__
+                texts = {}
+                try:
+                    for file, text in parser.sections(parser.parse_records()):
+                        texts[file] = texts[file] + "\n" + text if file in texts else text
+                except Exception as e:
+                    debug_log(f"{name} failed on {self.path}: {e}", "error", force=True)
+                result[name] = texts
+        return result
+
+
+def _changed_files(old_hashes, new_hashes):
+    added = sorted(set(new_hashes) - set(old_hashes))
+    removed = sorted(set(old_hashes) - set(new_hashes))
+    changed = sorted(f for f in set(old_hashes) & set(new_hashes) if old_hashes[f] != new_hashes[f])
+    return added, removed, changed
+
+
+def diff_shop(old_shop, new_shop):
+    old, new = SHOP_PROMOTIONS.get(old_shop), SHOP_PROMOTIONS.get(new_shop)
+    return {
+        "added": {car: new[car] for car in sorted(set(new) - set(old))},
+        "removed": sorted(set(old) - set(new)),
+        "changed": {car: {"old": old[car], "new": new[car]} for car in sorted(set(old) & set(new)) if old[car] != new[car]},
+    }
+
+
+def diff_drops(old_path, new_path, car_stats_map=None):
+    """
+    Compare two drops by content hash and parse only the TextAssets that changed (plus their
+    _SD/_BS companions). Returns a JSON-serialisable change report.
+    """
+    old, new = DropSide(old_path), DropSide(new_path)
+    old_files, new_files = old.textasset_hashes(), new.textasset_hashes()
+    added, removed, changed = _changed_files(old_files, new_files)
+    lookups_added, lookups_removed, lookups_changed = _changed_files(old.lookup_hashes(), new.lookup_hashes())
+
+    report = {
+        "old": old_path,
+        "new": new_path,
+        "files": {
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+            "unchanged": len(set(old_files) & set(new_files)) - len(changed),
+        },
+        "lookups_changed": sorted(lookups_added + lookups_removed + lookups_changed),
+    }
+    for section in REPORT_SECTIONS.values():
+        report[section] = []
+
+    # An event's output also depends on its companions, so reparse whole groups on both sides
+    groups = {textasset_group_key(f) for f in added + removed + changed}
+    if groups:
+        file_filter = lambda f: textasset_group_key(f) in groups
+        if car_stats_map is None:
+            car_stats_map = ShowdownParser(console=False, text_output=False).fetch_wr_data()
+        old_sections = old.sections(file_filter, car_stats_map)
+        new_sections = new.sections(file_filter, car_stats_map)
+        for name, section in REPORT_SECTIONS.items():
+            before, after = old_sections.get(name, {}), new_sections.get(name, {})
+            for file in sorted(set(before) | set(after)):
+                old_text, new_text = before.get(file), after.get(file)
+                if old_text == new_text:
+                    continue
+                entry = {"file": file, "status": "added" if old_text is None else "removed" if new_text is None else "changed"}
+                if entry["status"] == "changed":
+                    entry["diff"] = list(difflib.unified_diff(
+                        old_text.splitlines(), new_text.splitlines(), "old/" + file, "new/" + file, lineterm=""
+                    ))
+                else:
+                    entry["text"] = new_text if old_text is None else old_text
+                report[section].append(entry)
+
+    if any(re.search(r"shoptimegatedevents", f, re.IGNORECASE) for f in report["lookups_changed"]):
+        report["shop_promotions"] = diff_shop(old.lookups()[1], new.lookups()[1])
+    return report
+
+
+def write_report(report, path=REPORT_FILE):
+    tmp_path = path + ".tmp"
+    jsoncodec.dump_file(report, tmp_path, indent=2)
+    os.replace(tmp_path, path)
+    debug_log(f"Diff report written to {path}", "success")
+    return path
+
+
+def log_summary(report):
+    files = report["files"]
+    debug_log(
+        f"{len(files['added'])} added, {len(files['removed'])} removed, {len(files['changed'])} changed, "
+        f"{files['unchanged']} unchanged TextAsset(s)",
+        "info", force=True,
+    )
+    if report["lookups_changed"]:
+        debug_log(f"Lookup files changed: {', '.join(report['lookups_changed'])}", "warn", force=True)
+    for section in REPORT_SECTIONS.values():
+        for entry in report[section]:
+            debug_log(f"{section}: {entry['status']} {entry['file']}", "info", force=True)
+    shop = report.get("shop_promotions")
+    if shop:
+        debug_log(
+            f"shop promotions: {len(shop['added'])} added, {len(shop['removed'])} removed, {len(shop['changed'])} changed",
+            "info", force=True,
+        )
@@ -1,19 +1,33 @@
 # eventdataparser.py
-import os
 import re
-import json
+import tempfile
 from colorama import Fore, Style
 from utils import (
-    debug_log, epoch_to_gmt, translate_model_name_with_suffix,
-    is_match, translate_event_name
+    debug_log, epoch_to_gmt, is_match, translate_event_name
 )
+from carresolver import CarResolver
+from schema import EVENT_SCHEDULE, LOCKIN_SLOTS, SPECIAL_LADDER_GROUPS, GACHA_EVENTS, SD_BRACKETS, KeySearch, layout
+from textstore import FolderStore
+from outputs import parser_output
+from resultcache import open_cache
+from tracing import tracer
 
 class EventDataParser:
-    def __init__(self, folder="TextAsset", translations=None, shop_data=None, debug=False):
+    def __init__(self, folder="TextAsset", translations=None, shop_data=None, debug=False, file_filter=None,
+                 console=True, text_output=True, store=None, resolver=None, cache_dir=None):
         self.folder = folder
+        self.store = store or FolderStore(folder)
         self.translations = translations or {}
         self.shop_data = shop_data or {}
+        self.resolver = resolver or CarResolver(self.translations, shop_data=self.shop_data)
+        # Where RewardLevels sits for each event layout, so the fallback search runs once per layout
+        self.reward_levels = KeySearch("RewardLevels")
         self.debug = debug
+        self.file_filter = file_filter
+        self.console = console
+        self.text_output = text_output
+        # Where -cache keeps result_cache.sqlite; None parses every file
+        self.cache_dir = cache_dir
         self.output_file = "event_output.txt"
 
     def _collect_milestone_rewards(self, event, title):
@@ -43,19 +57,7 @@ class EventDataParser:
                         else:
                             rewards_out.append(item)
         if not rewards_out:
-            def find_rewardlevels(obj):
-                found = []
-                if isinstance(obj, dict):
-                    for k, v in obj.items():
-                        if k == "RewardLevels" and isinstance(v, list):
-                            found.append(v)
-                        else:
-                            found.extend(find_rewardlevels(v))
-                elif isinstance(obj, list):
-                    for item in obj:
-                        found.extend(find_rewardlevels(item))
-                return found
-            for rl in find_rewardlevels(event):
+            for rl in self.reward_levels.find(event, layout(event, title=title), title=title):
                 for item in rl:
                     if isinstance(item, dict):
                         if "rewards" in item and isinstance(item["rewards"], list):
@@ -65,55 +67,79 @@ class EventDataParser:
         rewards_out = [r for r in rewards_out if isinstance(r, dict)]
         return rewards_out
 
-    def process(self):
-        events_data = []  # List to store event data for sorting
-        files = sorted([f for f in os.listdir(self.folder) if os.path.isfile(os.path.join(self.folder, f)) and f.lower().endswith(".txt")])
+    def parse_records(self):
+        return list(self.iter_records())
+
+    def _matching_sd_file(self, title, sd_files):
+        norm_year = title.split("_")[-1] if "_" in title and title.split("_")[-1].isdigit() else ""
+        norm_title = re.sub(r'[_ ]', '', title.lower())
+        if norm_year:
+            norm_title = norm_title.replace(norm_year.lower(), "")
+
+        for sd_file in sd_files:
+            norm_sd = re.sub(r'[_ ](sd|bs)[0-9]*\.txt$|_?[0-9]{4}\.txt$', '', sd_file, flags=re.IGNORECASE)
+            norm_sd = re.sub(r'[_ ]', '', norm_sd.lower())
+            if norm_sd == norm_title:
+                return sd_file
+        return None
+
+    def iter_records(self):
+        files = self.store.names()
         sd_files = [f for f in files if "_sd" in f.lower() or f.lower().endswith("_bs.txt")]
-        for filename in files:
+        cache = open_cache(self)
+        for filename in tracer.each(files, "parse.EventDataParser"):
+            if self.file_filter and not self.file_filter(filename):
+                continue
             if "_sd" in filename.lower() or "smp_showdown_" in filename.lower():
                 if self.debug:
-                    debug_log(f"Skipping {filename} (Showdown variant)", "debug")
+                    debug_log(lambda: f"Skipping {filename} (Showdown variant)", "debug")
                 continue
             if "tournament_" in filename.lower():
                 if self.debug:
-                    debug_log(f"Skipping {filename} (Tournament variant)", "debug")
+                    debug_log(lambda: f"Skipping {filename} (Tournament variant)", "debug")
                 continue                
             if filename.lower().endswith("_bs.txt"):
                 if self.debug:
-                    debug_log(f"Skipping {filename} (Bespoke Showdown variant)", "debug")
+                    debug_log(lambda: f"Skipping {filename} (Bespoke Showdown variant)", "debug")
                 continue            
 
-            path = os.path.join(self.folder, filename)
-            try:
-                with open(path, "r", encoding="utf-8") as fh:
-                    content = fh.read()
-            except Exception as e:
-                debug_log(f"Failed to read {filename}: {e}", "error")
+            # Route on the first few hundred bytes before paying for a full read and parse
+            root_key, shape = self.store.sniff(filename)
+            if shape != "object":
+                debug_log(lambda: f"Skipping {filename} (not event format)", "warn")
                 continue
-
-            if not re.search(r'^\s*\{\s*".+?"\s*:\s*{', content):
-                debug_log(f"Skipping {filename} (not event format)", "warn")
+            if re.fullmatch(r"\d+", root_key):
+                if self.debug:
+                    debug_log(lambda: f"Skipping {filename} (milestone file detected)", "debug")
                 continue
 
+            # The root key is the event title, so the _SD/_BS companion is known before loading
+            matching_sd_file = self._matching_sd_file(root_key, sd_files)
+            if cache:
+                record = cache.get(filename, companions=(matching_sd_file,))
+                if record is not None:
+                    yield record
+                    continue
+
             try:
-                data = json.loads(content)
+                data = self.store.load(filename)
+            except OSError as e:
+                debug_log(f"Failed to read {filename}: {e}", "error")
+                continue
             except Exception as e:
                 debug_log(f"Failed to parse JSON {filename}: {e}", "error")
                 continue
 
             title = list(data.keys())[0]
-            if re.fullmatch(r"\d+", title):
-                if self.debug:
-                    debug_log(f"Skipping {filename} (milestone file detected)", "debug")
-                continue
 
             event = data[title]
-            debug_log(f"Processing {title}", "info")
+            debug_log(lambda: f"Processing {title}", "info")
 
+            console = self.console
             console_lines = []
             file_lines = []
 
-            schedule = event.get("EventSchedule", {}).get("ScheduleList", [])
+            schedule = EVENT_SCHEDULE.get(event)
             start_epoch = end_epoch = None
             if schedule and isinstance(schedule, list) and "Time_ActiveBetweenAny" in schedule[0]:
                 try:
@@ -123,29 +149,13 @@ class EventDataParser:
 
             sd_prizes = {}
             sd_event_name = None
-            norm_year = title.split("_")[-1] if "_" in title and title.split("_")[-1].isdigit() else ""
-            norm_title = re.sub(r'[_ ]', '', title.lower())
-            if norm_year:
-                norm_title = norm_title.replace(norm_year.lower(), "")
-
-            matching_sd_file = None
-            for sd_file in sd_files:
-                norm_sd = re.sub(r'[_ ](sd|bs)[0-9]*\.txt$|_?[0-9]{4}\.txt$', '', sd_file, flags=re.IGNORECASE)
-                norm_sd = re.sub(r'[_ ]', '', norm_sd.lower())
-                if norm_sd == norm_title:
-                    matching_sd_file = sd_file
-                    break
-
             if matching_sd_file:
-                sd_path = os.path.join(self.folder, matching_sd_file)
                 try:
-                    with open(sd_path, "r", encoding="utf-8") as fh:
-                        sd_content = fh.read()
-                    sd_data = json.loads(sd_content)
+                    sd_data = self.store.load(matching_sd_file)
                     sd_title = list(sd_data.keys())[0]
                     sd_event = sd_data[sd_title]
                     sd_event_name = translate_event_name(sd_title, self.translations)
-                    brackets = sd_event.get("ShowdownMilestoneRewards", {}).get("RewardContainers", {}).get(sd_title, {}).get("brackets", [])
+                    brackets = SD_BRACKETS.get(sd_event, title=sd_title)
                     for bracket in brackets:
                         threshold = bracket.get("threshold")
                         for rew in bracket.get("rewards", []):
@@ -155,11 +165,11 @@ class EventDataParser:
                                 if name:
                                     sd_prizes[name] = threshold
                     if sd_prizes:
-                        debug_log(f"Extracted SD prizes from {matching_sd_file}: {sd_prizes}", "info")
+                        debug_log(lambda: f"Extracted SD prizes from {matching_sd_file}: {sd_prizes}", "info")
                 except Exception as e:
                     debug_log(f"Failed to process SD file {matching_sd_file}: {e}", "error")
 
-            lockins = event.get("LockinNamespaces", {}).get("Namespaces", {}).get(title, {}).get("LockinSlotsList", [])
+            lockins = LOCKIN_SLOTS.get(event, title=title)
             slot_models = {}
             for entry in lockins:
                 slot_ids = entry.get("SlotIds", [])
@@ -208,7 +218,7 @@ class EventDataParser:
                         prize_value = name
 
             special_prize = None
-            special_ladder = event.get("SpecialLadderEvents", {}).get("LadderEvents", {}).get("RaceEventGroups", [])
+            special_ladder = SPECIAL_LADDER_GROUPS.get(event)
             if isinstance(special_ladder, list):
                 for group in special_ladder:
                     car_prize = group.get("CarPrizeForCompletionDetails")
@@ -219,21 +229,10 @@ class EventDataParser:
                             special_prize = car_prize
                         break
 
-            shop_map = {}
-            if self.shop_data:
-                promos = self.shop_data.get("ShopTimeGatedEvents", {}).get("GENERATED_TimeGatedCarPromotions", {})
-                for car_name, entries in promos.items():
-                    if not isinstance(entries, list):
-                        continue
-                    matching_entries = [
-                        entry for entry in entries
-                        if title in (entry.get("ScheduleIDList") or [])
-                    ]
-                    if matching_entries:
-                        shop_map[car_name] = matching_entries
+            shop_map = self.resolver.shop_entries(title)
 
             gold_rewards = []
-            for gacha in event.get("GachaEventsCalendar", {}).get("GachaEvents", []):
+            for gacha in GACHA_EVENTS.get(event):
                 for alt in gacha.get("GachaWeightAlterations", []):
                     if alt.get("RewardType") == 11:
                         rn = alt.get("RewardName")
@@ -244,18 +243,21 @@ class EventDataParser:
 
             pretty_title = translate_event_name(title, self.translations)
             if pretty_title != title:
-                console_lines.append(f"{Fore.CYAN}{pretty_title}{Style.RESET_ALL} ({title})")
+                if console:
+                    console_lines.append(f"{Fore.CYAN}{pretty_title}{Style.RESET_ALL} ({title})")
                 file_lines.append(f"{pretty_title} ({title})")
             else:
-                console_lines.append(f"{Fore.CYAN}{title}{Style.RESET_ALL}")
+                if console:
+                    console_lines.append(f"{Fore.CYAN}{title}{Style.RESET_ALL}")
                 file_lines.append(title)
             if start_epoch and end_epoch:
-                console_lines.append(epoch_to_gmt(start_epoch))
-                console_lines.append(epoch_to_gmt(end_epoch))
                 file_lines.append(epoch_to_gmt(start_epoch))
                 file_lines.append(epoch_to_gmt(end_epoch))
-            console_lines.append("")
+                if console:
+                    console_lines.extend(file_lines[-2:])
             file_lines.append("")
+            if console:
+                console_lines.append("")
 
             def slot_sort_key(slots):
                 nums = []
@@ -282,13 +284,13 @@ class EventDataParser:
                     label = "Slot " + " / ".join(others)
                 else:
                     label = "Slot ?"
-                console_lines.append(f"{Fore.GREEN}{label}{Style.RESET_ALL}")
+                if console:
+                    console_lines.append(f"{Fore.GREEN}{label}{Style.RESET_ALL}")
                 file_lines.append(label)
 
                 for model_raw in models_tuple:
-                    translated_variants = translate_model_name_with_suffix(model_raw, self.translations, debug_mode=self.debug)
+                    translated_variants = self.resolver.variants(model_raw, self.debug)
                     for pretty, suffix_color, raw_id in translated_variants:
-                        console_display = pretty + (f" {suffix_color}" if suffix_color else "")
                         file_display = pretty
                         annotations = []
 
@@ -298,7 +300,7 @@ class EventDataParser:
                                 break
 
                         if any(is_match(gr, raw_id) or is_match(raw_id, gr) for gr in gold_rewards):
-                            gk_text = f"{Fore.YELLOW}Pullable GK{Style.RESET_ALL}" if suffix_color else "Pullable GK"
+                            gk_text = f"{Fore.YELLOW}Pullable GK{Style.RESET_ALL}" if console and suffix_color else "Pullable GK"
                             annotations.append(gk_text)
 
                         shop_annotations = []
@@ -312,14 +314,13 @@ class EventDataParser:
                                 if any(is_match(shop_key, ck) or is_match(ck, shop_key) for ck in check_keys):
                                     qty = entry.get("quantity", 0)
                                     shop_text = "0 Gold Coins" if qty == 0 else f"{qty} Gold Coins"
-                                    colored = f"{Fore.YELLOW}{shop_text}{Style.RESET_ALL}"
-                                    shop_annotations.append(colored)
+                                    shop_annotations.append(f"{Fore.YELLOW}{shop_text}{Style.RESET_ALL}" if console else shop_text)
 
                         if shop_annotations:
                             seen = set()
                             unique = []
                             for ann in shop_annotations:
-                                plain = re.sub(r'\x1b\[[0-9;]*m', '', ann)
+                                plain = re.sub(r'\x1b\[[0-9;]*m', '', ann) if console else ann
                                 if plain not in seen:
                                     seen.add(plain)
                                     unique.append(ann)
@@ -328,23 +329,28 @@ class EventDataParser:
                         for sd_name, thresh in sd_prizes.items():
                             if is_match(sd_name, model_raw) or is_match(model_raw, sd_name):
                                 sd_text = f"{sd_event_name} {thresh} SD Prize Car"
-                                console_sd_text = f"{Fore.BLUE}{sd_text}{Style.RESET_ALL}"
-                                annotations.append(console_sd_text)
+                                annotations.append(f"{Fore.BLUE}{sd_text}{Style.RESET_ALL}" if console else sd_text)
                                 break
 
                         # REMOVED: No more "CRDB: ..." annotation on regular cars
 
                         bullet_console = "- "
                         bullet_file = "- "
+                        console_display = pretty + (f" {suffix_color}" if suffix_color else "")
 
                         if annotations:
-                            console_lines.append(f"{bullet_console}{console_display} - {' / '.join(annotations)}")
-                            plain_annotations = [re.sub(r'\x1b\[[0-9;]*m', '', a) for a in annotations]
+                            if console:
+                                console_lines.append(f"{bullet_console}{console_display} - {' / '.join(annotations)}")
+                                plain_annotations = [re.sub(r'\x1b\[[0-9;]*m', '', a) for a in annotations]
+                            else:
+                                plain_annotations = annotations
                             file_lines.append(f"{bullet_file}{file_display} - {' / '.join(plain_annotations)}")
                         else:
-                            console_lines.append(f"{bullet_console}{console_display}")
+                            if console:
+                                console_lines.append(f"{bullet_console}{console_display}")
                             file_lines.append(f"{bullet_file}{file_display}")
-                console_lines.append("")
+                if console:
+                    console_lines.append("")
                 file_lines.append("")
 
             # Prize handling – dash bullet + optional debug CRDB in parentheses
@@ -354,11 +360,11 @@ class EventDataParser:
             sticker_file_prefix = "- Prize Sticker : "
 
             if special_prize:
-                translated = self.translations.get(special_prize, special_prize)
+                translated = self.resolver.name(special_prize)
                 raw_key = special_prize
                 is_sticker = False
             elif prize_type == "Car":
-                translated = self.translations.get(prize_value, prize_value)
+                translated = self.resolver.name(prize_value)
                 raw_key = prize_value
                 is_sticker = False
             elif prize_type == "Sticker":
@@ -379,7 +385,7 @@ class EventDataParser:
                             max_info = info
                     if max_info and max_info.get("rewardType") == 11 and max_info.get("name"):
                         raw_key = max_info.get("name")
-                        translated = self.translations.get(raw_key, raw_key)
+                        translated = self.resolver.name(raw_key)
                         is_sticker = False
                     else:
                         translated = None
@@ -401,32 +407,79 @@ class EventDataParser:
                     console_base += f" ({raw_key})"
                     file_base += f" ({raw_key})"
 
-                console_lines.append(f"{console_base}{Style.RESET_ALL}")
+                if console:
+                    console_lines.append(f"{console_base}{Style.RESET_ALL}")
                 file_lines.append(file_base)
 
-            console_lines.append("")
+            if console:
+                console_lines.append("")
             file_lines.append("")
 
-            events_data.append({
-                "start_epoch": start_epoch if start_epoch else float("inf"),
+            record = {
+                "file": filename,
+                "start_epoch": start_epoch if start_epoch else None,
                 "console_lines": console_lines,
                 "file_lines": file_lines
-            })
-
-        events_data.sort(key=lambda x: x["start_epoch"])
-
-        console_lines = []
-        file_lines = []
-        for event in events_data:
-            console_lines.extend(event["console_lines"])
-            file_lines.extend(event["file_lines"])
+            }
+            if cache:
+                cache.put(filename, record)
+            yield record
+
+        if cache:
+            cache.close()
+
+    def _ordered(self, events_data):
+        events_data = sorted(events_data, key=lambda x: x["file"])
+        events_data.sort(key=lambda x: x["start_epoch"] if x["start_epoch"] else float("inf"))
+        return events_data
+
+    def sections(self, events_data):
+        return [(event["file"], "\n".join(event["file_lines"])) for event in self._ordered(events_data)]
+
+    def _spooled(self, events_data):
+        """
+        The events in start_epoch order as (file, file text, console text). Their text is spooled
+        to a temporary file as it comes in, so only the sort keys are held until every event has
+        been seen.
+        """
+        with tempfile.TemporaryFile() as spool:
+            keys = []
+            for event in events_data:
+                file_text = "\n".join(event["file_lines"]).encode("utf-8", "surrogatepass")
+                console_text = "\n".join(event["console_lines"]).encode("utf-8", "surrogatepass")
+                start = event["start_epoch"] if event["start_epoch"] else float("inf")
+                keys.append((start, event["file"], spool.tell(), len(file_text), len(console_text)))
+                spool.write(file_text + console_text)
+            keys.sort()
+            for _, filename, offset, file_size, console_size in keys:
+                spool.seek(offset)
+                data = spool.read(file_size + console_size)
+                yield (
+                    filename,
+                    data[:file_size].decode("utf-8", "surrogatepass"),
+                    data[file_size:].decode("utf-8", "surrogatepass"),
+                )
+
+    def render(self, events_data, run=None):
+        """
+        Write the events in start_epoch order. Only a run writing the outputs spools them to disk;
+        without one (the API) they are sorted in memory like sections() does.
+        """
+        if run is None:
+            ordered = (
+                (event["file"], "\n".join(event["file_lines"]), "\n".join(event["console_lines"]))
+                for event in self._ordered(events_data)
+            )
+        else:
+            ordered = self._spooled(events_data)
+        out = parser_output(self, run)
+        with out:
+            for filename, file_text, console_text in ordered:
+                out.add(filename, file_text, console=console_text)
+        out.show()
+        if out.written:
+            debug_log(f"Event output written to {self.output_file}", "success")
+        return out.text()
 
-        console_text = "\n".join(console_lines)
-        print(console_text)
-
-        file_text = "\n".join(file_lines)
-        with open(os.path.join(self.folder, self.output_file), "w", encoding="utf-8") as f:
-            f.write(file_text)
-        debug_log(f"Event output written to {self.output_file}", "success")
-
-        return file_text
\ No newline at end of file
+    def process(self):
+        return self.render(self.iter_records())
@@ -0,0 +1,97 @@
+# jsoncodec.py
+import os
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Preference order when no backend is forced; stdlib is always available
+BACKENDS = ["orjson", "msgspec", "json"]
+BACKEND_ENV = "EVENTDATAPARSER_JSON"
+
+_backend = "json"
+# Digits → "0", everything else → " ": a run of 19 zeros is a number that may not fit in 64 bits
+_DIGIT_MASK = bytes(0x30 if 0x30 <= i <= 0x39 else 0x20 for i in range(256))
+_LONG_NUMBER = b"0" * 19
+_fast_loads = None
+_fast_dumps = None
+
+
+def available_backends():
+    return [name for name in BACKENDS if name == "json" or globals().get(name) is not None]
+
+
+def set_backend(name=None):
+    """Select the JSON backend (orjson, msgspec or json); None picks the fastest installed one."""
+    global _backend, _fast_loads, _fast_dumps
+    available = available_backends()
+    if name and name not in available:
+        name = None
+    name = name or available[0]
+
+    if name == "orjson":
+        _fast_loads, _fast_dumps = orjson.loads, orjson.dumps
+    elif name == "msgspec":
+        encoder = msgspec.json.Encoder()
+        _fast_loads, _fast_dumps = msgspec.json.decode, encoder.encode
+    else:
+        _fast_loads = _fast_dumps = None
+    _backend = name
+    return name
+
+
+def get_backend():
+    return _backend
+
+
+def _may_overflow(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8", "surrogatepass")
+    return _LONG_NUMBER in data.translate(_DIGIT_MASK)
+
+
+def loads(data):
+    """Parse JSON from bytes or str; bytes skip the separate UTF-8 decode step."""
+    # Integers past 64 bits come back as floats from some backends instead of failing
+    if _fast_loads is not None and not _may_overflow(data):
+        try:
+            return _fast_loads(data)
+        except Exception:
+            # NaN/Infinity, >64-bit ints and lone surrogates are only accepted by stdlib;
+            # retrying there keeps results identical to json.loads
+            pass
+    return json.loads(data)
+
+
+def load_file(path, strip_bom=False):
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if strip_bom and data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    return loads(data)
+
+
+def dump_file(obj, path, indent=None):
+    """Write obj as UTF-8 JSON. Indented output always goes through stdlib so files stay byte-identical."""
+    if indent is None and _fast_dumps is not None:
+        try:
+            data = _fast_dumps(obj)
+        except Exception:
+            data = None
+        if data is not None:
+            with open(path, "wb") as fh:
+                fh.write(data)
+            return
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(obj, fh, ensure_ascii=False, indent=indent)
+
+
+set_backend(os.environ.get(BACKEND_ENV))
+
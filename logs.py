@@ -0,0 +1,253 @@
+# logs.py
+import os
+import sys
+import time
+import atexit
+import logging
+import contextlib
+import colorama
+from colorama import Fore, Style
+
+LOGGER_NAME = "eventdataparser"
+DEFAULT_LEVEL = "info"
+DEFAULT_WARN_LIMIT = 20
+FLUSH_INTERVAL = 0.5
+
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "success": SUCCESS,
+    "warn": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+COLORS = {
+    "info": Fore.CYAN,
+    "warn": Fore.YELLOW,
+    "success": Fore.GREEN,
+    "error": Fore.RED,
+    "debug": Fore.MAGENTA,
+}
+
+_logger = logging.getLogger(LOGGER_NAME)
+_logger.setLevel(logging.DEBUG)
+_logger.propagate = False
+_threshold = None
+_force_floor = logging.NOTSET
+_rate_limit = None
+_colorama_ready = False
+# The line-buffered stdout configure_logging switched to block buffering; restored at exit
+_saved_stdout = None
+
+
+class _LazyMessage:
+    """Defers building a message until a handler actually emits it."""
+
+    __slots__ = ("fn", "text")
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.text = None
+
+    def __str__(self):
+        if self.text is None:
+            self.text = str(self.fn())
+        return self.text
+
+
+class _ConsoleHandler(logging.Handler):
+    """
+    Writes to whatever sys.stdout currently is (so redirect_stdout still works) and only
+    flushes on errors or every FLUSH_INTERVAL seconds instead of once per line.
+    """
+
+    def __init__(self, color=True):
+        super().__init__()
+        self.color = color
+        self._last_flush = time.monotonic()
+
+    def emit(self, record):
+        try:
+            tag = getattr(record, "tag", "info")
+            stream = sys.stdout
+            if self.color:
+                stream.write(f"{COLORS.get(tag, Fore.WHITE)}[{tag.upper()}]{Style.RESET_ALL} {record.getMessage()}\n")
+            else:
+                stream.write(f"[{tag.upper()}] {record.getMessage()}\n")
+            now = time.monotonic()
+            if record.levelno >= logging.ERROR or now - self._last_flush >= FLUSH_INTERVAL:
+                stream.flush()
+                self._last_flush = now
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        try:
+            sys.stdout.flush()
+        except Exception:
+            pass
+        self._last_flush = time.monotonic()
+
+
+class _WarningRateLimit(logging.Filter):
+    """Lets the first `limit` warnings from each call site through and counts the rest."""
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.counts = {}
+        self.last = {}
+
+    def filter(self, record):
+        if not self.limit or record.levelno != logging.WARNING or getattr(record, "summary", False):
+            return True
+        site = (record.pathname, record.lineno)
+        count = self.counts.get(site, 0) + 1
+        self.counts[site] = count
+        if count <= self.limit:
+            self.last[site] = record
+            return True
+        return False
+
+    def summary(self):
+        for site, count in self.counts.items():
+            suppressed = count - self.limit
+            if suppressed > 0:
+                yield suppressed, self.last[site]
+
+
+def _argv_value(flag, default):
+    if flag in sys.argv:
+        idx = sys.argv.index(flag)
+        if idx + 1 < len(sys.argv):
+            return sys.argv[idx + 1]
+    return default
+
+
+def configure_logging(level=None, log_file=None, warn_limit=None, quiet=None):
+    """
+    Set up console (and optional file) logging. Anything not given is read from the CLI:
+    -loglevel debug|info|warn|error (-debug implies debug), -logfile PATH, -warnlimit N, -quiet.
+    -quiet logs warnings and errors only, without colors, and never initializes colorama.
+    """
+    global _threshold, _force_floor, _rate_limit, _colorama_ready, _saved_stdout
+    if quiet is None:
+        quiet = "-quiet" in sys.argv
+    if level is None:
+        if "-loglevel" in sys.argv:
+            level = _argv_value("-loglevel", DEFAULT_LEVEL)
+        elif "-debug" in sys.argv:
+            level = "debug"
+        else:
+            level = "warn" if quiet else DEFAULT_LEVEL
+    if log_file is None:
+        log_file = _argv_value("-logfile", None)
+    if warn_limit is None:
+        try:
+            warn_limit = int(_argv_value("-warnlimit", DEFAULT_WARN_LIMIT))
+        except ValueError:
+            warn_limit = DEFAULT_WARN_LIMIT
+
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+
+    _threshold = LEVELS.get(str(level).lower(), logging.INFO)
+    _force_floor = logging.WARNING if quiet else logging.NOTSET
+    if not quiet and not _colorama_ready:
+        colorama.init(autoreset=True)
+        _colorama_ready = True
+    _rate_limit = _WarningRateLimit(warn_limit)
+    console = _ConsoleHandler(color=not quiet)
+    console.addFilter(_rate_limit)
+    _logger.addHandler(console)
+
+    if log_file:
+        file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(process)d %(tag_upper)s %(message)s"))
+        file_handler.addFilter(_add_tag_upper)
+        _logger.addHandler(file_handler)
+
+    # Batch console writes; the handler flushes on errors and on an interval. Only a terminal is
+    # line buffered to begin with, and it gets its line buffering back at exit
+    if not os.environ.get("PYTHONUNBUFFERED") and _saved_stdout is None:
+        try:
+            if sys.stdout.line_buffering:
+                _saved_stdout = sys.stdout
+                sys.stdout.reconfigure(line_buffering=False)
+        except (AttributeError, ValueError):
+            pass
+
+
+def _add_tag_upper(record):
+    record.tag_upper = getattr(record, "tag", "info").upper()
+    return True
+
+
+def log_enabled(level="info"):
+    if _threshold is None:
+        configure_logging()
+    return LEVELS.get(level, logging.INFO) >= _threshold
+
+
+def debug_log(msg, level="info", force=False):
+    """
+    Colored logging used across modules. Messages below -loglevel are dropped unless force=True
+    (with -quiet, force only lets warnings and errors through).
+    msg may be a zero-argument callable so hot paths only build the text when it is emitted.
+    """
+    if _threshold is None:
+        configure_logging()
+    levelno = LEVELS.get(level, logging.INFO)
+    if levelno < _threshold and not (force and levelno >= _force_floor):
+        return
+    if callable(msg):
+        msg = _LazyMessage(msg)
+    _logger.log(levelno, msg, stacklevel=2, extra={"tag": level})
+
+
+@contextlib.contextmanager
+def level_override(level):
+    """Temporarily raise the log threshold (forced messages included), e.g. around library calls."""
+    global _threshold, _force_floor
+    if _threshold is None:
+        configure_logging()
+    saved = _threshold, _force_floor
+    _threshold = _force_floor = LEVELS.get(level, logging.INFO)
+    try:
+        yield
+    finally:
+        _threshold, _force_floor = saved
+
+
+def flush_logs():
+    """Report warnings hidden by the rate limit and flush buffered output."""
+    if _rate_limit is not None:
+        for suppressed, record in _rate_limit.summary():
+            _logger.log(
+                logging.WARNING,
+                f"... {suppressed} more like \"{record.getMessage()}\" ({os.path.basename(record.pathname)}:{record.lineno})",
+                extra={"tag": "warn", "summary": True},
+            )
+        _rate_limit.counts.clear()
+        _rate_limit.last.clear()
+    for handler in _logger.handlers:
+        handler.flush()
+
+
+def _restore_stdout():
+    global _saved_stdout
+    if _saved_stdout is not None:
+        stream, _saved_stdout = _saved_stdout, None
+        try:
+            stream.reconfigure(line_buffering=True)
+        except (AttributeError, ValueError):
+            pass
+
+
+# atexit runs in reverse order: flush the summaries first, then hand stdout back
+atexit.register(_restore_stdout)
+atexit.register(flush_logs)
@@ -2,7 +2,6 @@
 import os
 import sys
 import re
-import json
 import time
 import traceback
 from datetime import datetime
@@ -26,253 +25,153 @@ def install_if_missing(packages):
 
 install_if_missing(required_packages)
             
-from colorama import init, Fore, Style
-import UnityPy  
-from utils import debug_log, find_translation_file, build_translation_lookup, load_shop_time_gated_events, find_collection_file, build_collection_lookup
+from colorama import Fore, Style
+import jsoncodec
+import profiling
+import tracing
+from logs import configure_logging, flush_logs
+from outputs import DEFAULT_FORMATS, RunOutput, parse_formats
+from carresolver import DEFAULT_MAX_ENTRIES, CarResolver
+from assetextractor import unpack_all_assets, plan_bundles, log_plan
+from bundleindex import refresh_index, update_index, find_assets, extract_asset
+from runmetrics import METRICS_FILE, metrics, phase
+from rundirs import DEFAULT_KEEP_RUNS, new_run_dir, publish_run, start_garbage_collection
+from snapshot import DEFAULT_KEEP_SNAPSHOTS, SNAPSHOT_SUFFIX, SnapshotStore, drop_hashes, mapping_digest, snapshot_key, snapshot_path, build_snapshot, write_snapshot, load_snapshot, latest_snapshot, prune_snapshots
+from wrsources import parse_sources
+from diffdrop import REPORT_FILE, diff_drops, write_report, log_summary
+from sharding import parse_shard_spec, shard_dir, textasset_filter, write_shard_records, find_shard_dirs, load_shard_records
+from utils import debug_log, get_arg_value, find_translation_file, find_localisation_name, build_translation_lookup, load_shop_time_gated_events, find_collection_file, build_collection_lookup
 from eventdataparser import EventDataParser
 from milestonedataparser import MilestoneDataParser
 from showdownparser import ShowdownParser
 from tournamentparser import TournamentParser  
 
-init(autoreset=True)        
-
-def unpack_all_assets(source_folder: str, destination_folder: str):
-    debug_log("Extracting Resources...", "info")
-    astc_count = 0
-    failed_files = 0
-    debug_mode = "-debug" in sys.argv
-
+def output_formats():
+    if "-format" not in sys.argv:
+        return DEFAULT_FORMATS
     try:
-        for root, dirs, files in os.walk(source_folder):
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in {'__pycache__'}]
-            if debug_mode and any("ASTC" in f.upper() for f in files):
-                rel_path = os.path.relpath(root, source_folder)
-                if rel_path == ".":
-                    rel_path = "."
-                debug_log(f"Scanning directory: {rel_path}", "debug")
-
-            for file_name in files:
-                if "ASTC" not in file_name:
-                    continue
-
-                astc_count += 1
-                file_path = os.path.join(root, file_name)
-                if debug_mode:
-                    debug_log(f"Processing File: {file_name}", "debug")
-
-                try:
-                    env = UnityPy.load(file_path)
-                    file_name_lower = file_name.lower()
-                    extract_resources = "resources" in file_name_lower
-                    extract_metadata = "metadata" in file_name_lower
-
-                    # --- Texture2D and Sprite extraction (unchanged) ---
-                    if extract_resources or not (extract_resources or extract_metadata):
-                        for path, obj in env.container.items():
-                            if obj.type.name in ["Texture2D", "Sprite"]:
-                                try:
-                                    data = obj.read()
-                                    folder_name = obj.type.name
-                                    filename = os.path.basename(path).upper()
-                                    dest = os.path.join(destination_folder, folder_name, filename)
-                                    os.makedirs(os.path.dirname(dest), exist_ok=True)
-                                    dest = os.path.splitext(dest)[0] + ".png"
-                                    if debug_mode:
-                                        debug_log(f"Writing {obj.type.name} to: {dest}", "debug")
-                                    data.image.save(dest)
-                                except Exception as e:
-                                    debug_log(f"Error writing {obj.type.name} {path}: {e}", "error")
-
-                    # --- TextAsset extraction (unchanged) ---
-                    if extract_metadata or not (extract_resources or extract_metadata):
-                        for path, obj in env.container.items():
-                            if obj.type.name == "TextAsset":
-                                try:
-                                    data = obj.read()
-                                    filename = os.path.basename(path).upper()
-                                    dest = os.path.join(destination_folder, "TextAsset", filename)
-                                    os.makedirs(os.path.dirname(dest), exist_ok=True)
-                                    dest = os.path.splitext(dest)[0] + ".txt"
-                                    if debug_mode:
-                                        debug_log(f"Writing TextAsset to: {dest}", "debug")
-                                    with open(dest, 'w', encoding='utf-8', errors='surrogatepass') as f:
-                                        f.write(str(data.m_Script))
-                                except Exception as e:
-                                    debug_log(f"Error writing TextAsset {path}: {e}", "error")
-
-                    # --- MonoBehaviour extraction: ONE FILE PER BUNDLE (FIXED) ---
-                    if not (extract_resources or extract_metadata):
-                        all_mono = []
-
-                        # Get clean bundle name
-                        bundle_base_name = os.path.splitext(file_name)[0]  # Remove extension
-                        if "." in bundle_base_name:
-                            bundle_base_name = bundle_base_name.split('.')[0]  # Remove .ASTC.xxx suffix
-
-                        is_camera_anim_bundle = bundle_base_name == "CarCameraAnimationLibrary"
-
-                        for obj in env.objects:
-                            if obj.type.name == "MonoBehaviour":
-                                try:
-                                    if obj.serialized_type and obj.serialized_type.nodes:
-                                        tree = obj.read_typetree()
-                                        m_name = tree.get("m_Name", "")
-                                        # Add size for smart selection
-                                        tree_str = json.dumps(tree)
-                                        size = len(tree_str)
-                                        all_mono.append((tree, m_name, size, obj.path_id))
-                                except Exception as e:
-                                    debug_log(f"Error reading MonoBehaviour {obj.path_id}: {e}", "error")
-
-                        if all_mono:
-                            if is_camera_anim_bundle:
-                                # Prefer one with matching name, else largest
-                                named_match = [item for item in all_mono if item[1] == bundle_base_name]
-                                if named_match:
-                                    selected = named_match[0][0]  # tree
-                                else:
-                                    selected = max(all_mono, key=lambda x: x[2])[0]  # largest by size
-                                mono_to_save = [selected]
-
-                                debug_log(f"Saved 1 MonoBehaviour (filtered main library) → {bundle_base_name}.json", "info")
-                                if named_match:
-                                    debug_log(f"  → Selected by name: '{bundle_base_name}'", "debug")
-                                else:
-                                    debug_log(f"  → Selected largest (size ~{max(all_mono, key=lambda x: x[2])[2]} chars)", "debug")
-                            else:
-                                # Save all for other bundles
-                                mono_to_save = [item[0] for item in all_mono]
-                                debug_log(f"Saved {len(mono_to_save)} MonoBehaviour(s) → {bundle_base_name}.json", "info")
-
-                            # Write the output
-                            out_path = os.path.join(destination_folder, "MonoBehaviour", f"{bundle_base_name}.json")
-                            os.makedirs(os.path.dirname(out_path), exist_ok=True)
-
-                            with open(out_path, 'w', encoding='utf-8') as f:
-                                if len(mono_to_save) == 1:
-                                    json.dump(mono_to_save[0], f, ensure_ascii=False, indent=4)
-                                else:
-                                    json.dump(mono_to_save, f, ensure_ascii=False, indent=4)
-
-                except Exception as e:
-                    failed_files += 1
-                    debug_log(f"Error processing file {file_name}: {e}", "error")
-                    if debug_mode:
-                        debug_log(f"Stack trace: {traceback.format_exc()}", "debug")
-
-    except FileNotFoundError as e:
-        debug_log(f"Source folder {source_folder} not found: {e}", "error", force=True)
-        return 0, failed_files
-
-    return astc_count, failed_files
+        return parse_formats(get_arg_value("-format"))
+    except ValueError as e:
+        debug_log(str(e), "error", force=True)
+        sys.exit(1)
+
+def build_parsers(text_dir, translations, shop_data, collections, debug_mode, file_filter=None, store=None, cache_dir=None):
+    crdb_mode = "-crdb" in sys.argv
+    # -quiet never builds the colored console view; -format decides whether *_output.txt files are written
+    options = dict(debug=debug_mode, file_filter=file_filter, console="-quiet" not in sys.argv, text_output="text" in output_formats(), store=store,
+                   cache_dir=cache_dir if "-cache" in sys.argv else None)
+    resolver = CarResolver(translations, shop_data=shop_data, max_entries=get_arg_value("-carcache", DEFAULT_MAX_ENTRIES, int))
+    return [
+        EventDataParser(folder=text_dir, translations=translations, shop_data=shop_data, resolver=resolver, **options),
+        MilestoneDataParser(folder=text_dir, translations=translations, resolver=resolver, **options),
+        ShowdownParser(folder=text_dir, translations=translations, shop_data=shop_data, crdb_mode=crdb_mode, resolver=resolver,
+                       wr_stats="-wrstats" in sys.argv, wr_sources=parse_sources(get_arg_value("-wrsources")) or None,
+                       **options),
+        TournamentParser(folder=text_dir, translations=translations, collections=collections, resolver=resolver, **options),
+    ]
 
-def main():
-    start_time = time.time()
-    debug_log("Starting CSR2 EventData Parser.", "info", force=True)
-    folder = "."
-       
-    base_dir2 = os.getcwd()  # <-- wherever you run python main.py from
+def _records_with_metrics(parser, name):
+    """parser.iter_records(), counting the parsed files and bytes into parse.<name>."""
+    files = size = 0
+    for record in parser.iter_records():
+        files += 1
+        size += parser.store.size(record["file"])
+        yield record
+    metrics.add_counts(f"parse.{name}", files=files, size=size)
+
+def _parse_with_metrics(parser, name):
+    with phase(f"parse.{name}"):
+        return list(_records_with_metrics(parser, name))
+
+def collect_records(parsers, debug_mode=False):
+    records_by_parser = {}
+    for parser in parsers:
+        name = type(parser).__name__
+        try:
+            debug_log(f"Starting {name} phase", "info")
+            records_by_parser[name] = _parse_with_metrics(parser, name)
+        except Exception as e:
+            debug_log(f"{name} failed: {e}", "error", force=True)
+            if debug_mode:
+                debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
+    return records_by_parser
 
-    cleanup_items = [
-        "TextAsset",
-        "MonoBehaviour",
-        "Texture2D",
-        "Sprite",
-        "__pycache__",
-        "allparser_output.txt",
-         # optional: delete entire extracted folder if present
-    ]
+def run_parsers(parsers, folder, records_by_parser=None, debug_mode=False, formats=DEFAULT_FORMATS):
+    # Each record is written to the parser's file, allparser_output.* and the console spool as soon
+    # as it is parsed; nothing but records handed in (merge) is held for the whole run
+    run = RunOutput(folder, formats)
 
-    for item in cleanup_items:
-        path = os.path.join(base_dir2, item)
-        if not os.path.exists(path):
-            continue
+    for parser in parsers:
+        name = type(parser).__name__
         try:
-            if os.path.isfile(path):
-                os.remove(path)
-                debug_log(f"Deleted old file: {item}", "info")
+            if records_by_parser is None:
+                debug_log(f"Starting {name} phase", "info")
+                # Parsing and writing are interleaved, so parse.<name> includes the output
+                with phase(f"parse.{name}"):
+                    parser.render(_records_with_metrics(parser, name), run)
             else:
-                import shutil
-                shutil.rmtree(path)
-                debug_log(f"Deleted old folder: {item}", "info")
+                if name not in records_by_parser:
+                    continue
+                with phase(f"output.{name}"):
+                    parser.render(records_by_parser[name], run)
         except Exception as e:
-            debug_log(f"Failed to delete {item}: {e}", "warn")
-    
-    # Count ASTC files before extraction
-    astc_count = sum(1 for root, _, files in os.walk(folder) for file_name in files if "ASTC" in file_name)
-    debug_log(f"Extracting assets from ASTC files in {os.path.abspath(folder)}", "info")
-    debug_log(f"Found {astc_count} ASTC file(s).", "info")
-    
-    # Run asset extraction
-    try:
-        install_if_missing(required_packages)
-        extract_start_time = time.time()
-        astc_count, failed_files = unpack_all_assets(folder, folder)
-        extract_time = round(time.time() - extract_start_time)
-        if astc_count == 0:
-            debug_log("No ASTC files found in the input directory", "info")
-        else:
-            debug_log(f"Finished Extracting Resources from {astc_count} ASTC file(s), {failed_files} file(s) failed.", "info")
-            debug_log(f"Extraction Time: {extract_time}s", "info")
-    except Exception as e:
-        debug_log(f"Failed to extract assets: {e}", "error", force=True)
-        if "-debug" in sys.argv:
-            debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
-    
-    # Define subfolders
-    meta_dir = os.path.join(folder, "metadata")
-    text_dir = os.path.join(folder, "TextAsset")
-    mono_dir = os.path.join(folder, "MonoBehaviour")
-    
+            debug_log(f"{name} failed: {e}", "error", force=True)
+            if debug_mode:
+                debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
+
+    # Rename the finished outputs into place
+    for fmt, sink in run.sinks.items():
+        try:
+            with phase(f"output.{fmt}"):
+                sink.close()
+        except Exception as e:
+            debug_log(f"Failed to write {fmt} output: {e}", "error", force=True)
+            if debug_mode:
+                debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
+
+def load_lookups(text_dir, mono_dir, meta_dir, localisation=None):
+    """Build the translation, shop and collection lookups for a run.
+
+    localisation is the {file name: mapping} the extractor kept in memory; when present the
+    MonoBehaviour JSON is not read back.
+    """
     # Initialize required_files dictionary
     required_files = {}
     
     # --- TranslationDataAsset lookup (supports old + new naming) ---
-    required_files["TranslationDataAsset"] = None
-    translations = {}
-
-    if os.path.exists(mono_dir):
-        possible_names = [
-            "Localisation_EN.json",           # New name (current)
-            "Localisation_en.json",           # Possible lowercase variant
-            "Localisation.json",
-            "TranslationDataAsset.json",      # Old name (legacy)
-            "TranslationData.json",
-        ]
-
-        for filename in os.listdir(mono_dir):
-            if filename in possible_names:
+    with phase("translation_load"):
+        required_files["TranslationDataAsset"] = None
+        translations = {}
+        localisation_name = find_localisation_name(list(localisation)) if localisation else None
+
+        if localisation_name and localisation[localisation_name]:
+            translations = localisation[localisation_name]
+            debug_log(f"Translation lookup taken from {localisation_name} in memory with {len(translations)} entries", "success")
+        elif os.path.exists(mono_dir):
+            filename = find_localisation_name(os.listdir(mono_dir))
+            if filename:
                 required_files["TranslationDataAsset"] = os.path.join(mono_dir, filename)
-                break
 
-        # Optional: fallback to any file containing "localisation" or "translation"
-        if not required_files["TranslationDataAsset"]:
-            for filename in os.listdir(mono_dir):
-                if filename.endswith(".json") and ("localisation" in filename.lower() or "translation" in filename.lower()):
-                    required_files["TranslationDataAsset"] = os.path.join(mono_dir, filename)
-                    debug_log(f"Found possible translation file via fuzzy match: {filename}", "info")
-                    break
-
-        if required_files["TranslationDataAsset"]:
-            try:
-                translations = build_translation_lookup(required_files["TranslationDataAsset"])
-                if translations:
-                    file_date = datetime.fromtimestamp(os.path.getmtime(required_files["TranslationDataAsset"])).strftime("%Y/%m/%d")
-                    debug_log(
-                        f"Translation file loaded: {os.path.basename(required_files['TranslationDataAsset'])} "
-                        f"with {len(translations)} entries (File Date - {file_date})",
-                        "success"
-                    )
-                else:
-                    debug_log(f"Translation file found but lookup failed to build: {os.path.basename(required_files['TranslationDataAsset'])}", "warn")
+            if required_files["TranslationDataAsset"]:
+                try:
+                    translations = build_translation_lookup(required_files["TranslationDataAsset"])
+                    if translations:
+                        file_date = datetime.fromtimestamp(os.path.getmtime(required_files["TranslationDataAsset"])).strftime("%Y/%m/%d")
+                        debug_log(
+                            f"Translation file loaded: {os.path.basename(required_files['TranslationDataAsset'])} "
+                            f"with {len(translations)} entries (File Date - {file_date})",
+                            "success"
+                        )
+                    else:
+                        debug_log(f"Translation file found but lookup failed to build: {os.path.basename(required_files['TranslationDataAsset'])}", "warn")
+                        translations = {}
+                except Exception as e:
+                    debug_log(f"Error loading translation file {required_files['TranslationDataAsset']}: {e}", "error", force=True)
                     translations = {}
-            except Exception as e:
-                debug_log(f"Error loading translation file {required_files['TranslationDataAsset']}: {e}", "error", force=True)
-                translations = {}
+            else:
+                debug_log("No translation file found (tried Localisation_EN.json, TranslationDataAsset.json, etc.)", "warn")
         else:
-            debug_log("No translation file found (tried Localisation_EN.json, TranslationDataAsset.json, etc.)", "warn")
-    else:
-        debug_log(f"MonoBehaviour folder {mono_dir} not found. Skipping translation lookup.", "warn", force=True)
+            debug_log(f"MonoBehaviour folder {mono_dir} not found. Skipping translation lookup.", "warn", force=True)
     
     try:
         required_files["ShopTimeGatedEvents"] = [
@@ -318,79 +217,310 @@ def main():
         debug_log(f"TextAsset folder {text_dir} not found. Skipping TournamentConfig.", "warn", force=True)
         required_files["TournamentConfig"] = []
 
-    shop_data, shop_file_date = load_shop_time_gated_events(meta_dir) if required_files["ShopTimeGatedEvents"] else (None, None)
+    with phase("shop_load"):
+        shop_data, shop_file_date = load_shop_time_gated_events(meta_dir) if required_files["ShopTimeGatedEvents"] else (None, None)
     if not shop_data:
         debug_log("No ShopTimeGatedEvents file found. Skipping shop annotations.", "warn")
     
     collection_file = required_files["CollectionSlots"]
-    collections = build_collection_lookup(collection_file) if collection_file else {}
+    with phase("collection_load"):
+        collections = build_collection_lookup(collection_file) if collection_file else {}
     if collection_file and not collections:
         debug_log("Failed to build collection lookup.", "warn", force=True)
 
-    # Collect outputs from all parsers
-    all_outputs = []
+    return translations, shop_data, collections
+
+def load_or_build_snapshot(root, text_dir, mono_dir, meta_dir, localisation=None):
+    """Reuse the snapshot for these exact inputs, or build the lookups and write a new one."""
+    with phase("snapshot_load"):
+        hashes = drop_hashes(text_dir, mono_dir, meta_dir)
+        # With -nolocjson the localisation only exists in memory
+        for name, mapping in (localisation or {}).items():
+            hashes.setdefault(f"lookup/{name}", mapping_digest(mapping))
+        snapshot = load_snapshot(snapshot_path(root, snapshot_key(hashes)))
+    if snapshot:
+        return snapshot
+    translations, shop_data, collections = load_lookups(text_dir, mono_dir, meta_dir, localisation)
+    with phase("snapshot_write"):
+        snapshot = build_snapshot(text_dir, translations, shop_data, collections, hashes)
+        try:
+            write_snapshot(root, snapshot)
+            prune_snapshots(root, get_arg_value("-keepsnapshots", DEFAULT_KEEP_SNAPSHOTS, int))
+        except Exception as e:
+            debug_log(f"Failed to write snapshot: {e}", "warn", force=True)
+    return snapshot
+
+def render_main():
+    start_time = time.time()
+    debug_log("Rendering outputs from snapshot.", "info", force=True)
+    folder = "."
     debug_mode = "-debug" in sys.argv
+    path = sys.argv[2] if len(sys.argv) > 2 and sys.argv[2].endswith(SNAPSHOT_SUFFIX) else latest_snapshot(folder)
+    snapshot = load_snapshot(path)
+    if snapshot is None:
+        debug_log("No snapshot found. Run 'python main.py -snapshot' first.", "error", force=True)
+        sys.exit(1)
 
-    try:
-        debug_log("Starting EventDataParser phase", "info")
-        edp = EventDataParser(folder=text_dir, translations=translations, shop_data=shop_data, debug=debug_mode)
-        event_output = edp.process()
-        if event_output:
-            all_outputs.append("=== EventDataParser Output ===\n" + event_output + "\n")
-    except Exception as e:
-        debug_log(f"EventDataParser failed: {e}", "error", force=True)
-        if debug_mode:
-            debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
+    text_dir = os.path.join(folder, "TextAsset")
+    os.makedirs(text_dir, exist_ok=True)
+    parsers = build_parsers(text_dir, snapshot["translations"], snapshot["shop_data"], snapshot["collections"],
+                            debug_mode, store=SnapshotStore(snapshot), cache_dir=folder)
+    run_parsers(parsers, folder, debug_mode=debug_mode, formats=output_formats())
 
-    try:
-        debug_log("Starting MilestoneDataParser phase", "info")
-        mdp = MilestoneDataParser(folder=text_dir, translations=translations, debug=debug_mode)
-        milestone_output = mdp.process()
-        if milestone_output:
-            all_outputs.append("=== MilestoneDataParser Output ===\n" + milestone_output + "\n")
-    except Exception as e:
-        debug_log(f"MilestoneDataParser failed: {e}", "error", force=True)
-        if debug_mode:
-            debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
+    debug_log(f"Total Processing Time: {time.time() - start_time:.2f}s", "info", force=True)
+    flush_logs()
 
+def diff_main():
+    start_time = time.time()
+    paths = [a for a in sys.argv[2:4] if not a.startswith("-")]
+    if len(paths) != 2:
+        debug_log("Usage: python main.py diff OLD NEW (snapshot .pickle files, run folders or TextAsset folders)", "error", force=True)
+        sys.exit(1)
     try:
-        debug_log("Starting ShowdownParser phase", "info")
-        crdb_mode = "-crdb" in sys.argv
-        sp = ShowdownParser(folder=text_dir, translations=translations, shop_data=shop_data, debug=debug_mode, crdb_mode=crdb_mode)
-        showdown_output = sp.process()
-        if showdown_output:
-            all_outputs.append("=== ShowdownParser Output ===\n" + showdown_output + "\n")
-    except Exception as e:
-        debug_log(f"ShowdownParser failed: {e}", "error", force=True)
-        if debug_mode:
-            debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
+        report = diff_drops(paths[0], paths[1], car_stats_map={} if "-nowr" in sys.argv else None)
+    except ValueError as e:
+        debug_log(str(e), "error", force=True)
+        sys.exit(1)
+    write_report(report, get_arg_value("-out", REPORT_FILE))
+    log_summary(report)
+    debug_log(f"Total Processing Time: {time.time() - start_time:.2f}s", "info", force=True)
+    flush_logs()
+
+def index_main():
+    start_time = time.time()
+    index = refresh_index(".")
+    objects = sum(len(b["objects"]) for b in index["bundles"].values())
+    debug_log(f"Indexed {objects} object(s) in {len(index['bundles'])} bundle(s).", "success", force=True)
+    debug_log(f"Total Processing Time: {time.time() - start_time:.2f}s", "info", force=True)
+    flush_logs()
+
+def extract_main():
+    start_time = time.time()
+    folder = "."
+    name = get_arg_value("--asset", get_arg_value("-asset"))
+    if not name:
+        debug_log("Usage: python main.py extract -asset NAME [-type TYPE] [-out FOLDER]", "error", force=True)
+        sys.exit(1)
+    matches = find_assets(refresh_index(folder), name, get_arg_value("-type"))
+    if not matches:
+        debug_log(f"No indexed asset named {name}", "error", force=True)
+        sys.exit(1)
+    if len(matches) > 1:
+        debug_log(f"{len(matches)} assets match {name}; extracting all of them (narrow with -type)", "warn", force=True)
+    destination = get_arg_value("-out", folder)
+    failed = 0
+    for bundle_key, obj in matches:
+        try:
+            dest = extract_asset(folder, bundle_key, obj, destination, "-debug" in sys.argv)
+            debug_log(f"{obj['type']} {obj['name']} from {bundle_key} → {dest}", "success", force=True)
+        except Exception as e:
+            failed += 1
+            debug_log(f"Failed to extract {obj['name']} from {bundle_key}: {e}", "error", force=True)
+    debug_log(f"Total Processing Time: {time.time() - start_time:.2f}s", "info", force=True)
+    flush_logs()
+    if failed:
+        sys.exit(1)
+
+def merge_main():
+    start_time = time.time()
+    debug_log("Merging shard results.", "info", force=True)
+    folder = "."
+    debug_mode = "-debug" in sys.argv
+    shard_dirs = [a for a in sys.argv[2:] if not a.startswith("-")] or find_shard_dirs(folder)
+    records_by_parser = load_shard_records(shard_dirs)
+    if records_by_parser is None:
+        sys.exit(1)
+
+    text_dir = os.path.join(folder, "TextAsset")
+    os.makedirs(text_dir, exist_ok=True)
+    parsers = build_parsers(text_dir, {}, None, {}, debug_mode)
+    run_parsers(parsers, folder, records_by_parser=records_by_parser, debug_mode=debug_mode, formats=output_formats())
+
+    total_time = round(time.time() - start_time)
+    debug_log(f"Merged {len(shard_dirs)} shard(s).", "success", force=True)
+    debug_log(f"Total Processing Time: {total_time}s", "info", force=True)
+    flush_logs()
+
+def main():
+    start_time = time.time()
+    debug_log("Starting CSR2 EventData Parser.", "info", force=True)
+    debug_log(f"JSON backend: {jsoncodec.get_backend()}", "info")
+    folder = "."
+    if "-profile" in sys.argv or "-memprofile" in sys.argv:
+        profiling.configure(
+            cpu="-profile" in sys.argv,
+            memory="-memprofile" in sys.argv,
+            top_n=get_arg_value("-profiletop", profiling.DEFAULT_TOP_N, int),
+        )
+    if "-trace" in sys.argv:
+        tracing.configure()
+       
+    base_dir2 = os.getcwd()  # <-- wherever you run python main.py from
+
+    cleanup_items = [
+        "TextAsset",
+        "MonoBehaviour",
+        "Texture2D",
+        "Sprite",
+        "__pycache__",
+        "allparser_output.txt",
+        "run_metrics.json",
+        "allparser_output.json",
+        "allparser_output.sqlite",
+        profiling.PROFILE_DIR,
+        tracing.TRACE_FILE,
+         # optional: delete entire extracted folder if present
+    ]
 
+    shard = None
+    file_filter = None
+    publish_root = folder
+    if "-shard" in sys.argv:
+        try:
+            shard = parse_shard_spec(get_arg_value("-shard"))
+        except ValueError as e:
+            debug_log(str(e), "error", force=True)
+            sys.exit(1)
+        publish_root = shard_dir(shard[0], shard[1], folder)
+        base_dir2 = os.path.abspath(publish_root)
+        file_filter = textasset_filter(shard[0], shard[1])
+        cleanup_items.append("records.json")
+        debug_log(f"Running shard {shard[0]}/{shard[1]} into {publish_root}", "info", force=True)
+
+    # One walk both counts the bundles and sizes them for the extraction schedule
+    with phase("plan"):
+        plan = plan_bundles(folder, shard)
+    astc_count = plan[1]
+    debug_log(f"Extracting assets from ASTC files in {os.path.abspath(folder)}", "info")
+    debug_log(f"Found {astc_count} ASTC file(s).", "info")
+    if "-plan" in sys.argv:
+        log_plan(plan[0], max(1, get_arg_value("-workers", 1, int)))
+        flush_logs()
+        return
+
+    # Each run writes into a fresh runs/<id> folder that is only published once the run
+    # completes; -inplace keeps the old delete-then-extract behaviour.
+    run_dir = None
+    keep_runs = get_arg_value("-keepruns", DEFAULT_KEEP_RUNS, int)
+    with phase("cleanup"):
+        if "-inplace" in sys.argv:
+            output_root = publish_root
+            for item in cleanup_items:
+                path = os.path.join(base_dir2, item)
+                if not os.path.lexists(path):
+                    continue
+                try:
+                    if os.path.islink(path):
+                        # Published by an earlier run: drop the link, never the retained run behind it
+                        os.unlink(path)
+                        debug_log(f"Removed published link: {item}", "info")
+                    elif os.path.isfile(path):
+                        os.remove(path)
+                        debug_log(f"Deleted old file: {item}", "info")
+                    else:
+                        import shutil
+                        shutil.rmtree(path)
+                        debug_log(f"Deleted old folder: {item}", "info")
+                except Exception as e:
+                    debug_log(f"Failed to delete {item}: {e}", "warn")
+        else:
+            run_dir = new_run_dir(publish_root)
+            output_root = run_dir
+            start_garbage_collection(publish_root, keep_runs, exclude=[run_dir])
+    
+    # Run asset extraction
+    localisation = {}
+    scanned = {}
     try:
-        debug_log("Starting TournamentParser phase", "info")
-        tp = TournamentParser(folder=text_dir, translations=translations, collections=collections, debug=debug_mode)
-        tournament_output = tp.process()
-        if tournament_output:
-            all_outputs.append("=== TournamentParser Output ===\n" + tournament_output + "\n")
+        install_if_missing(required_packages)
+        extract_start_time = time.time()
+        bundle_stats = []
+        with phase("extraction"):
+            astc_count, failed_files = unpack_all_assets(folder, output_root, bundle_stats=bundle_stats, shard=shard, localisation=localisation, index=scanned, plan=plan)
+        if scanned:
+            update_index(folder, scanned)
+        metrics.add_counts("extraction", files=len(bundle_stats), size=sum(s.get("size_bytes", 0) for s in bundle_stats))
+        metrics.record_extraction(bundle_stats)
+        extract_time = round(time.time() - extract_start_time)
+        if astc_count == 0:
+            debug_log("No ASTC files found in the input directory", "info")
+        else:
+            debug_log(f"Finished Extracting Resources from {astc_count} ASTC file(s), {failed_files} file(s) failed.", "info")
+            debug_log(f"Extraction Time: {extract_time}s", "info")
     except Exception as e:
-        debug_log(f"TournamentParser failed: {e}", "error", force=True)
-        if debug_mode:
+        debug_log(f"Failed to extract assets: {e}", "error", force=True)
+        if "-debug" in sys.argv:
             debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
+    
+    # Define subfolders
+    meta_dir = os.path.join(folder, "metadata")
+    text_dir = os.path.join(output_root, "TextAsset")
+    mono_dir = os.path.join(output_root, "MonoBehaviour")
+    
+    # -snapshot keeps decoded TextAssets and lookups in snapshots/<input hash>.pickle for reuse
+    store = None
+    if "-snapshot" in sys.argv:
+        snapshot = load_or_build_snapshot(publish_root, text_dir, mono_dir, meta_dir, localisation)
+        translations, shop_data, collections = snapshot["translations"], snapshot["shop_data"], snapshot["collections"]
+        store = SnapshotStore(snapshot)
+    else:
+        translations, shop_data, collections = load_lookups(text_dir, mono_dir, meta_dir, localisation)
 
-    # Write combined output
-    if all_outputs:
-        try:
-            combined_output_path = os.path.join(folder, "allparser_output.txt")
-            with open(combined_output_path, "w", encoding="utf-8") as f:
-                f.write("\n".join(all_outputs))
-            debug_log(f"Combined output written to {combined_output_path}", "info")
-        except Exception as e:
-            debug_log(f"Failed to write combined output to {combined_output_path}: {e}", "error", force=True)
-            if debug_mode:
-                debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
+    debug_mode = "-debug" in sys.argv
+    # -cache keeps per-file records in result_cache.sqlite next to the published outputs
+    parsers = build_parsers(text_dir, translations, shop_data, collections, debug_mode, file_filter=file_filter, store=store,
+                            cache_dir=publish_root)
+
+    if shard:
+        records_by_parser = collect_records(parsers, debug_mode)
+        write_shard_records(output_root, shard[0], shard[1], records_by_parser)
+    else:
+        run_parsers(parsers, output_root, debug_mode=debug_mode, formats=output_formats())
+
+    resolver = parsers[0].resolver
+    metrics.record_cache("car_resolver", hits=resolver.hits, misses=resolver.misses)
+    metrics.info.update({"shard": list(shard) if shard else None, "json_backend": jsoncodec.get_backend()})
+    metrics_path = os.path.join(output_root, METRICS_FILE)
+    # Written before publish so it is published with the run, and again below with the publish phase
+    metrics.write_json(metrics_path)
+    profiling.profiler.write(os.path.join(output_root, profiling.PROFILE_DIR))
+    tracing.tracer.write(os.path.join(output_root, tracing.TRACE_FILE))
+    published = True
+    if run_dir:
+        with phase("publish"):
+            published = publish_run(run_dir, publish_root)
+        start_garbage_collection(publish_root, keep_runs, exclude=[run_dir])
+        if not os.path.exists(metrics_path):
+            # The rename fallback moved it out of the run folder
+            metrics_path = os.path.join(publish_root, METRICS_FILE)
+        metrics.write_json(metrics_path)
+    if "-prom" in sys.argv:
+        metrics.write_prometheus(get_arg_value("-prom"))
+    if shard:
+        debug_log(f"Shard {shard[0]}/{shard[1]} done. Run 'python main.py merge' once every shard has finished.", "info", force=True)
 
     total_time = round(time.time() - start_time)
+    if not published:
+        debug_log(f"Run finished in {total_time}s but could not be published.", "error", force=True)
+        flush_logs()
+        sys.exit(1)
     debug_log("All phases completed.", "success", force=True)
     debug_log(f"Total Processing Time: {total_time}s", "info", force=True)
+    flush_logs()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    configure_logging()
+    if "-json" in sys.argv:
+        jsoncodec.set_backend(get_arg_value("-json"))
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        merge_main()
+    elif len(sys.argv) > 1 and sys.argv[1] == "diff":
+        diff_main()
+    elif len(sys.argv) > 1 and sys.argv[1] == "render":
+        render_main()
+    elif len(sys.argv) > 1 and sys.argv[1] == "index":
+        index_main()
+    elif len(sys.argv) > 1 and sys.argv[1] == "extract":
+        extract_main()
+    else:
+        main()
\ No newline at end of file
@@ -1,38 +1,60 @@
 # milestonedataparser.py
-import os
 import re
-import json
 from colorama import Fore, Style
 from utils import debug_log, epoch_to_gmt
+from carresolver import CarResolver
+from schema import EVENT_SCHEDULE, SEASONAL_REWARD_CARS
+from textstore import FolderStore
+from outputs import by_file, parser_output
+from resultcache import open_cache
+from tracing import tracer
 
 class MilestoneDataParser:
-    def __init__(self, folder="TextAsset", translations=None, debug=False):
+    def __init__(self, folder="TextAsset", translations=None, debug=False, file_filter=None, console=True, text_output=True, store=None,
+                 resolver=None, cache_dir=None):
         self.folder = folder
+        self.store = store or FolderStore(folder)
         self.translations = translations or {}
+        self.resolver = resolver or CarResolver(self.translations)
         self.debug = debug
+        self.file_filter = file_filter
+        self.console = console
+        self.text_output = text_output
+        self.cache_dir = cache_dir
         self.output_file = "milestone_output.txt"
 
-    def process(self):
-        console_lines = []
-        file_lines = []
-        files = sorted([f for f in os.listdir(self.folder) if os.path.isfile(os.path.join(self.folder, f)) and f.lower().endswith(".txt")])
-        for filename in files:
+    def parse_records(self):
+        return list(self.iter_records())
+
+    def iter_records(self):
+        files = self.store.names()
+        cache = open_cache(self)
+        for filename in tracer.each(files, "parse.MilestoneDataParser"):
             if not re.fullmatch(r"\d+\.txt", filename, re.IGNORECASE):
                 continue
+            if self.file_filter and not self.file_filter(filename):
+                continue
 
-            path = os.path.join(self.folder, filename)
+            if self.store.sniff(filename)[1] != "object":
+                debug_log(lambda: f"Skipping {filename} (not milestone format)", "warn")
+                continue
+            if cache:
+                record = cache.get(filename)
+                if record is not None:
+                    yield record
+                    continue
             try:
-                with open(path, "r", encoding="utf-8") as fh:
-                    data = json.load(fh)
+                data = self.store.load(filename)
             except Exception as e:
                 debug_log(f"Failed to load {filename}: {e}", "error")
                 continue
 
             title = list(data.keys())[0]
-            debug_log(f"Processing {title}", "info")
+            debug_log(lambda: f"Processing {title}", "info")
             event = data[title]
+            file_lines = []
 
-            schedule = event.get("EventSchedule", {}).get("ScheduleList", [])
+            schedule = EVENT_SCHEDULE.get(event)
             start_epoch = end_epoch = None
             start_str = end_str = "Unknown"
             if schedule and isinstance(schedule, list) and len(schedule) > 0 and "Time_ActiveBetweenAny" in schedule[0]:
@@ -43,12 +65,12 @@ class MilestoneDataParser:
                 except Exception:
                     pass
 
-            rewards = event.get("CrewLeaderboardRewardDefinitions", {}).get("SeasonalRewardCars", {}).get(title, {})
+            rewards = SEASONAL_REWARD_CARS.get(event, title=title)
             pc_car = rewards.get("PrestigeCupCar")
             ms_car = rewards.get("secondaryPrizeCarDBid")
 
-            pc_trans = self.translations.get(pc_car, pc_car) if pc_car else "None"
-            ms_trans = self.translations.get(ms_car, ms_car) if ms_car else "None"
+            pc_trans = self.resolver.name(pc_car) if pc_car else "None"
+            ms_trans = self.resolver.name(ms_car) if ms_car else "None"
 
             pc_raw = pc_car if pc_car else ""
             ms_raw = ms_car if ms_car else ""
@@ -57,21 +79,15 @@ class MilestoneDataParser:
             header_text = f"Milestone Season {title}"
             date_part = f"{start_str} - {end_str}"
 
-            console_header = f"{Fore.CYAN}*{header_text}*{Style.RESET_ALL}: {date_part}"
             file_header = f"*{header_text}*: {date_part}"
-
-            console_lines.append(console_header)
             file_lines.append(file_header)
-
-            console_lines.append("")  # Blank line
-            file_lines.append("")
+            file_lines.append("")  # Blank line
 
             # PC line
             pc_display = pc_trans
             if self.debug and pc_raw and pc_raw != pc_trans:
                 pc_display += f" ({pc_raw})"
 
-            console_lines.append(f"- PC : {pc_display}")
             file_lines.append(f"- PC : {pc_display}")
 
             # MS line
@@ -79,18 +95,34 @@ class MilestoneDataParser:
             if self.debug and ms_raw and ms_raw != ms_trans:
                 ms_display += f" ({ms_raw})"
 
-            console_lines.append(f"- MS : {ms_display}")
             file_lines.append(f"- MS : {ms_display}")
-
-            console_lines.append("")
             file_lines.append("")
 
-        console_text = "\n".join(console_lines)
-        print(console_text)
+            # The console view only differs from the file in its colored header
+            console_lines = []
+            if self.console:
+                console_lines = [f"{Fore.CYAN}*{header_text}*{Style.RESET_ALL}: {date_part}"] + file_lines[1:]
+
+            record = {"file": filename, "console_lines": console_lines, "file_lines": file_lines}
+            if cache:
+                cache.put(filename, record)
+            yield record
 
-        file_text = "\n".join(file_lines)
-        with open(os.path.join(self.folder, self.output_file), "w", encoding="utf-8") as f:
-            f.write(file_text)
-        debug_log(f"Milestone output written to {self.output_file}", "success")
+        if cache:
+            cache.close()
 
-        return file_text
\ No newline at end of file
+    def sections(self, records):
+        return [(r["file"], "\n".join(r["file_lines"])) for r in sorted(records, key=lambda r: r["file"])]
+
+    def render(self, records, run=None):
+        out = parser_output(self, run)
+        with out:
+            for record in by_file(records):
+                out.add(record["file"], "\n".join(record["file_lines"]), console="\n".join(record["console_lines"]))
+        out.show()
+        if out.written:
+            debug_log(f"Milestone output written to {self.output_file}", "success")
+        return out.text()
+
+    def process(self):
+        return self.render(self.iter_records())
@@ -0,0 +1,322 @@
+# outputs.py
+"""
+Streaming output writers. A parser's render() hands every section to a ParserOutput as soon as it
+is produced, which writes it to the parser's *_output.txt, its console view and the run-wide
+outputs (allparser_output.txt / .json / .sqlite) right away. Every file is written as
+<name>.tmp and renamed into place when it is complete, so memory stays flat however large the drop.
+"""
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import tempfile
+from utils import debug_log
+
+FORMATS = ("text", "json", "sqlite")
+DEFAULT_FORMATS = ("text",)
+COMBINED_FILE = "allparser_output.txt"
+JSON_FILE = "allparser_output.json"
+SQLITE_FILE = "allparser_output.sqlite"
+
+
+def parse_formats(spec):
+    """Parse a -format value such as 'text,json' into a tuple of output formats."""
+    formats = tuple(dict.fromkeys(f.strip().lower() for f in str(spec or "").split(",") if f.strip()))
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown or not formats:
+        raise ValueError(f"Invalid -format '{spec}', expected a comma separated list of {', '.join(FORMATS)}")
+    return formats
+
+
+def by_file(records):
+    """Records in file order. iter_records() generators already yield them that way; lists get sorted."""
+    return sorted(records, key=lambda r: r["file"]) if isinstance(records, list) else records
+
+
+class AtomicTextFile:
+    """A UTF-8 text file written to path.tmp; commit() renames it over path, discard() drops it."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.fh = open(self.tmp_path, "w", encoding="utf-8")
+
+    def write(self, text):
+        self.fh.write(text)
+
+    def mark(self):
+        return self.fh.tell()
+
+    def rollback(self, mark):
+        self.fh.seek(mark)
+        self.fh.truncate()
+
+    def commit(self):
+        self.fh.close()
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+    def discard(self):
+        self.fh.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class CombinedText:
+    """allparser_output.txt: an "=== <Parser> Output ===" block for every parser with output."""
+
+    def __init__(self, folder):
+        self.out = AtomicTextFile(os.path.join(folder, COMBINED_FILE))
+        self.blocks = 0
+
+    def begin(self, name):
+        self.name = name
+        self.started = False
+        self.start = self.out.mark()
+
+    def write(self, text):
+        # The header waits for the first text, so a parser without output leaves no block
+        if not text:
+            return
+        if not self.started:
+            self.out.write(("\n" if self.blocks else "") + f"=== {self.name} Output ===\n")
+            self.started = True
+        self.out.write(text)
+
+    def section(self, file, text):
+        pass
+
+    def end(self):
+        if self.started:
+            self.out.write("\n")
+            self.blocks += 1
+
+    def abort(self):
+        self.out.rollback(self.start)
+
+    def close(self):
+        if not self.blocks:
+            self.out.discard()
+            return None
+        path = self.out.commit()
+        debug_log(f"Combined output written to {path}", "info")
+        return path
+
+
+class JsonSections:
+    """
+    allparser_output.json, {"parsers": {name: [{"file", "text"}]}}, written one section at a time
+    in the same layout json.dump(indent=2) gives.
+    """
+
+    def __init__(self, folder):
+        self.out = AtomicTextFile(os.path.join(folder, JSON_FILE))
+        self.out.write('{\n  "parsers": {')
+        self.parsers = 0
+
+    def begin(self, name):
+        self.start = self.out.mark()
+        self.out.write(("," if self.parsers else "") + f"\n    {json.dumps(name, ensure_ascii=False)}: [")
+        self.items = 0
+
+    def write(self, text):
+        pass
+
+    def section(self, file, text):
+        self.out.write(
+            ("," if self.items else "")
+            + f'\n      {{\n        "file": {json.dumps(file, ensure_ascii=False)},'
+            + f'\n        "text": {json.dumps(text, ensure_ascii=False)}\n      }}'
+        )
+        self.items += 1
+
+    def end(self):
+        self.out.write("\n    ]" if self.items else "]")
+        self.parsers += 1
+
+    def abort(self):
+        self.out.rollback(self.start)
+
+    def close(self):
+        self.out.write("\n  }\n}" if self.parsers else "}\n}")
+        path = self.out.commit()
+        debug_log(f"JSON output written to {path}", "info")
+        return path
+
+
+class SqliteSections:
+    """allparser_output.sqlite with a sections(parser, position, file, text) table, one row per section."""
+
+    def __init__(self, folder):
+        self.path = os.path.join(folder, SQLITE_FILE)
+        self.tmp_path = self.path + ".tmp"
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        # Autocommit mode, so the one transaction and its per-parser savepoints are managed here
+        self.conn = sqlite3.connect(self.tmp_path, isolation_level=None)
+        self.conn.execute(
+            "CREATE TABLE sections (parser TEXT NOT NULL, position INTEGER NOT NULL, file TEXT NOT NULL, "
+            "text TEXT NOT NULL, PRIMARY KEY (parser, position))"
+        )
+        self.conn.execute("CREATE INDEX sections_file ON sections (file)")
+        self.conn.execute("BEGIN")
+
+    def begin(self, name):
+        self.name = name
+        self.position = 0
+        self.conn.execute("SAVEPOINT parser")
+
+    def write(self, text):
+        pass
+
+    def section(self, file, text):
+        self.conn.execute(
+            "INSERT INTO sections (parser, position, file, text) VALUES (?, ?, ?, ?)",
+            (self.name, self.position, file, text),
+        )
+        self.position += 1
+
+    def end(self):
+        self.conn.execute("RELEASE parser")
+
+    def abort(self):
+        self.conn.execute("ROLLBACK TO parser")
+        self.conn.execute("RELEASE parser")
+
+    def close(self):
+        try:
+            self.conn.execute("COMMIT")
+        finally:
+            self.conn.close()
+        os.replace(self.tmp_path, self.path)
+        debug_log(f"SQLite output written to {self.path}", "info")
+        return self.path
+
+
+SINKS = {
+    "text": CombinedText,
+    "json": JsonSections,
+    "sqlite": SqliteSections,
+}
+
+
+class RunOutput:
+    """
+    The run-wide outputs for formats, fed by every parser in turn. A parser that fails part-way
+    is cut back out of all of them, so it leaves nothing behind. sinks maps format → writer;
+    close each one once every parser is done.
+    """
+
+    def __init__(self, folder, formats=DEFAULT_FORMATS):
+        self.sinks = {fmt: SINKS[fmt](folder) for fmt in formats if fmt in SINKS}
+
+    def begin(self, name):
+        for sink in self.sinks.values():
+            sink.begin(name)
+
+    def write(self, text):
+        for sink in self.sinks.values():
+            sink.write(text)
+
+    def section(self, file, text):
+        for sink in self.sinks.values():
+            sink.section(file, text)
+
+    def end(self):
+        for sink in self.sinks.values():
+            sink.end()
+
+    def abort(self):
+        for sink in self.sinks.values():
+            sink.abort()
+
+
+class ParserOutput:
+    """
+    One parser's sections as render() produces them, joined with separator: into its text file
+    (path, committed when the with block succeeds), a console spool that show() prints afterwards
+    so the view still comes out in one piece, and run. Only with collect is the text kept for text().
+    keep_empty=False writes and prints nothing for a parser without sections.
+    """
+
+    def __init__(self, name, path=None, console=False, run=None, collect=False, separator="\n",
+                 keep_empty=True, combined_console=False):
+        self.name = name
+        self.path = path
+        self.print_console = console
+        self.run = run
+        self.separator = separator
+        self.keep_empty = keep_empty
+        # allparser_output.txt carries the console view instead of the file text
+        self.combined_console = combined_console
+        self.collected = [] if collect else None
+        self.file = None
+        self.console = None
+        self.count = 0
+        self.written = False
+
+    def __enter__(self):
+        if self.path:
+            self.file = AtomicTextFile(self.path)
+        if self.print_console:
+            self.console = tempfile.TemporaryFile("w+", encoding="utf-8")
+        if self.run:
+            self.run.begin(self.name)
+        return self
+
+    def add(self, file, section, text=None, console=""):
+        """section goes to the structured outputs; text (default: section) to the text files."""
+        text = section if text is None else text
+        separator = self.separator if self.count else ""
+        combined = console if self.combined_console else text
+        if self.file:
+            self.file.write(separator + text)
+        if self.console:
+            self.console.write(separator + console)
+        if self.run:
+            self.run.write(separator + combined)
+            self.run.section(file, section)
+        if self.collected is not None:
+            self.collected.append(separator + combined)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            if self.file:
+                self.file.discard()
+            if self.console:
+                self.console.close()
+                self.console = None
+            if self.run:
+                self.run.abort()
+            return False
+        if self.file:
+            if self.count or self.keep_empty:
+                self.file.commit()
+                self.written = True
+            else:
+                self.file.discard()
+        if self.run:
+            self.run.end()
+        return False
+
+    def show(self):
+        """Print the spooled console view, like one print() of the joined text."""
+        if not self.console:
+            return
+        if self.count or self.keep_empty:
+            self.console.seek(0)
+            shutil.copyfileobj(self.console, sys.stdout)
+            sys.stdout.write("\n")
+        self.console.close()
+        self.console = None
+
+    def text(self):
+        return "".join(self.collected) if self.collected is not None else ""
+
+
+def parser_output(parser, run=None, **options):
+    """A ParserOutput for parser.render(): its *_output.txt, its console view and run's outputs."""
+    path = os.path.join(parser.folder, parser.output_file) if parser.text_output else None
+    return ParserOutput(type(parser).__name__, path, console=parser.console, run=run, collect=run is None, **options)
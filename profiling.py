@@ -0,0 +1,213 @@
+# profiling.py
+import os
+import re
+import io
+import pstats
+import cProfile
+import tracemalloc
+import contextlib
+from utils import debug_log
+
+PROFILE_DIR = "profiles"
+DEFAULT_TOP_N = 25
+TRACE_FRAMES = 16
+MAX_STACK_DEPTH = 64
+
+# Keep the profiler's own bookkeeping out of the allocation reports
+_TRACE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def _safe_name(name):
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+def _label(func):
+    filename, line, func_name = func
+    if filename == "~":
+        label = func_name
+    else:
+        label = f"{os.path.basename(filename)}:{line}:{func_name}"
+    return label.replace(";", ",")
+
+
+def collapse_stats(stats, min_fraction=0.0005):
+    """
+    Turn pstats data into collapsed stacks ('a;b;c <microseconds>') for flamegraph tools.
+    pstats only keeps caller->callee edges, so time below the first level is split between
+    call paths by each edge's share of the callee's cumulative time.
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    total = sum(raw[func][3] for func in roots)
+    min_ct = total * min_fraction
+    samples = {}
+
+    def walk(func, ct, stack, on_path):
+        _, _, tt, func_ct, _ = raw[func]
+        ratio = min(ct / func_ct, 1.0) if func_ct else 0.0
+        stack = stack + [_label(func)]
+        self_us = int(tt * ratio * 1_000_000)
+        if self_us > 0:
+            key = ";".join(stack)
+            samples[key] = samples.get(key, 0) + self_us
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            sub_ct = edge_ct * ratio
+            if callee in on_path or sub_ct < min_ct:
+                continue
+            walk(callee, sub_ct, stack, on_path | {callee})
+
+    for func in roots:
+        walk(func, raw[func][3], [], {func})
+    return samples
+
+
+class PhaseProfiler:
+    """Per-phase cProfile and tracemalloc capture, driven by runmetrics.phase()."""
+
+    def __init__(self):
+        self.cpu = False
+        self.memory = False
+        self.top_n = DEFAULT_TOP_N
+        self.profiles = {}
+        self.allocations = {}
+        self._active = []
+
+    @property
+    def enabled(self):
+        return self.cpu or self.memory
+
+    def configure(self, cpu=False, memory=False, top_n=DEFAULT_TOP_N):
+        self.cpu = cpu
+        self.memory = memory
+        self.top_n = top_n
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        if self._active:
+            # Only one cProfile can be active at a time, so a nested phase pauses its parent
+            self._active[-1].disable()
+        before = self._snapshot() if self.memory and tracemalloc.is_tracing() else None
+        profile = None
+        if self.cpu:
+            profile = cProfile.Profile()
+            self._active.append(profile)
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._active.pop()
+                if name in self.profiles:
+                    self.profiles[name].add(profile)
+                else:
+                    self.profiles[name] = pstats.Stats(profile)
+            if before is not None:
+                diff = self._snapshot().compare_to(before, "traceback")
+                totals = self.allocations.setdefault(name, {})
+                for stat in diff:
+                    if stat.size_diff > 0:
+                        size, count = totals.get(stat.traceback, (0, 0))
+                        totals[stat.traceback] = (size + stat.size_diff, count + stat.count_diff)
+            if self._active:
+                self._active[-1].enable()
+
+    def _write_cpu(self, directory, name, stats):
+        base = os.path.join(directory, _safe_name(name))
+        stats.dump_stats(base + ".prof")
+
+        buffer = io.StringIO()
+        stats.stream = buffer
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+        with open(base + ".txt", "w", encoding="utf-8") as fh:
+            fh.write(buffer.getvalue())
+
+        samples = collapse_stats(stats)
+        with open(base + ".collapsed", "w", encoding="utf-8") as fh:
+            for stack, us in sorted(samples.items()):
+                fh.write(f"{stack} {us}\n")
+        return samples
+
+    def _write_memory(self, directory, name, totals):
+        base = os.path.join(directory, _safe_name(name))
+
+        # Summarise by allocation site (innermost frame)
+        sites = {}
+        for tb, (size, count) in totals.items():
+            frame = tb[-1]
+            key = (frame.filename, frame.lineno)
+            site_size, site_count = sites.get(key, (0, 0))
+            sites[key] = (site_size + size, site_count + count)
+        top_sites = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[:self.top_n]
+        with open(base + ".alloc.txt", "w", encoding="utf-8") as fh:
+            fh.write(f"Top {len(top_sites)} allocation sites for phase {name} (net growth over the phase)\n")
+            for (filename, lineno), (size, count) in top_sites:
+                fh.write(f"{size / 1024:>12.1f} KiB {count:>10} blocks  {filename}:{lineno}\n")
+
+        with open(base + ".alloc.collapsed", "w", encoding="utf-8") as fh:
+            for tb, (size, _) in sorted(totals.items(), key=lambda item: item[1][0], reverse=True):
+                stack = ";".join(f"{os.path.basename(f.filename)}:{f.lineno}".replace(";", ",") for f in tb)
+                fh.write(f"{stack} {size}\n")
+        return top_sites
+
+    def write(self, directory):
+        """Write .prof/.txt/.collapsed per CPU-profiled phase and .alloc.txt/.alloc.collapsed per memory-profiled phase."""
+        if not self.enabled:
+            return None
+        os.makedirs(directory, exist_ok=True)
+
+        combined = {}
+        for name, stats in self.profiles.items():
+            try:
+                for stack, us in self._write_cpu(directory, name, stats).items():
+                    key = f"{name};{stack}"
+                    combined[key] = combined.get(key, 0) + us
+            except Exception as e:
+                debug_log(f"Failed to write CPU profile for {name}: {e}", "warn", force=True)
+        if combined:
+            with open(os.path.join(directory, "all.collapsed"), "w", encoding="utf-8") as fh:
+                for stack, us in sorted(combined.items()):
+                    fh.write(f"{stack} {us}\n")
+
+        for name, totals in self.allocations.items():
+            try:
+                top_sites = self._write_memory(directory, name, totals)
+                if top_sites:
+                    (filename, lineno), (size, _) = top_sites[0]
+                    debug_log(f"{name}: top allocation site {os.path.basename(filename)}:{lineno} ({size / 1024:.0f} KiB)", "info")
+            except Exception as e:
+                debug_log(f"Failed to write allocation profile for {name}: {e}", "warn", force=True)
+
+        debug_log(f"Profiles for {len(set(self.profiles) | set(self.allocations))} phase(s) written to {directory}", "info", force=True)
+        return directory
+
+
+profiler = PhaseProfiler()
+
+
+def configure(cpu=False, memory=False, top_n=DEFAULT_TOP_N):
+    profiler.configure(cpu=cpu, memory=memory, top_n=top_n)
+    return profiler
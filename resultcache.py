@@ -0,0 +1,193 @@
+# resultcache.py
+"""
+Persistent per-file parser records (-cache), kept in result_cache.sqlite next to the outputs.
+
+A record is reused when all of these are unchanged:
+- the content hash of its TextAsset, plus any companion file it reads (an event's _SD file);
+- the parser's fingerprint: its code and the shared modules, its options, and the translation
+  and collection lookups;
+- the WR entries and shop promotions the record looked up last time. CarResolver records which
+  car ids and schedule ids a file touches, so a new WR time or ShopTimeGatedEvents only reparses
+  the files that used the changed entries.
+
+Everything else is parsed again and stored for the next run. Records from files that are gone are
+dropped when the parser finishes.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import jsoncodec
+from runmetrics import metrics
+from snapshot import mapping_digest
+from utils import debug_log
+
+CACHE_FILE = "result_cache.sqlite"
+CACHE_VERSION = 1
+# Modules besides the parser's own whose code shapes the records
+SHARED_MODULES = ("utils", "schema", "carresolver", "wrtable")
+# Parser attributes that change what a record looks like
+OPTION_ATTRS = ("debug", "crdb_mode", "console", "wr_stats")
+
+_digests = {}
+
+
+def _lookup_digest(mapping):
+    """mapping_digest, computed once per lookup object even though every parser asks for it."""
+    if not mapping:
+        return ""
+    cached = _digests.get(id(mapping))
+    if cached is None or cached[0] is not mapping:
+        cached = _digests[id(mapping)] = (mapping, mapping_digest(mapping))
+    return cached[1]
+
+
+def code_digest(module_names):
+    h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for name in module_names:
+        path = getattr(sys.modules.get(name), "__file__", None)
+        if path and os.path.isfile(path):
+            with open(path, "rb") as fh:
+                h.update(fh.read())
+    return h.hexdigest()
+
+
+def parser_fingerprint(parser):
+    h = hashlib.sha256(code_digest((type(parser).__module__,) + SHARED_MODULES).encode())
+    options = {attr: getattr(parser, attr) for attr in OPTION_ATTRS if hasattr(parser, attr)}
+    h.update(json.dumps(options, sort_keys=True).encode())
+    h.update(_lookup_digest(getattr(parser, "translations", None)).encode())
+    h.update(_lookup_digest(getattr(parser, "collections", None)).encode())
+    return h.hexdigest()
+
+
+def deps_digest(resolver, deps):
+    """sha256 of the current WR entries and shop promotions for the ids in deps."""
+    h = hashlib.sha256()
+    wr = resolver.car_stats_map or {}
+    for car_id in deps["wr"]:
+        h.update(f"wr\0{car_id}\0{wr.get(car_id)!r}\n".encode("utf-8", errors="surrogatepass"))
+    for schedule_id in deps["shop"]:
+        entries = json.dumps(resolver.shop_entries(schedule_id), ensure_ascii=False, default=str)
+        h.update(f"shop\0{schedule_id}\0{entries}\n".encode("utf-8", errors="surrogatepass"))
+    return h.hexdigest()
+
+
+class ResultCache:
+    """One parser's view of result_cache.sqlite for one iter_records() pass."""
+
+    def __init__(self, root, parser):
+        self.name = type(parser).__name__
+        self.store = parser.store
+        self.resolver = getattr(parser, "resolver", None)
+        self.path = os.path.join(root, CACHE_FILE)
+        self.run_id = time.time_ns()
+        self.hits = 0
+        self.misses = 0
+        self._pending = None
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            self._prepare(parser_fingerprint(parser))
+        except Exception:
+            self.conn.close()
+            raise
+
+    def _prepare(self, fingerprint):
+        conn = self.conn
+        if conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            conn.execute("DROP TABLE IF EXISTS parsers")
+            conn.execute("DROP TABLE IF EXISTS records")
+            conn.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        conn.execute("CREATE TABLE IF NOT EXISTS parsers (parser TEXT PRIMARY KEY, fingerprint TEXT NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS records (parser TEXT NOT NULL, file TEXT NOT NULL, digest TEXT NOT NULL, "
+            "deps TEXT NOT NULL, deps_digest TEXT NOT NULL, record BLOB NOT NULL, seen INTEGER NOT NULL, "
+            "PRIMARY KEY (parser, file))"
+        )
+        # Everything up to close() is one transaction, so an interrupted run leaves the cache as it was
+        conn.execute("BEGIN")
+        row = conn.execute("SELECT fingerprint FROM parsers WHERE parser = ?", (self.name,)).fetchone()
+        if not row or row[0] != fingerprint:
+            if row:
+                debug_log(f"{self.name}: code, options or lookups changed; result cache reset", "info")
+            conn.execute("DELETE FROM records WHERE parser = ?", (self.name,))
+            conn.execute("INSERT OR REPLACE INTO parsers (parser, fingerprint) VALUES (?, ?)", (self.name, fingerprint))
+
+    def _digest(self, name, companions):
+        return ":".join(self.store.digest(n) for n in (name,) + tuple(c for c in companions if c))
+
+    def get(self, name, companions=()):
+        """
+        The cached record for name, or None. On a miss the resolver starts recording the WR and
+        shop lookups for put().
+        """
+        if self.resolver is not None:
+            self.resolver.deps = None
+        self._pending = None
+        try:
+            digest = self._digest(name, companions)
+        except OSError:
+            # Let the parser run into (and report) the unreadable file itself
+            self.misses += 1
+            return None
+        row = self.conn.execute(
+            "SELECT digest, deps, deps_digest, record FROM records WHERE parser = ? AND file = ?", (self.name, name)
+        ).fetchone()
+        if row and row[0] == digest:
+            deps = jsoncodec.loads(row[1])
+            if self.resolver is None or deps_digest(self.resolver, deps) == row[2]:
+                self.conn.execute(
+                    "UPDATE records SET seen = ? WHERE parser = ? AND file = ?", (self.run_id, self.name, name)
+                )
+                self.hits += 1
+                return jsoncodec.loads(row[3])
+        self.misses += 1
+        self._pending = (name, digest)
+        if self.resolver is not None:
+            self.resolver.deps = {"wr": set(), "shop": set()}
+        return None
+
+    def put(self, name, record):
+        """Store the record parsed after get(name) missed, with the lookups it made."""
+        if not self._pending or self._pending[0] != name:
+            return
+        digest = self._pending[1]
+        self._pending = None
+        deps = {"wr": [], "shop": []}
+        if self.resolver is not None and self.resolver.deps is not None:
+            deps = {kind: sorted(ids) for kind, ids in self.resolver.deps.items()}
+            self.resolver.deps = None
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO records (parser, file, digest, deps, deps_digest, record, seen) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.name, name, digest, json.dumps(deps), deps_digest(self.resolver, deps) if self.resolver else "",
+                 json.dumps(record, ensure_ascii=False), self.run_id),
+            )
+        except (TypeError, ValueError, sqlite3.Error) as e:
+            debug_log(f"Not caching {name}: {e}", "warn")
+
+    def close(self):
+        """Drop records of files not seen in this pass and commit."""
+        if self.resolver is not None:
+            self.resolver.deps = None
+        try:
+            self.conn.execute("DELETE FROM records WHERE parser = ? AND seen != ?", (self.name, self.run_id))
+            self.conn.execute("COMMIT")
+        finally:
+            self.conn.close()
+        metrics.record_cache(f"results.{self.name}", hits=self.hits, misses=self.misses)
+        debug_log(f"{self.name}: {self.hits} record(s) from the result cache, {self.misses} parsed", "info")
+
+
+def open_cache(parser):
+    """A ResultCache for parser when it was given a cache_dir, otherwise None."""
+    root = getattr(parser, "cache_dir", None)
+    if not root:
+        return None
+    try:
+        return ResultCache(root, parser)
+    except Exception as e:
+        debug_log(f"Result cache unavailable ({e}); parsing every file", "warn", force=True)
+        return None
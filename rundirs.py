@@ -0,0 +1,252 @@
+# rundirs.py
+import os
+import shutil
+import threading
+from datetime import datetime
+from tracing import span
+from utils import debug_log
+
+RUNS_DIR = "runs"
+# runs/current: a symlink to the published run, or a file holding its id where symlinks fail
+CURRENT_FILE = "current"
+DEFAULT_KEEP_RUNS = 2
+
+# Everything a run produces that readers expect at the top level
+PUBLISHED_ITEMS = [
+    "TextAsset",
+    "MonoBehaviour",
+    "Texture2D",
+    "Sprite",
+    "allparser_output.txt",
+    "allparser_output.json",
+    "allparser_output.sqlite",
+    "records.json",
+    "run_metrics.json",
+    "trace.json",
+    "profiles",
+]
+
+
+def new_run_dir(root="."):
+    """Create a fresh, empty directory for this run under <root>/runs."""
+    run_id = f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+    path = os.path.join(root, RUNS_DIR, run_id)
+    os.makedirs(path, exist_ok=False)
+    debug_log(f"Writing this run into {path}", "info")
+    return path
+
+
+def current_run_id(root="."):
+    path = os.path.join(root, RUNS_DIR, CURRENT_FILE)
+    if os.path.islink(path):
+        return os.path.basename(os.path.normpath(os.readlink(path))) or None
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return fh.read().strip() or None
+    except OSError:
+        return None
+
+
+def _relink(target, link_to):
+    tmp_link = target + ".swap"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(link_to, tmp_link)
+    os.replace(tmp_link, target)
+
+
+def _swap_in(src, target, trash_dir):
+    """
+    Point target at src: atomic symlink swap where supported, otherwise rename the new tree into
+    place. Returns a callable that puts the previous target back.
+    """
+    name = os.path.basename(target)
+    previous_link = os.readlink(target) if os.path.islink(target) else None
+    moved_aside = None
+    tmp_link = target + ".swap"
+    try:
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        rel_src = os.path.relpath(src, os.path.dirname(os.path.abspath(target)))
+        os.symlink(rel_src, tmp_link, target_is_directory=os.path.isdir(src))
+    except (OSError, NotImplementedError):
+        tmp_link = None
+
+    # A real file/folder left by an older in-place run has to move aside first
+    if os.path.lexists(target) and (tmp_link is None or not os.path.islink(target)):
+        os.makedirs(trash_dir, exist_ok=True)
+        moved_aside = os.path.join(trash_dir, name)
+        os.replace(target, moved_aside)
+
+    try:
+        if tmp_link:
+            os.replace(tmp_link, target)
+        else:
+            os.replace(src, target)
+    except OSError:
+        if moved_aside:
+            os.replace(moved_aside, target)
+        raise
+
+    def undo():
+        if tmp_link and previous_link is not None:
+            _relink(target, previous_link)
+            return
+        if tmp_link:
+            os.remove(target)
+        else:
+            os.replace(target, src)
+        if moved_aside:
+            os.replace(moved_aside, target)
+    return undo
+
+
+def _retire(target, trash_dir):
+    """Move target into trash_dir; returns a callable that moves it back."""
+    os.makedirs(trash_dir, exist_ok=True)
+    aside = os.path.join(trash_dir, os.path.basename(target))
+    os.replace(target, aside)
+    return lambda: os.replace(aside, target)
+
+
+def _can_symlink(runs_root):
+    probe = os.path.join(runs_root, CURRENT_FILE + ".probe")
+    try:
+        if os.path.lexists(probe):
+            os.remove(probe)
+        os.symlink(CURRENT_FILE, probe)
+        os.remove(probe)
+        return True
+    except (OSError, NotImplementedError):
+        return False
+
+
+def _restore_all(undo):
+    for restore in reversed(undo):
+        try:
+            restore()
+        except OSError as e:
+            debug_log(f"Failed to restore a previous output: {e}", "error", force=True)
+
+
+def publish_run(run_dir, root=".", items=None):
+    """
+    Make a finished run visible at the top level of root and mark it current. With symlinks, every
+    top-level item is a fixed link into runs/current and publishing is the single atomic swap of
+    runs/current to the new run, so readers never see a mix of two runs. If anything fails, the
+    steps already taken are undone and the previous run stays published. Returns whether the
+    run was published.
+    """
+    run_id = os.path.basename(os.path.normpath(run_dir))
+    trash_dir = os.path.join(root, RUNS_DIR, f"trash_{run_id}")
+    items = items or PUBLISHED_ITEMS
+    if _can_symlink(os.path.join(root, RUNS_DIR)):
+        published = _publish_linked(run_dir, root, items, trash_dir)
+    else:
+        published = _publish_renamed(run_dir, root, items, trash_dir)
+    if published is None:
+        debug_log(f"{run_id} was not published; the previous outputs are still in place", "error", force=True)
+        return False
+    debug_log(f"Published {published} output(s) from {run_id}", "success")
+    return True
+
+
+def _publish_linked(run_dir, root, items, trash_dir):
+    run_id = os.path.basename(os.path.normpath(run_dir))
+    current = os.path.join(root, RUNS_DIR, CURRENT_FILE)
+    undo = []
+    published = 0
+    try:
+        # Layouts from older versions (a current file, per-run item links, in-place folders) are
+        # moved over to links into runs/current first; links keep showing the previous run
+        if os.path.lexists(current) and not os.path.islink(current):
+            previous = current_run_id(root)
+            with open(current, "r", encoding="utf-8") as fh:
+                previous_text = fh.read()
+            os.remove(current)
+            undo.append(lambda: _write_current_file(current, previous_text))
+            if previous and os.path.isdir(os.path.join(root, RUNS_DIR, previous)):
+                _relink(current, previous)
+                undo.append(lambda: os.remove(current))
+        for item in items:
+            target = os.path.join(root, item)
+            through_current = os.path.join(RUNS_DIR, CURRENT_FILE, item)
+            if os.path.exists(os.path.join(run_dir, item)):
+                published += 1
+            elif not os.path.lexists(target):
+                continue
+            # Dangling once current moves on when this run did not produce the item, like a retire
+            if not (os.path.islink(target) and os.readlink(target) == through_current):
+                undo.append(_swap_in(os.path.join(root, through_current), target, trash_dir))
+        # The one step readers can observe
+        _relink(current, run_id)
+    except OSError as e:
+        debug_log(f"Failed to publish {run_id}: {e}", "error", force=True)
+        _restore_all(undo)
+        return None
+    return published
+
+
+def _write_current_file(current_path, run_id):
+    with open(current_path + ".tmp", "w", encoding="utf-8") as fh:
+        fh.write(run_id)
+    os.replace(current_path + ".tmp", current_path)
+
+
+def _publish_renamed(run_dir, root, items, trash_dir):
+    """
+    Fallback where symlinks are not allowed (e.g. Windows without developer mode): each item is
+    renamed into place in turn. There is no single pointer to swap, so a reader can see new and
+    old items side by side while this loop runs; it only guarantees that a failure leaves the
+    previous run in place as a whole.
+    """
+    run_id = os.path.basename(os.path.normpath(run_dir))
+    undo = []
+    published = 0
+    for item in items:
+        src = os.path.join(run_dir, item)
+        target = os.path.join(root, item)
+        try:
+            if os.path.exists(src):
+                undo.append(_swap_in(src, target, trash_dir))
+                published += 1
+            elif os.path.lexists(target):
+                # Not produced by this run: retire the previous one, like the old cleanup did
+                undo.append(_retire(target, trash_dir))
+        except OSError as e:
+            debug_log(f"Failed to publish {item} from {run_id}: {e}", "error", force=True)
+            _restore_all(undo)
+            return None
+    _write_current_file(os.path.join(root, RUNS_DIR, CURRENT_FILE), run_id)
+    return published
+
+
+def _collect_garbage(root, keep, exclude):
+    runs_root = os.path.join(root, RUNS_DIR)
+    try:
+        entries = sorted(e for e in os.listdir(runs_root) if os.path.isdir(os.path.join(runs_root, e)))
+    except OSError:
+        return
+
+    protected = set(exclude)
+    current = current_run_id(root)
+    if current:
+        protected.add(current)
+    finished_runs = [e for e in entries if e.startswith("run_") and e not in protected]
+    stale = [e for e in entries if e.startswith("trash_")] + finished_runs[:max(0, len(finished_runs) - keep)]
+
+    for entry in stale:
+        try:
+            with span(f"remove {entry}", "run_gc"):
+                shutil.rmtree(os.path.join(runs_root, entry))
+            debug_log(f"Removed old run folder: {entry}", "debug")
+        except Exception as e:
+            debug_log(f"Failed to remove old run folder {entry}: {e}", "warn")
+
+
+def start_garbage_collection(root=".", keep=DEFAULT_KEEP_RUNS, exclude=()):
+    """Delete superseded runs in a background thread so cleanup stays off the critical path."""
+    exclude = [os.path.basename(os.path.normpath(e)) for e in exclude]
+    thread = threading.Thread(target=_collect_garbage, args=(root, keep, exclude), name="run-gc")
+    thread.start()
+    return thread
@@ -0,0 +1,132 @@
+# runmetrics.py
+import os
+import time
+import contextlib
+from datetime import datetime, timezone
+import jsoncodec
+import profiling
+import tracing
+from utils import debug_log, get_rss_mb, get_peak_rss_mb
+
+METRICS_FILE = "run_metrics.json"
+
+
+class RunMetrics:
+    """Wall/CPU time per phase, files and bytes processed, cache hit rates and peak RSS for one run."""
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self.phases = {}
+        self.caches = {}
+        self.extraction = {}
+        self.info = {}
+
+    def _entry(self, name):
+        return self.phases.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0, "files": 0, "bytes": 0})
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        entry = self._entry(name)
+        with profiling.profiler.phase(name), tracing.tracer.span(name, "phase"):
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            try:
+                yield entry
+            finally:
+                entry["wall_s"] += time.perf_counter() - wall
+                entry["cpu_s"] += time.process_time() - cpu
+                entry["calls"] += 1
+                entry["rss_mb"] = round(get_rss_mb(), 1)
+
+    def add_counts(self, name, files=0, size=0):
+        entry = self._entry(name)
+        entry["files"] += files
+        entry["bytes"] += size
+
+    def record_cache(self, name, hits=0, misses=0):
+        cache = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+        cache["hits"] += hits
+        cache["misses"] += misses
+        total = cache["hits"] + cache["misses"]
+        cache["hit_rate"] = cache["hits"] / total if total else None
+
+    def record_extraction(self, bundle_stats):
+        """Fold per-bundle extraction stats (including worker processes) into per-asset-type totals."""
+        by_type = {}
+        for stats in bundle_stats:
+            for type_name, t in stats.get("types", {}).items():
+                total = by_type.setdefault(type_name, {"seconds": 0.0, "objects": 0, "bytes": 0})
+                total["seconds"] += t["seconds"]
+                total["objects"] += t["objects"]
+                total["bytes"] += t["bytes"]
+        self.extraction = {
+            "bundles": len(bundle_stats),
+            "failed": sum(1 for s in bundle_stats if not s.get("ok", True)),
+            "bundle_bytes": sum(s.get("size_bytes", 0) for s in bundle_stats),
+            "bundle_seconds": sum(s.get("seconds", 0.0) for s in bundle_stats),
+            "by_type": by_type,
+        }
+
+    def to_dict(self):
+        return {
+            "started_at": self.started_at,
+            "wall_s": time.perf_counter() - self._wall_start,
+            "cpu_s": time.process_time() - self._cpu_start,
+            "peak_rss_mb": round(get_peak_rss_mb(), 1),
+            "phases": self.phases,
+            "extraction": self.extraction,
+            "caches": self.caches,
+            "info": self.info,
+        }
+
+    def write_json(self, path):
+        tmp_path = path + ".tmp"
+        jsoncodec.dump_file(self.to_dict(), tmp_path, indent=2)
+        os.replace(tmp_path, path)
+        debug_log(f"Run metrics written to {path}", "info")
+
+    def write_prometheus(self, path, prefix="csr2"):
+        """Write a node_exporter textfile-collector compatible snapshot of the run."""
+        data = self.to_dict()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_str}}} {value}" if label_str else f"{prefix}_{name} {value}")
+
+        phases = data["phases"]
+        metric("phase_wall_seconds", "Wall time spent in each run phase.", [({"phase": p}, e["wall_s"]) for p, e in phases.items()])
+        metric("phase_cpu_seconds", "CPU time spent in each run phase.", [({"phase": p}, e["cpu_s"]) for p, e in phases.items()])
+        metric("phase_files", "Files processed in each run phase.", [({"phase": p}, e["files"]) for p, e in phases.items()])
+        metric("phase_bytes", "Bytes processed in each run phase.", [({"phase": p}, e["bytes"]) for p, e in phases.items()])
+        by_type = data["extraction"].get("by_type", {})
+        metric("extraction_seconds", "Extraction time per asset type.", [({"type": t}, v["seconds"]) for t, v in by_type.items()])
+        metric("extraction_objects", "Objects extracted per asset type.", [({"type": t}, v["objects"]) for t, v in by_type.items()])
+        metric("cache_hit_ratio", "Hit rate of each run cache.", [({"cache": c}, v["hit_rate"]) for c, v in data["caches"].items() if v["hit_rate"] is not None])
+        metric("run_wall_seconds", "Total wall time of the run.", [({}, data["wall_s"])])
+        metric("run_cpu_seconds", "Total CPU time of the run.", [({}, data["cpu_s"])])
+        metric("peak_rss_bytes", "Peak resident set size of the run.", [({}, int(data["peak_rss_mb"] * 1024 * 1024))])
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        debug_log(f"Prometheus metrics written to {path}", "info")
+
+
+metrics = RunMetrics()
+
+
+def reset():
+    global metrics
+    metrics = RunMetrics()
+    return metrics
+
+
+def phase(name):
+    return metrics.phase(name)
@@ -0,0 +1,144 @@
+# schema.py
+"""
+Declarative paths into the game JSON, compiled once at import instead of chained .get(..., {}) calls:
+
+    LOCKIN_SLOTS = SchemaPath("LockinNamespaces.Namespaces.{title}.LockinSlotsList", list)
+    LOCKIN_SLOTS.get(event, title=title)
+
+A missing step, a non-dict along the way or a leaf of the wrong type all give an empty value of
+the expected type (None when no type is given).
+"""
+from logs import debug_log
+
+DEFAULT_SEARCH_DEPTH = 16
+WILDCARD = "*"
+
+
+class SchemaPath:
+    def __init__(self, spec, expect=None):
+        self.spec = spec
+        self.expect = expect
+        self.steps = tuple(
+            (part[1:-1], True) if part.startswith("{") and part.endswith("}") else (part, False)
+            for part in spec.split(".")
+        )
+
+    def _empty(self):
+        return self.expect() if self.expect else None
+
+    def get(self, obj, **params):
+        for name, is_param in self.steps:
+            if not isinstance(obj, dict):
+                return self._empty()
+            obj = obj.get(params[name] if is_param else name)
+        if obj is None:
+            return self._empty()
+        if self.expect and not isinstance(obj, self.expect):
+            debug_log(lambda: f"{self.spec}: expected {self.expect.__name__}, found {type(obj).__name__}", "debug")
+            return self._empty()
+        return obj
+
+
+# Event TextAssets
+EVENT_SCHEDULE = SchemaPath("EventSchedule.ScheduleList", list)
+LOCKIN_SLOTS = SchemaPath("LockinNamespaces.Namespaces.{title}.LockinSlotsList", list)
+SPECIAL_LADDER_GROUPS = SchemaPath("SpecialLadderEvents.LadderEvents.RaceEventGroups", list)
+GACHA_EVENTS = SchemaPath("GachaEventsCalendar.GachaEvents", list)
+SEASONAL_REWARD_CARS = SchemaPath("CrewLeaderboardRewardDefinitions.SeasonalRewardCars.{title}", dict)
+# _SD / _BS companions and showdowns
+SD_BRACKETS = SchemaPath("ShowdownMilestoneRewards.RewardContainers.{title}.brackets", list)
+SHOWDOWN_GROUPS = SchemaPath("ShowdownEventsContainer.RaceEventGroups", list)
+# Tournament configs and metadata
+TOURNAMENT_EVENTS = SchemaPath("TournamentConfig.TournamentEvents", dict)
+SHOP_PROMOTIONS = SchemaPath("ShopTimeGatedEvents.GENERATED_TimeGatedCarPromotions", dict)
+
+
+def find_key(obj, key, max_depth=DEFAULT_SEARCH_DEPTH):
+    """
+    Every list stored under `key` anywhere in obj, as (path, list) in document order, without
+    recursion and no deeper than max_depth. List positions show up as WILDCARD in the path.
+    """
+    found = []
+    # Paths are kept as (step, parent) links and only turned into tuples for matches
+    stack = [(obj, 0, None, False)]
+    while stack:
+        node, depth, link, is_match = stack.pop()
+        if is_match:
+            path = []
+            while link is not None:
+                step, link = link
+                path.append(step)
+            found.append((tuple(reversed(path)), node))
+            continue
+        if depth >= max_depth:
+            continue
+        # Scalars can neither match nor hold matches, so they never go on the stack
+        if isinstance(node, dict):
+            for k, v in reversed(node.items()):
+                if k == key and isinstance(v, list):
+                    stack.append((v, depth + 1, (k, link), True))
+                elif isinstance(v, (dict, list)):
+                    stack.append((v, depth + 1, (k, link), False))
+        elif isinstance(node, list):
+            child_link = (WILDCARD, link)
+            for item in reversed(node):
+                if isinstance(item, (dict, list)):
+                    stack.append((item, depth + 1, child_link, False))
+    return found
+
+
+def walk(obj, path, **params):
+    """All values at a path from find_key (WILDCARD expands lists, {name} steps take params)."""
+    nodes = [obj]
+    for step in path:
+        is_param = step.startswith("{") and step.endswith("}")
+        key = params.get(step[1:-1], step) if is_param else step
+        next_nodes = []
+        for node in nodes:
+            if isinstance(node, list) and step == WILDCARD:
+                next_nodes.extend(node)
+            elif isinstance(node, dict) and key in node:
+                next_nodes.append(node[key])
+        nodes = next_nodes
+    return nodes
+
+
+def layout(obj, depth=2, **params):
+    """
+    Hashable description of obj's dict keys down to depth levels, for KeySearch. Keys equal to a
+    param value (e.g. the event title) become "{name}" so events differing only there share one.
+    """
+    if not isinstance(obj, dict):
+        return type(obj).__name__
+    placeholders = {value: "{" + name + "}" for name, value in params.items()}
+    if depth <= 1:
+        return tuple(placeholders.get(k, k) for k in obj)
+    return tuple((placeholders.get(k, k), layout(v, depth - 1, **params)) for k, v in obj.items())
+
+
+class KeySearch:
+    """
+    find_key with a cache of where `key` was found for each schema (any hashable description of
+    the document layout, e.g. layout(obj)). Later documents with the same schema only walk those
+    paths instead of searching the whole tree; params such as title are generalized away. When
+    the known paths find nothing the full search still runs, and its paths join the cache.
+    """
+
+    def __init__(self, key, max_depth=DEFAULT_SEARCH_DEPTH):
+        self.key = key
+        self.max_depth = max_depth
+        self.locations = {}
+
+    def find(self, obj, schema, **params):
+        paths = self.locations.get(schema)
+        if paths:
+            values = [value for path in paths for value in walk(obj, path, **params) if isinstance(value, list)]
+            if values:
+                return values
+        found = find_key(obj, self.key, self.max_depth)
+        placeholders = {value: "{" + name + "}" for name, value in params.items()}
+        self.locations[schema] = tuple(dict.fromkeys((paths or ()) + tuple(
+            tuple(placeholders.get(step, step) if isinstance(step, str) else step for step in path)
+            for path, _ in found
+        )))
+        return [value for _, value in found]
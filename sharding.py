@@ -0,0 +1,102 @@
+# sharding.py
+import os
+import re
+import zlib
+import jsoncodec
+from utils import debug_log
+
+SHARD_ROOT = "shards"
+RECORDS_FILE = "records.json"
+
+
+def parse_shard_spec(spec):
+    """Parse an 'i/N' shard spec into (index, count)."""
+    m = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", str(spec or ""))
+    if not m:
+        raise ValueError(f"Invalid shard spec '{spec}', expected i/N (e.g. 0/4)")
+    index, count = int(m.group(1)), int(m.group(2))
+    if count < 1 or index >= count:
+        raise ValueError(f"Invalid shard spec '{spec}', index must be in 0..{count - 1}")
+    return index, count
+
+
+def shard_of(key, count):
+    # crc32 is stable across processes and machines, unlike hash()
+    return zlib.crc32(key.encode("utf-8")) % count
+
+
+def bundle_shard_key(file_path, source_folder):
+    return os.path.relpath(file_path, source_folder).replace("\\", "/").lower()
+
+
+def textasset_group_key(filename):
+    """Key shared by an event TextAsset and its _SD/_BS companions so they land on the same shard."""
+    key = re.sub(r'\.txt$', '', filename, flags=re.IGNORECASE)
+    key = re.sub(r'[_ ](sd|bs)[0-9]*$|_?[0-9]{4}$', '', key, flags=re.IGNORECASE)
+    return re.sub(r'[_ ]', '', key.lower())
+
+
+def textasset_filter(index, count):
+    return lambda filename: shard_of(textasset_group_key(filename), count) == index
+
+
+def shard_dir(index, count, root="."):
+    return os.path.join(root, SHARD_ROOT, f"shard_{index}_of_{count}")
+
+
+def write_shard_records(directory, index, count, records_by_parser):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, RECORDS_FILE)
+    tmp_path = path + ".tmp"
+    jsoncodec.dump_file({"shard": index, "count": count, "parsers": records_by_parser}, tmp_path)
+    os.replace(tmp_path, path)
+    debug_log(f"Shard {index}/{count} records written to {path}", "success")
+    return path
+
+
+def find_shard_dirs(root="."):
+    base = os.path.join(root, SHARD_ROOT)
+    if not os.path.isdir(base):
+        return []
+    return sorted(
+        os.path.join(base, d) for d in os.listdir(base)
+        if re.fullmatch(r"shard_\d+_of_\d+", d) and os.path.isfile(os.path.join(base, d, RECORDS_FILE))
+    )
+
+
+def load_shard_records(shard_dirs):
+    """Combine records.json from every shard. Returns {parser name: [records]} or None if shards are missing."""
+    combined = {}
+    seen = {}
+    count = None
+    for directory in shard_dirs:
+        path = os.path.join(directory, RECORDS_FILE)
+        try:
+            data = jsoncodec.load_file(path)
+        except Exception as e:
+            debug_log(f"Failed to load shard records {path}: {e}", "error", force=True)
+            return None
+
+        if count is None:
+            count = data["count"]
+        elif data["count"] != count:
+            debug_log(f"Shard {path} was produced for {data['count']} shards, expected {count}", "error", force=True)
+            return None
+        if data["shard"] in seen:
+            debug_log(f"Shard {data['shard']} found twice ({seen[data['shard']]} and {directory})", "error", force=True)
+            return None
+        seen[data["shard"]] = directory
+
+        for parser_name, records in data["parsers"].items():
+            combined.setdefault(parser_name, []).extend(records)
+
+    if count is None:
+        debug_log("No shard records found to merge.", "error", force=True)
+        return None
+    missing = [i for i in range(count) if i not in seen]
+    if missing:
+        debug_log(f"Cannot merge: missing shard(s) {missing} of {count}", "error", force=True)
+        return None
+
+    debug_log(f"Loaded records from {count} shard(s)", "success")
+    return combined
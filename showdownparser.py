@@ -1,81 +1,59 @@
 # showdownparser.py
 import os
 import re
-import json
-import requests
 from colorama import Fore, Style
+from runmetrics import phase
 from utils import debug_log, format_time, colorize_star_for_console, translate_event_name
+from carresolver import CarResolver
+from schema import SHOWDOWN_GROUPS
+from textstore import FolderStore
+from outputs import by_file, parser_output
+from resultcache import open_cache
+from tracing import tracer
+from wrtable import build_wr_data, parse_wr_entries, wr_table, format_stats
+from wrsources import DEFAULT_WR_URL, fetch_first
 
 class ShowdownParser:
-    def __init__(self, folder="TextAsset", translations=None, shop_data=None, debug=False, crdb_mode=False):
+    def __init__(self, folder="TextAsset", translations=None, shop_data=None, debug=False, crdb_mode=False, file_filter=None,
+                 console=True, text_output=True, store=None, car_stats_map=None, resolver=None, wr_stats=False,
+                 wr_sources=None, cache_dir=None):
         self.folder = folder
+        self.store = store or FolderStore(folder)
+        # Pre-fetched WR data (see fetch_wr_data) to reuse instead of downloading it again
+        self.car_stats_map = car_stats_map
         self.translations = translations or {}
         self.shop_data = shop_data or {}
+        self.resolver = resolver or CarResolver(self.translations, car_stats_map, self.shop_data)
         self.debug = debug
         self.crdb_mode = crdb_mode
+        self.file_filter = file_filter
+        self.console = console
+        self.text_output = text_output
+        self.cache_dir = cache_dir
         self.output_file = "sd_output.txt"
-        self.wr_url = "https://raw.githubusercontent.com/Nitro4CSR/CSR2WorldRecordsDB/refs/heads/main/JessWR.json"
+        self.wr_url = DEFAULT_WR_URL
+        # URLs and/or local files raced against each other; None means just wr_url
+        self.wr_sources = wr_sources
         self.showdown_pattern = r"SMP_SHOWDOWN_\d+_W\d+\.txt"
         self.special_bs_pattern = r".*_BS\.txt"
         self.special_sd_pattern = r".*_SD.*\.txt"
         self.missing_translations = set()
         self.missing_wr_data = set()
         self.unknown_cars = set()
+        # Append per-tier WR statistics to every showdown (needs numpy)
+        self.wr_stats = wr_stats
+        self._wr_table = None
 
     def fetch_wr_data(self):
-        debug_log(f"Fetching WR data from {self.wr_url}", "info")
-        try:
-            r = requests.get(self.wr_url, timeout=10)
-            r.raise_for_status()
-            wr_data = r.json()
-        except Exception as e:
-            debug_log(f"Failed to fetch WR data: {e}", "error")
+        sources = self.wr_sources or [self.wr_url]
+        debug_log(f"Fetching WR data from {', '.join(sources)}", "info")
+        source, parsed = fetch_first(sources, parse_wr_entries, valid=lambda p: bool(p[0]))
+        if parsed is None:
+            debug_log("Failed to fetch WR data from any source", "error")
             return {}
-
-        car_stats_map = {}
-        ec_overwrite = 0
-        ec_only_add = 0
-
-        for entry in wr_data:
-            car_id = entry.get("DB Name")
-            if not car_id:
-                continue
-
-            dyno_raw = entry.get("WR-DYNO")
-            best_et_raw = entry.get("WR-BEST ET")
-
-            try:
-                dyno = float(dyno_raw) if dyno_raw not in (None, "", "n.A.") else None
-            except (TypeError, ValueError):
-                dyno = None
-
-            try:
-                best_et = float(best_et_raw) if best_et_raw not in (None, "", "n.A.", "0.000") else None
-            except (TypeError, ValueError):
-                best_et = None
-
-            # Prefer valid Best ET (>0), otherwise fall back to Dyno
-            display_time = best_et if best_et is not None and best_et > 0 else dyno
-            source = "ET" if best_et is not None and best_et > 0 else "Dyno"
-
-            tier = entry.get("Un")
-            star = entry.get("★")
-
-            if car_id.endswith("_EC"):
-                base_id = car_id[:-3]
-                if base_id in car_stats_map:
-                    ec_overwrite += 1
-                else:
-                    ec_only_add += 1
-                car_stats_map[base_id] = (display_time, star, tier, True, source)
-            elif car_id not in car_stats_map:
-                car_stats_map[car_id] = (display_time, star, tier, False, source)
-
-        debug_log(
-            f"Total WR entries processed: {len(car_stats_map)} (EC overwrote {ec_overwrite}, EC-only added {ec_only_add})",
-            "success"
-        )
-        return car_stats_map
+        if len(sources) > 1:
+            debug_log(f"WR data taken from {source}", "info")
+        return build_wr_data(parsed)
 
     def parse_cars(self, car_ids, car_stats_map, filepath):
         cars = []
@@ -83,50 +61,48 @@ class ShowdownParser:
             if not car_id or not str(car_id).strip():
                 continue
 
-            pretty = car_id if self.crdb_mode else self.translations.get(car_id)
-            wr_entry = car_stats_map.get(car_id)
+            car = self.resolver.resolve(car_id)
+            pretty = car_id if self.crdb_mode else (car.pretty if car.translated else None)
+            wr_entry = car.wr
 
             if not pretty and not wr_entry:
                 self.unknown_cars.add(car_id)
-                debug_log(f"New car detected (not in translations or WR): {car_id}", "warn", force=True)
+                debug_log(lambda: f"New car detected (not in translations or WR): {car_id}", "warn", force=True)
                 pretty = car_id
             elif not pretty:
                 self.missing_translations.add(car_id)
-                debug_log(f"Missing translation for car id: {car_id}", "warn", force=True)
+                debug_log(lambda: f"Missing translation for car id: {car_id}", "warn", force=True)
                 pretty = car_id
             elif not wr_entry:
                 self.missing_wr_data.add(car_id)
-                debug_log(f"No WR data for {car_id}", "info")
+                debug_log(lambda: f"No WR data for {car_id}", "info")
 
-            if wr_entry:
-                display_time, star, tier, _, source = wr_entry
-            else:
-                display_time, star, tier, _, source = None, None, None, None, "Dyno"
-
-            cars.append((car_id, pretty, display_time, tier, star, source))
+            cars.append((car_id, pretty, car.wr_time, car.tier, car.star, car.wr_source))
         return cars
 
     def format_output(self, title, start, end, cars, showdown_type="Default", cars_for_sale=None):
         if cars_for_sale is None:
             cars_for_sale = {}
 
-        start_str = format_time(start, for_file=False)
-        end_str = format_time(end, for_file=False)
+        console = self.console
         start_file = format_time(start, for_file=True)
         end_file = format_time(end, for_file=True)
-
-        if showdown_type == "Championship":
-            title_color = Fore.RED
-        elif showdown_type == "Elite":
-            title_color = Fore.MAGENTA
-        elif showdown_type == "Special":
-            title_color = Fore.BLUE
-        else:
-            title_color = Fore.WHITE
-
-        console_lines = [f"{title_color}{title}{Style.RESET_ALL} ({start_str} - {end_str})", ""]
         file_lines = [f"{title} ({start_file} - {end_file})", ""]
 
+        console_lines = []
+        if console:
+            start_str = format_time(start, for_file=False)
+            end_str = format_time(end, for_file=False)
+            if showdown_type == "Championship":
+                title_color = Fore.RED
+            elif showdown_type == "Elite":
+                title_color = Fore.MAGENTA
+            elif showdown_type == "Special":
+                title_color = Fore.BLUE
+            else:
+                title_color = Fore.WHITE
+            console_lines = [f"{title_color}{title}{Style.RESET_ALL} ({start_str} - {end_str})", ""]
+
         tiers_present = {c[3] for c in cars if c[3]}
         has_half_mile = any(t in ["T4", "T5"] for t in tiers_present)
         has_quarter_mile = any(t in ["T1", "T2", "T3"] for t in tiers_present)
@@ -144,44 +120,65 @@ class ShowdownParser:
         for car_id, pretty, display_time, tier, star, source in sorted_cars:
             tier_str = tier or "?"
             star_str = star or "?"
-            star_col = colorize_star_for_console(star_str)
             time_label = "Best ET" if source == "ET" else "Dyno"
             note = " (1/4 mile Time Only)" if mark_quarter and tier in ["T1", "T2", "T3"] else ""
 
             sale_info_file = ""
-            sale_info_console = ""
             if car_id in cars_for_sale:
                 quantity = cars_for_sale[car_id]
                 sale_info_file = f" - Car For Sale - {quantity} Gold Coins"
-                sale_info_console = f" - Car For Sale - {Fore.YELLOW}{quantity} Gold Coins{Style.RESET_ALL}"
 
             # Base pretty name (translated or fallback)
             file_pretty = pretty
-            console_pretty = pretty
 
             # Append raw car_id in debug mode if different from pretty (and not crdb_mode)
             if self.debug and not self.crdb_mode and car_id != pretty:
-                debug_suffix = f" ({car_id})"
-                file_pretty += debug_suffix
-                console_pretty += debug_suffix
+                file_pretty += f" ({car_id})"
 
             if display_time is not None:
                 file_line = f"• {file_pretty} ({time_label} - {display_time:.3f}) ({tier_str} {star_str}){sale_info_file}{note}"
-                console_line = f"• {console_pretty} ({time_label} - {display_time:.3f}) ({tier_str} {star_col}){sale_info_console}{note}"
             else:
                 file_line = f"• {file_pretty} ({time_label} - N/A) ({tier_str} {star_str}){sale_info_file}{note}"
+            file_lines.append(file_line)
+            if not console:
+                continue
+
+            star_col = colorize_star_for_console(star_str)
+            sale_info_console = ""
+            if car_id in cars_for_sale:
+                sale_info_console = f" - Car For Sale - {Fore.YELLOW}{cars_for_sale[car_id]} Gold Coins{Style.RESET_ALL}"
+            console_pretty = file_pretty
+            if display_time is not None:
+                console_line = f"• {console_pretty} ({time_label} - {display_time:.3f}) ({tier_str} {star_col}){sale_info_console}{note}"
+            else:
                 if car_id in self.unknown_cars:
                     console_line = f"• {Fore.RED}{console_pretty} ({time_label} - N/A){Style.RESET_ALL} ({tier_str} {star_col}){sale_info_console}{note}"
                 elif car_id in self.missing_wr_data:
                     console_line = f"• {Fore.YELLOW}{console_pretty} ({time_label} - N/A){Style.RESET_ALL} ({tier_str} {star_col}){sale_info_console}{note}"
                 else:
                     console_line = f"• {console_pretty} ({time_label} - N/A) ({tier_str} {star_col}){sale_info_console}{note}"
-
-            file_lines.append(file_line)
             console_lines.append(console_line)
 
+        if self.wr_stats:
+            table = self._stats_table()
+            if table is not None:
+                stats_lines = format_stats(table.showdown_stats(c[0] for c in cars))
+                file_lines += [""] + stats_lines
+                if console:
+                    console_lines += [""] + stats_lines
+
         return "\n".join(file_lines), "\n".join(console_lines)
 
+    def _stats_table(self):
+        car_stats_map = self.resolver.car_stats_map
+        if self._wr_table is None or self._wr_table[0] is not car_stats_map:
+            table = wr_table(car_stats_map)
+            if table is None:
+                debug_log("-wrstats needs numpy (pip install numpy); showdown statistics skipped", "warn", force=True)
+                self.wr_stats = False
+            self._wr_table = (car_stats_map, table)
+        return self._wr_table[1]
+
     def derive_showdown_type_and_title(self, schedule_id: str, event_obj: dict) -> tuple[str, str]:
         season = "?"
         m = re.search(r"SMP_SHOWDOWN_(\d+)_W\d+", schedule_id or "")
@@ -189,7 +186,7 @@ class ShowdownParser:
             season = m.group(1)
 
         showdown_type = "Default"
-        for group in event_obj.get("ShowdownEventsContainer", {}).get("RaceEventGroups", []):
+        for group in SHOWDOWN_GROUPS.get(event_obj):
             pin_id = group.get("PinPositionId", "")
             if "CHMPIONSHIP_SHOWDOWN" in pin_id:
                 showdown_type = "Championship"
@@ -205,8 +202,7 @@ class ShowdownParser:
         return showdown_type, f"{label} - Season {season}"
 
     def parse_showdown_file(self, filepath, car_stats_map):
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = self.store.load(os.path.basename(filepath))
 
         event = list(data.values())[0]
         schedule = event["EventSchedule"]["ScheduleList"][0]
@@ -225,11 +221,8 @@ class ShowdownParser:
         cars_for_sale = {}
         if "_W2" in os.path.basename(filepath):
             sched_key = os.path.splitext(os.path.basename(filepath))[0]
-            promos = self.shop_data.get("ShopTimeGatedEvents", {}).get("GENERATED_TimeGatedCarPromotions", {})
-            for car_id, promo in promos.items():
-                for entry in promo:
-                    if sched_key in entry.get("ScheduleIDList", []):
-                        cars_for_sale[car_id] = entry.get("quantity", 0)
+            for car_id, entries in self.resolver.shop_entries(sched_key).items():
+                cars_for_sale[car_id] = entries[-1].get("quantity", 0)
 
             if not cars_for_sale:
                 debug_log(
@@ -242,8 +235,7 @@ class ShowdownParser:
         return file_out, console_out
 
     def parse_special_event_file(self, filepath, car_stats_map):
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = self.store.load(os.path.basename(filepath))
 
         event = list(data.values())[0]
         schedule = event["EventSchedule"]["ScheduleList"][0]
@@ -261,38 +253,87 @@ class ShowdownParser:
         file_out, console_out = self.format_output(title, start, end, cars, showdown_type)
         return file_out, console_out
 
-    def process(self):
+    def parse_records(self):
+        return list(self.iter_records())
+
+    def iter_records(self):
         debug_log("Starting ShowdownParser processing", "info")
         if self.crdb_mode:
             debug_log("CRDB mode enabled", "debug", force=True)
 
-        car_stats_map = self.fetch_wr_data()
-        file_outputs, console_outputs = [], []
-
-        files = sorted([f for f in os.listdir(self.folder) if os.path.isfile(os.path.join(self.folder, f)) and f.lower().endswith(".txt")])
-        for fname in files:
+        car_stats_map = self.car_stats_map if self.car_stats_map is not None else self.resolver.car_stats_map
+        if car_stats_map is None:
+            with phase("wr_fetch"):
+                car_stats_map = self.fetch_wr_data()
+        self.resolver.set_wr_data(car_stats_map)
+        missing_translations, missing_wr_data, unknown_cars = set(), set(), set()
+        # Opened after the WR fetch: cached records are checked against the current WR entries
+        cache = open_cache(self)
+
+        files = self.store.names()
+        for fname in tracer.each(files, "parse.ShowdownParser"):
+            if self.file_filter and not self.file_filter(fname):
+                continue
             filepath = os.path.join(self.folder, fname)
-            if re.match(self.showdown_pattern, fname):
-                debug_log(f"Parsing file: {fname}", "info")
-                f_out, c_out = self.parse_showdown_file(filepath, car_stats_map)
-                file_outputs.append(f_out)
-                console_outputs.append(c_out)
-            elif re.match(self.special_bs_pattern, fname) or re.match(self.special_sd_pattern, fname):
-                debug_log(f"Parsing special showdown file: {fname}", "info")
-                f_out, c_out = self.parse_special_event_file(filepath, car_stats_map)
-                file_outputs.append(f_out)
-                console_outputs.append(c_out)
-
-        if file_outputs:
-            with open(os.path.join(self.folder, self.output_file), "w", encoding="utf-8") as out:
-                out.write("\n\n".join(file_outputs))
+            is_showdown = re.match(self.showdown_pattern, fname)
+            if not is_showdown and not (re.match(self.special_bs_pattern, fname) or re.match(self.special_sd_pattern, fname)):
+                continue
+            record = cache.get(fname) if cache else None
+            if record is None:
+                # Track missing/unknown cars per file so records can be merged across shards
+                self.missing_translations, self.missing_wr_data, self.unknown_cars = set(), set(), set()
+                if is_showdown:
+                    debug_log(lambda: f"Parsing file: {fname}", "info")
+                    f_out, c_out = self.parse_showdown_file(filepath, car_stats_map)
+                else:
+                    debug_log(lambda: f"Parsing special showdown file: {fname}", "info")
+                    f_out, c_out = self.parse_special_event_file(filepath, car_stats_map)
+                record = {
+                    "file": fname,
+                    "file_out": f_out,
+                    "console_out": c_out,
+                    "missing_translations": sorted(self.missing_translations),
+                    "missing_wr_data": sorted(self.missing_wr_data),
+                    "unknown_cars": sorted(self.unknown_cars),
+                }
+                if cache:
+                    cache.put(fname, record)
+            missing_translations.update(record["missing_translations"])
+            missing_wr_data.update(record["missing_wr_data"])
+            unknown_cars.update(record["unknown_cars"])
+            yield record
+
+        if cache:
+            cache.close()
+        self.missing_translations, self.missing_wr_data, self.unknown_cars = missing_translations, missing_wr_data, unknown_cars
+
+    def sections(self, records):
+        return [(r["file"], r["file_out"]) for r in sorted(records, key=lambda r: r["file"])]
+
+    def render(self, records, run=None):
+        out = parser_output(self, run, separator="\n\n", keep_empty=False, combined_console=self.console)
+        # iter_records() swaps the per-file sets in and out while it runs, so merge once it is done
+        missing_translations, missing_wr_data, unknown_cars = set(), set(), set()
+        with out:
+            for r in by_file(records):
+                out.add(r["file"], r["file_out"], console=r["console_out"])
+                missing_translations.update(r["missing_translations"])
+                missing_wr_data.update(r["missing_wr_data"])
+                unknown_cars.update(r["unknown_cars"])
+        self.missing_translations.update(missing_translations)
+        self.missing_wr_data.update(missing_wr_data)
+        self.unknown_cars.update(unknown_cars)
+
+        if out.written:
             debug_log(f"Wrote results to {self.output_file}", "success", force=True)
 
-        output_text = "\n\n".join(console_outputs)
-        if console_outputs:
-            print(output_text)
-        else:
+        if not out.count:
             debug_log("No showdown files matched in this folder.", "warn", force=True)
+        if not self.console:
+            debug_log("ShowdownParser processing completed", "success")
+            return out.text()
+
+        out.show()
 
         if self.missing_translations and not self.crdb_mode:
             print(f"\n{Fore.YELLOW}[SUMMARY]{Style.RESET_ALL} {len(self.missing_translations)} cars missing from TranslationDataAsset.json:")
@@ -310,4 +351,7 @@ class ShowdownParser:
                 print(f"    • {car_id}")
 
         debug_log("ShowdownParser processing completed", "success")
-        return output_text
\ No newline at end of file
+        return out.text()
+
+    def process(self):
+        return self.render(self.iter_records())
@@ -0,0 +1,200 @@
+# snapshot.py
+import os
+import pickle
+import hashlib
+import jsoncodec
+from textstore import MemoryStore
+from utils import debug_log, find_localisation_name
+
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".pickle"
+DEFAULT_KEEP_SNAPSHOTS = 5
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def input_hashes(text_dir, extra_paths=()):
+    """sha256 of every TextAsset plus the lookup source files, keyed by name."""
+    hashes = {}
+    if os.path.isdir(text_dir):
+        for name in sorted(os.listdir(text_dir)):
+            path = os.path.join(text_dir, name)
+            if name.lower().endswith(".txt") and os.path.isfile(path):
+                hashes[f"TextAsset/{name}"] = _file_digest(path)
+    for path in extra_paths:
+        if path and os.path.isfile(path):
+            hashes[f"lookup/{os.path.basename(path)}"] = _file_digest(path)
+    return hashes
+
+
+def drop_hashes(text_dir, mono_dir, meta_dir):
+    """input_hashes for an extracted drop: its TextAssets, translation file and metadata folder."""
+    lookup_files = []
+    if os.path.isdir(mono_dir):
+        filename = find_localisation_name(os.listdir(mono_dir))
+        if filename:
+            lookup_files.append(os.path.join(mono_dir, filename))
+    if os.path.isdir(meta_dir):
+        lookup_files.extend(os.path.join(meta_dir, f) for f in sorted(os.listdir(meta_dir)))
+    return input_hashes(text_dir, lookup_files)
+
+
+def mapping_digest(mapping):
+    """sha256 of a lookup that only exists in memory (e.g. a localisation kept out of MonoBehaviour/)."""
+    h = hashlib.sha256()
+    for key, value in sorted(mapping.items(), key=lambda kv: str(kv[0])):
+        h.update(f"{key}\0{value}\n".encode("utf-8", errors="surrogatepass"))
+    return h.hexdigest()
+
+
+def snapshot_key(hashes):
+    h = hashlib.sha256(f"v{SNAPSHOT_VERSION}".encode())
+    for name in sorted(hashes):
+        h.update(f"{name}\0{hashes[name]}\n".encode("utf-8"))
+    return h.hexdigest()[:24]
+
+
+def snapshot_path(root, key):
+    return os.path.join(root, SNAPSHOT_DIR, key + SNAPSHOT_SUFFIX)
+
+
+def build_snapshot(text_dir, translations, shop_data, collections, hashes=None):
+    """Read and decode every TextAsset once; files that are not JSON objects are kept as raw bytes."""
+    hashes = hashes if hashes is not None else input_hashes(text_dir)
+    parsed, raw, sizes = {}, {}, {}
+    for name in sorted(os.listdir(text_dir)) if os.path.isdir(text_dir) else []:
+        path = os.path.join(text_dir, name)
+        if not (name.lower().endswith(".txt") and os.path.isfile(path)):
+            continue
+        with open(path, "rb") as fh:
+            data = fh.read()
+        sizes[name] = len(data)
+        if data.lstrip()[:1] == b"{":
+            try:
+                parsed[name] = jsoncodec.loads(data)
+                continue
+            except Exception:
+                pass
+        raw[name] = data
+    return {
+        "version": SNAPSHOT_VERSION,
+        "key": snapshot_key(hashes),
+        "hashes": hashes,
+        "parsed": parsed,
+        "raw": raw,
+        "sizes": sizes,
+        "translations": translations,
+        "shop_data": shop_data,
+        "collections": collections,
+    }
+
+
+def write_snapshot(root, snapshot):
+    path = snapshot_path(root, snapshot["key"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as fh:
+        pickle.dump(snapshot, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    debug_log(f"Snapshot written to {path} ({os.path.getsize(path) / (1024 * 1024):.1f}MB)", "success")
+    return path
+
+
+def load_snapshot(path):
+    """Load a snapshot written by write_snapshot; returns None if it is missing, unreadable or outdated."""
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "rb") as fh:
+            snapshot = pickle.load(fh)
+    except Exception as e:
+        debug_log(f"Failed to load snapshot {path}: {e}", "warn", force=True)
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        debug_log(f"Ignoring snapshot {path} from another version", "warn")
+        return None
+    # Reused snapshots count as fresh for prune_snapshots
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    debug_log(f"Loaded snapshot {os.path.basename(path)} with {len(snapshot['sizes'])} TextAsset(s)", "success")
+    return snapshot
+
+
+def latest_snapshot(root="."):
+    directory = os.path.join(root, SNAPSHOT_DIR)
+    if not os.path.isdir(directory):
+        return None
+    paths = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(SNAPSHOT_SUFFIX)]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def prune_snapshots(root=".", keep=DEFAULT_KEEP_SNAPSHOTS):
+    directory = os.path.join(root, SNAPSHOT_DIR)
+    if not os.path.isdir(directory):
+        return
+    paths = sorted(
+        (os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(SNAPSHOT_SUFFIX)),
+        key=os.path.getmtime, reverse=True,
+    )
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+            debug_log(f"Removed old snapshot: {os.path.basename(path)}", "debug")
+        except OSError as e:
+            debug_log(f"Failed to remove snapshot {path}: {e}", "warn")
+
+
+class SnapshotStore(MemoryStore):
+    """Serves TextAssets from a snapshot; JSON files come back already decoded."""
+
+    def __init__(self, snapshot):
+        super().__init__(snapshot["raw"])
+        self.parsed = snapshot["parsed"]
+        self.sizes = snapshot["sizes"]
+        self.hashes = snapshot.get("hashes") or {}
+
+    def names(self):
+        return sorted(f for f in self.sizes if f.lower().endswith(".txt"))
+
+    def sniff(self, name):
+        if name not in self.parsed:
+            return super().sniff(name)
+        data = self.parsed[name]
+        if not isinstance(data, dict) or not data:
+            return None, None
+        root_key = next(iter(data))
+        value = data[root_key]
+        if isinstance(value, dict):
+            return root_key, "object"
+        if isinstance(value, list):
+            return root_key, "array"
+        if isinstance(value, str):
+            return root_key, "string"
+        return root_key, "scalar"
+
+    def read(self, name):
+        if name in self.parsed:
+            raise ValueError(f"{name} is stored decoded in the snapshot; use load()")
+        return super().read(name)
+
+    def load(self, name):
+        if name in self.parsed:
+            return self.parsed[name]
+        return super().load(name)
+
+    def size(self, name):
+        return self.sizes.get(name, 0)
+
+    def digest(self, name):
+        # Decoded files cannot be re-read; the snapshot kept their hash
+        digest = self.hashes.get(f"TextAsset/{name}")
+        return digest if digest else super().digest(name)
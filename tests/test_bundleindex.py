@@ -0,0 +1,60 @@
+# tests/test_bundleindex.py
+import os
+import sys
+import time
+import multiprocessing
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import bundleindex
+from bundleindex import load_index, update_index
+
+WORKERS = 8
+UPDATES = 10
+
+
+def _objects(name):
+    return [{"container": f"assets/{name}.txt", "type": "TextAsset", "name": f"{name}.txt", "path_id": 1}]
+
+
+def _update_many(folder, worker):
+    # Like one -shard process per bundle it extracted
+    for i in range(UPDATES):
+        path = os.path.join(folder, f"bundle_{worker}_{i}_ASTC")
+        update_index(folder, {path: _objects(f"{worker}_{i}")})
+
+
+def _bundles(folder, count):
+    for worker in range(count):
+        for i in range(UPDATES):
+            with open(os.path.join(folder, f"bundle_{worker}_{i}_ASTC"), "wb") as fh:
+                fh.write(b"x")
+
+
+def test_parallel_updates_keep_every_bundle(tmp_path):
+    folder = str(tmp_path)
+    _bundles(folder, WORKERS)
+    # fork skips re-importing UnityPy in every child; spawn where fork does not exist
+    ctx = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    procs = [ctx.Process(target=_update_many, args=(folder, w)) for w in range(WORKERS)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(120)
+        assert proc.exitcode == 0
+    bundles = load_index(folder)["bundles"]
+    assert len(bundles) == WORKERS * UPDATES
+    assert not os.path.exists(bundleindex.index_path(folder) + ".lock")
+
+
+def test_stale_lock_is_taken_over(tmp_path):
+    folder = str(tmp_path)
+    _bundles(folder, 1)
+    lock = bundleindex.index_path(folder) + ".lock"
+    with open(lock, "w") as fh:
+        fh.write("12345")
+    old = time.time() - bundleindex.LOCK_STALE_SECONDS - 5
+    os.utime(lock, (old, old))
+    update_index(folder, {os.path.join(folder, "bundle_0_0_ASTC"): _objects("0_0")})
+    assert list(load_index(folder)["bundles"]) == ["bundle_0_0_ASTC"]
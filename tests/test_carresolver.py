@@ -0,0 +1,24 @@
+# tests/test_carresolver.py
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from carresolver import CarResolver
+
+
+def test_name_matches_plain_translation_lookup():
+    translations = {"car_a": "Car A", "car_blank": ""}
+    resolver = CarResolver(translations)
+    for car_id in ("car_a", "car_blank", "car_unknown"):
+        assert resolver.name(car_id) == translations.get(car_id, car_id)
+    # resolve() still falls back to the id for display
+    assert resolver.resolve("car_blank").pretty == "car_blank"
+    assert not resolver.resolve("car_blank").translated
+
+
+def test_name_goes_through_the_cache():
+    resolver = CarResolver({"car_a": "Car A"})
+    assert [resolver.name("car_a") for _ in range(3)] == ["Car A"] * 3
+    assert (resolver.hits, resolver.misses) == (2, 1)
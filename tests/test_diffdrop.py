@@ -0,0 +1,26 @@
+# tests/test_diffdrop.py
+import os
+import sys
+import shutil
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from bench.synthetic import generate_corpus
+from diffdrop import DropSide
+
+
+def test_run_folder_uses_the_drop_metadata(tmp_path):
+    root = str(tmp_path)
+    generate_corpus(root, events=4, showdowns=2, tournaments=1, milestones=1, cars=100,
+                    localisation_entries=500, noise_files=1)
+    # A published run holds what it extracted; metadata/ stays in the drop folder
+    run_dir = os.path.join(root, "runs", "run_1")
+    for item in ("TextAsset", "MonoBehaviour"):
+        shutil.copytree(os.path.join(root, item), os.path.join(run_dir, item))
+
+    side = DropSide(run_dir)
+    assert side.meta_dir == os.path.join(root, "metadata")
+    _, shop_data, collections = side.lookups()
+    assert shop_data and collections
+    assert DropSide(root).lookups()[1:] == (shop_data, collections)
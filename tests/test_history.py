@@ -0,0 +1,45 @@
+# tests/test_history.py
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from bench.history import find_baseline
+
+
+def _run(revision, dirty, recorded):
+    return {"revision": revision, "dirty": dirty, "recorded": recorded, "subject": "", "metrics": {}}
+
+
+def _history(*runs):
+    return {"version": 1, "runs": list(runs)}
+
+
+def test_baseline_rev_prefers_the_clean_run():
+    clean = _run("abc123", False, "1")
+    dirty = _run("abc123", True, "2")
+    current = _run("def456", False, "3")
+    # Whichever was recorded last, --baseline abc picks the clean run of abc123
+    assert find_baseline(_history(clean, dirty, current), current, "abc") is clean
+    assert find_baseline(_history(dirty, clean, current), current, "abc") is clean
+
+
+def test_baseline_rev_picks_the_newest_clean_run():
+    older = _run("abc123", False, "1")
+    newer = _run("abc999", False, "2")
+    dirty = _run("abc555", True, "3")
+    current = _run("def456", False, "4")
+    assert find_baseline(_history(older, newer, dirty, current), current, "abc") is newer
+
+
+def test_baseline_rev_falls_back_to_a_dirty_run():
+    dirty = _run("abc123", True, "1")
+    current = _run("def456", False, "2")
+    assert find_baseline(_history(dirty, current), current, "abc") is dirty
+
+
+def test_default_baseline_is_the_newest_other_run():
+    clean = _run("abc123", False, "1")
+    current = _run("abc123", True, "2")
+    assert find_baseline(_history(clean, current), current) is clean
@@ -0,0 +1,98 @@
+# tests/test_jsoncodec.py
+"""Every installed JSON backend must decode (and re-encode) exactly like the standard library."""
+import os
+import sys
+import json
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import jsoncodec
+from bench.synthetic import generate_corpus
+
+# Inputs the fast backends reject or read differently; loads() has to fall back to stdlib for them
+EDGE_CASES = {
+    "lone_surrogate.txt": b'{"name": "\\ud83d broken", "pair": "\\ud83d\\ude00"}',
+    "non_finite.txt": b'{"a": NaN, "b": Infinity, "c": -Infinity}',
+    "big_int.txt": b'{"id": 123456789012345678901234567890, "neg": -18446744073709551617}',
+    "float_int.txt": b'{"float": 1.0, "exp": 1e2, "int": 1, "tiny": 5e-324}',
+    "duplicate_keys.txt": b'{"k": 1, "k": 2, "order": {"b": 1, "a": 2}}',
+    "unicode.txt": '{"name": "Pagani Huayra éè 中文 \U0001f697"}'.encode("utf-8"),
+    "top_level_list.txt": b'[1, "two", null, true, {"x": []}]',
+}
+NOT_JSON = {
+    "noise.txt": b"id,value\n0,0.5\n1,0.25\n",
+    "truncated.txt": b'{"EventSchedule": {"ScheduleList": [',
+    "trailing_comma.txt": b'{"a": 1,}',
+}
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("drop"))
+    generate_corpus(root, events=12, showdowns=4, tournaments=2, milestones=2, cars=200,
+                    localisation_entries=1000, noise_files=5)
+    text_dir = os.path.join(root, "TextAsset")
+    for name, data in {**EDGE_CASES, **NOT_JSON}.items():
+        with open(os.path.join(text_dir, name), "wb") as fh:
+            fh.write(data)
+    paths = []
+    for folder in ("TextAsset", "MonoBehaviour", "metadata"):
+        for dirpath, _, files in os.walk(os.path.join(root, folder)):
+            paths.extend(os.path.join(dirpath, f) for f in sorted(files))
+    return paths
+
+
+@pytest.fixture(params=jsoncodec.available_backends())
+def backend(request):
+    previous = jsoncodec.get_backend()
+    assert jsoncodec.set_backend(request.param) == request.param
+    yield request.param
+    jsoncodec.set_backend(previous)
+
+
+def _read(path):
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def test_loads_matches_stdlib(backend, corpus):
+    checked = 0
+    for path in corpus:
+        data = _read(path)
+        try:
+            expected = json.loads(data)
+        except ValueError:
+            continue
+        actual = jsoncodec.loads(data)
+        # repr also catches int/float and key-order differences that == would hide
+        assert type(actual) is type(expected), path
+        assert repr(actual) == repr(expected), path
+        checked += 1
+    assert checked >= len(EDGE_CASES)
+
+
+def test_loads_rejects_what_stdlib_rejects(backend):
+    for name, data in NOT_JSON.items():
+        with pytest.raises(ValueError):
+            jsoncodec.loads(data)
+
+
+def test_load_file_strips_bom(backend, tmp_path):
+    path = tmp_path / "bom.json"
+    path.write_bytes(b"\xef\xbb\xbf" + EDGE_CASES["unicode.txt"])
+    assert jsoncodec.load_file(str(path), strip_bom=True) == json.loads(EDGE_CASES["unicode.txt"])
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_dump_file_round_trips(backend, tmp_path, indent):
+    obj = json.loads(EDGE_CASES["unicode.txt"])
+    obj.update(json.loads(EDGE_CASES["top_level_list.txt"].join([b'{"list": ', b"}"])))
+    path = tmp_path / "out.json"
+    jsoncodec.dump_file(obj, str(path), indent=indent)
+    assert repr(json.loads(path.read_bytes())) == repr(obj)
+    if indent is not None:
+        # Indented files always come from stdlib, byte for byte
+        with open(path, "r", encoding="utf-8") as fh:
+            assert fh.read() == json.dumps(obj, ensure_ascii=False, indent=indent)
@@ -0,0 +1,113 @@
+# tests/test_rundirs.py
+import os
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import rundirs
+from rundirs import publish_run, current_run_id
+
+ITEMS = ["TextAsset", "allparser_output.txt"]
+
+
+def _make_run(root, run_id, tag):
+    run_dir = os.path.join(root, rundirs.RUNS_DIR, run_id)
+    os.makedirs(os.path.join(run_dir, "TextAsset"))
+    with open(os.path.join(run_dir, "TextAsset", "EVENT.txt"), "w") as fh:
+        fh.write(tag)
+    with open(os.path.join(run_dir, "allparser_output.txt"), "w") as fh:
+        fh.write(tag)
+    return run_dir
+
+
+def _view(root):
+    """What a reader sees at the top level: (TextAsset/EVENT.txt, allparser_output.txt)."""
+    def read(*parts):
+        try:
+            with open(os.path.join(root, *parts)) as fh:
+                return fh.read()
+        except OSError:
+            return None
+    return read("TextAsset", "EVENT.txt"), read("allparser_output.txt")
+
+
+def test_publish_swaps_one_pointer(tmp_path):
+    root = str(tmp_path)
+    assert publish_run(_make_run(root, "run_1", "one"), root, ITEMS)
+    assert _view(root) == ("one", "one")
+    assert current_run_id(root) == "run_1"
+    for item in ITEMS:
+        assert os.readlink(os.path.join(root, item)) == os.path.join("runs", "current", item)
+
+    run_2 = _make_run(root, "run_2", "two")
+    views = []
+    relink = rundirs._relink
+
+    def watching_relink(target, link_to):
+        views.append(_view(root))
+        relink(target, link_to)
+        views.append(_view(root))
+
+    rundirs._relink = watching_relink
+    try:
+        assert publish_run(run_2, root, ITEMS)
+    finally:
+        rundirs._relink = relink
+    # Nothing readers see changes until runs/current flips, and then everything does
+    assert views == [("one", "one"), ("two", "two")]
+    assert current_run_id(root) == "run_2"
+
+
+def test_items_missing_from_the_new_run_disappear(tmp_path):
+    root = str(tmp_path)
+    publish_run(_make_run(root, "run_1", "one"), root, ITEMS)
+    run_2 = _make_run(root, "run_2", "two")
+    os.remove(os.path.join(run_2, "allparser_output.txt"))
+    assert publish_run(run_2, root, ITEMS)
+    assert _view(root) == ("two", None)
+
+
+def test_failed_flip_keeps_previous_run(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    publish_run(_make_run(root, "run_1", "one"), root, ITEMS)
+    run_2 = _make_run(root, "run_2", "two")
+
+    def failing_relink(target, link_to):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(rundirs, "_relink", failing_relink)
+    assert not publish_run(run_2, root, ITEMS)
+    assert _view(root) == ("one", "one")
+    assert current_run_id(root) == "run_1"
+
+
+def test_migrates_per_item_links_and_current_file(tmp_path):
+    root = str(tmp_path)
+    _make_run(root, "run_1", "one")
+    # The old layout: one link per item into the run, and runs/current as a file
+    for item in ITEMS:
+        os.symlink(os.path.join("runs", "run_1", item), os.path.join(root, item))
+    with open(os.path.join(root, "runs", "current"), "w") as fh:
+        fh.write("run_1")
+    assert publish_run(_make_run(root, "run_2", "two"), root, ITEMS)
+    assert _view(root) == ("two", "two")
+    assert os.path.islink(os.path.join(root, "runs", "current"))
+    assert current_run_id(root) == "run_2"
+
+
+def test_rename_fallback_without_symlinks(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    monkeypatch.setattr(rundirs, "_can_symlink", lambda runs_root: False)
+    real_symlink = os.symlink
+
+    def no_symlink(*args, **kwargs):
+        raise OSError("symlinks not allowed")
+
+    monkeypatch.setattr(os, "symlink", no_symlink)
+    assert publish_run(_make_run(root, "run_1", "one"), root, ITEMS)
+    assert publish_run(_make_run(root, "run_2", "two"), root, ITEMS)
+    monkeypatch.setattr(os, "symlink", real_symlink)
+    assert _view(root) == ("two", "two")
+    assert not os.path.islink(os.path.join(root, "TextAsset"))
+    assert current_run_id(root) == "run_2"
@@ -0,0 +1,39 @@
+# tests/test_schema.py
+import os
+import sys
+import itertools
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from schema import find_key
+from eventdataparser import EventDataParser
+
+
+def _event(rewards):
+    return {"EventSchedule": {"ScheduleList": []}, "EventMilestoneRewards": rewards}
+
+
+def _levels(car):
+    return [{"rewards": [{"rewardType": 11, "name": car}]}]
+
+
+# RewardLevels at different depths under the same top-level (and, for the last two, the same
+# two-level) layout; none of them sit where the direct EventMilestoneRewards lookups look
+EVENTS = [
+    ("EVT_A", _event({"X": {"Deep": [{"RewardLevels": _levels("car_a")}]}})),
+    ("EVT_B", _event({"Other": {"RewardLevels": _levels("car_b")}})),
+    ("EVT_C", _event({"Other": {"Nested": {"RewardLevels": _levels("car_c")}}})),
+    ("EVT_D", _event({"Other": {"Nested": {"More": {"RewardLevels": _levels("car_d")}}}})),
+]
+
+
+def _expected(event):
+    return [item["rewards"][0] for _, levels in find_key(event, "RewardLevels") for item in levels]
+
+
+def test_milestone_rewards_do_not_depend_on_file_order(tmp_path):
+    for order in itertools.permutations(EVENTS):
+        parser = EventDataParser(folder=str(tmp_path))
+        for title, event in order:
+            assert parser._collect_milestone_rewards(event, title) == _expected(event), [t for t, _ in order]
@@ -0,0 +1,96 @@
+# tests/test_sharding.py
+"""
+-shard i/N in N separate processes followed by `main.py merge` must produce the same outputs as
+one unsharded run over the same drop.
+"""
+import os
+import sys
+import shutil
+import subprocess
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from bench.synthetic import generate_corpus
+
+SHARDS = 3
+OUTPUTS = [
+    "allparser_output.txt",
+    os.path.join("TextAsset", "event_output.txt"),
+    os.path.join("TextAsset", "milestone_output.txt"),
+    os.path.join("TextAsset", "sd_output.txt"),
+    os.path.join("TextAsset", "tournament_output.txt"),
+]
+
+# What main() runs on the TextAssets it has extracted: the shard branch (records.json per shard)
+# or the unsharded run_parsers. Extraction itself needs real bundles, so the drop is pre-extracted.
+DRIVER = f"""
+import sys
+sys.path.insert(0, {REPO!r})
+import main
+from sharding import parse_shard_spec, textasset_filter, shard_dir, write_shard_records
+translations, shop_data, collections = main.load_lookups("TextAsset", "MonoBehaviour", "metadata")
+if sys.argv[1] == "shard":
+    i, n = parse_shard_spec(sys.argv[2])
+    parsers = main.build_parsers("TextAsset", translations, shop_data, collections, False, file_filter=textasset_filter(i, n))
+    out = shard_dir(i, n)
+    write_shard_records(out, i, n, main.collect_records(parsers))
+else:
+    parsers = main.build_parsers("TextAsset", translations, shop_data, collections, False)
+    main.run_parsers(parsers, ".", formats=main.output_formats())
+"""
+
+
+def _drop(root):
+    generate_corpus(root, events=24, showdowns=8, tournaments=3, milestones=4, cars=300,
+                    localisation_entries=3000, noise_files=10)
+
+
+def _run(cwd, *args):
+    proc = subprocess.run([sys.executable, *args, "-quiet"], cwd=cwd,
+                          capture_output=True, text=True, timeout=300)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+
+
+def _read(root, name):
+    with open(os.path.join(root, name), "rb") as fh:
+        return fh.read()
+
+
+@pytest.fixture(scope="module")
+def drops(tmp_path_factory):
+    single = str(tmp_path_factory.mktemp("single"))
+    _drop(single)
+    sharded = str(tmp_path_factory.mktemp("sharded"))
+    for item in ("TextAsset", "MonoBehaviour", "metadata"):
+        shutil.copytree(os.path.join(single, item), os.path.join(sharded, item))
+    shutil.copy(os.path.join(single, "wr.json"), sharded)
+
+    _run(single, "-c", DRIVER, "single", "-wrsources", "wr.json")
+    shards = [
+        subprocess.Popen([sys.executable, "-c", DRIVER, "shard", f"{i}/{SHARDS}", "-quiet", "-wrsources", "wr.json"],
+                         cwd=sharded, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        for i in range(SHARDS)
+    ]
+    for proc in shards:
+        output, _ = proc.communicate(timeout=300)
+        assert proc.returncode == 0, output
+    _run(sharded, os.path.join(REPO, "main.py"), "merge")
+    return single, sharded
+
+
+def test_every_shard_wrote_records(drops):
+    _, sharded = drops
+    shard_dirs = sorted(os.listdir(os.path.join(sharded, "shards")))
+    assert len(shard_dirs) == SHARDS
+    for name in shard_dirs:
+        assert os.path.isfile(os.path.join(sharded, "shards", name, "records.json"))
+
+
+@pytest.mark.parametrize("name", OUTPUTS)
+def test_merge_matches_unsharded_run(drops, name):
+    single, sharded = drops
+    expected = _read(single, name)
+    assert expected
+    assert _read(sharded, name) == expected
@@ -0,0 +1,161 @@
+# tests/test_wrsources.py
+"""fetch_first / fetch_source against a local http.server, and iter_json_array on bad payloads."""
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import wrsources
+from wrsources import fetch_first, iter_json_array
+
+ROWS = [{"car": f"car_{i}", "time": 10.0 + i / 100} for i in range(50)]
+PAYLOAD = json.dumps(ROWS).encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so /slow can stream chunked and the client sees every chunk as it is sent
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b""):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            script = server.scripts.get(self.path)
+            step = script.pop(0) if script and len(script) > 1 else (script[0] if script else None)
+        if step == "slow":
+            return self._slow()
+        if step is None:
+            return self._send(404)
+        self._send(*step)
+
+    def _slow(self):
+        self.send_response(200)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i in range(400):
+                data = (b"[" if i == 0 else b",") + json.dumps(ROWS[0]).encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+                time.sleep(0.02)
+            self.wfile.write(b"1\r\n]\r\n0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.aborted.set()
+        self.close_connection = True
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    httpd.lock = threading.Lock()
+    httpd.hits = {}
+    httpd.scripts = {}
+    httpd.aborted = threading.Event()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(wrsources, "BACKOFF_FACTOR", 0.01)
+    wrsources.reset_session()
+    yield httpd
+    wrsources.reset_session()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _fetch_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("wr-fetch")]
+
+
+def test_first_valid_source_wins_and_losers_stop(server):
+    server.scripts = {
+        "/broken": [(500, b"")],
+        "/empty": [(200, b"[]")],
+        "/slow": ["slow"],
+        "/good": [(200, PAYLOAD)],
+    }
+    sources = [f"{server.url}/{name}" for name in ("broken", "empty", "slow", "good")]
+    started = time.perf_counter()
+    source, rows = fetch_first(sources, list, timeout=5, retries=0)
+    assert source == f"{server.url}/good"
+    assert rows == ROWS
+    # /slow alone would take ~8s to finish; it has to drop its connection at the next chunk
+    assert server.aborted.wait(2)
+    deadline = time.perf_counter() + 2
+    while _fetch_threads() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert not _fetch_threads()
+    assert time.perf_counter() - started < 4
+
+
+def test_retries_429_and_5xx_then_succeeds(server):
+    server.scripts = {"/flaky": [(429, b""), (503, b"busy"), (200, PAYLOAD)]}
+    source, rows = fetch_first([f"{server.url}/flaky"], list, timeout=5, retries=3)
+    assert source == f"{server.url}/flaky"
+    assert rows == ROWS
+    assert server.hits["/flaky"] == 3
+
+
+def test_gives_up_after_retries(server):
+    server.scripts = {"/down": [(502, b"")]}
+    assert fetch_first([f"{server.url}/down"], list, timeout=5, retries=2) == (None, None)
+    assert server.hits["/down"] == 3
+
+
+def test_every_source_failing_returns_none(server, tmp_path):
+    garbage = tmp_path / "garbage.json"
+    garbage.write_bytes(b'{"not": "an array"}')
+    server.scripts = {"/error": [(500, b"")], "/truncated": [(200, PAYLOAD[:-40])]}
+    sources = [
+        f"{server.url}/error",
+        f"{server.url}/missing",
+        f"{server.url}/truncated",
+        str(garbage),
+        str(tmp_path / "no_such_file.json"),
+    ]
+    assert fetch_first(sources, list, timeout=5, retries=1) == (None, None)
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 64 * 1024])
+def test_iter_json_array_matches_json(size):
+    assert list(iter_json_array(_chunks(b" [1, 2.5e3, -7, \"\xc3\xa9\", {\"a\": [1]}, null] ", size))) == [
+        1, 2500.0, -7, "é", {"a": [1]}, None,
+    ]
+    assert list(iter_json_array(_chunks(PAYLOAD, size))) == ROWS
+
+
+@pytest.mark.parametrize("data", [
+    PAYLOAD[:-1],
+    PAYLOAD[:len(PAYLOAD) // 2],
+    b"[1, 2, 3",
+    b"[1, 2, 3,",
+    b"[",
+    b"",
+])
+def test_iter_json_array_rejects_truncated_payload(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array(_chunks(data, 16)))
+
+
+def test_iter_json_array_rejects_non_array():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"a": 1}']))
@@ -0,0 +1,76 @@
+# textstore.py
+import io
+import os
+import hashlib
+import jsoncodec
+from utils import debug_log, sniff_stream
+
+
+class FolderStore:
+    """TextAssets in an extracted TextAsset folder (what every parser reads by default)."""
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def names(self):
+        return sorted(
+            f for f in os.listdir(self.folder)
+            if f.lower().endswith(".txt") and os.path.isfile(os.path.join(self.folder, f))
+        )
+
+    def open(self, name):
+        return open(os.path.join(self.folder, name), "rb")
+
+    def read(self, name):
+        with self.open(name) as fh:
+            return fh.read()
+
+    def size(self, name):
+        path = os.path.join(self.folder, name)
+        return os.path.getsize(path) if os.path.isfile(path) else 0
+
+    def sniff(self, name):
+        try:
+            with self.open(name) as fh:
+                return sniff_stream(fh)
+        except OSError as e:
+            debug_log(f"Failed to read {name}: {e}", "error")
+            return None, None
+
+    def load(self, name):
+        return jsoncodec.loads(self.read(name))
+
+    def digest(self, name):
+        """sha256 of the raw file, as snapshot.input_hashes records it."""
+        h = hashlib.sha256()
+        with self.open(name) as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+
+class MemoryStore(FolderStore):
+    """TextAssets held in memory as {filename: str | bytes}, e.g. straight out of a bundle."""
+
+    def __init__(self, files):
+        super().__init__(None)
+        self.files = {
+            name: data.encode("utf-8", errors="surrogatepass") if isinstance(data, str) else bytes(data)
+            for name, data in files.items()
+        }
+
+    def names(self):
+        return sorted(f for f in self.files if f.lower().endswith(".txt"))
+
+    def open(self, name):
+        if name not in self.files:
+            raise FileNotFoundError(name)
+        return io.BytesIO(self.files[name])
+
+    def read(self, name):
+        if name not in self.files:
+            raise FileNotFoundError(name)
+        return self.files[name]
+
+    def size(self, name):
+        return len(self.files.get(name, b""))
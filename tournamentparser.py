@@ -1,15 +1,27 @@
 # tournamentparser.py
-import os
 import re
-import json
+import traceback
 from utils import debug_log, format_cooldown_time, format_restriction, format_distance, format_time
+from schema import TOURNAMENT_EVENTS
+from carresolver import CarResolver
+from textstore import FolderStore
+from outputs import by_file, parser_output
+from resultcache import open_cache
+from tracing import tracer
 
 class TournamentParser:
-    def __init__(self, folder="TextAsset", translations=None, collections=None, debug=False):
+    def __init__(self, folder="TextAsset", translations=None, collections=None, debug=False, file_filter=None,
+                 console=True, text_output=True, store=None, cache_dir=None, resolver=None):
         self.folder = folder
+        self.store = store or FolderStore(folder)
         self.translations = translations or {}
+        self.resolver = resolver or CarResolver(self.translations)
         self.collections = collections or {}
         self.debug = debug
+        self.file_filter = file_filter
+        self.console = console
+        self.text_output = text_output
+        self.cache_dir = cache_dir
         self.output_file = "tournament_output.txt"
 
     def extract_event_schedule_time(self, config_root, season_id):
@@ -17,7 +29,7 @@ class TournamentParser:
         schedule_list = event_schedule.get("ScheduleList", [])
 
         if self.debug:
-            debug_log(f"Checking EventSchedule for season {season_id}...", "debug")
+            debug_log(lambda: f"Checking EventSchedule for season {season_id}...", "debug")
 
         m = re.search(r"\d+", str(season_id))
         season_digits = m.group(0) if m else str(season_id)
@@ -32,11 +44,11 @@ class TournamentParser:
             if entry_id in candidates:
                 times = entry.get("Time_ActiveBetweenAny", [])
                 if not times or not isinstance(times, list) or not times[0] or len(times[0]) < 2:
-                    debug_log(f"No timestamps found for {entry_id}", "warn")
+                    debug_log(lambda: f"No timestamps found for {entry_id}", "warn")
                     return ""
                 start, end = times[0][0], times[0][1]
                 if self.debug:
-                    debug_log(f"Found tournament timing: start={start}, end={end}", "debug")
+                    debug_log(lambda: f"Found tournament timing: start={start}, end={end}", "debug")
                 return f"({format_time(start, for_file=True)} - {format_time(end, for_file=True)})"
 
         debug_log(f"Entry with id in {candidates} not found in ScheduleList.", "warn")
@@ -50,7 +62,7 @@ class TournamentParser:
         tournament_id = top_keys[0]
         config_root = tournament_config[tournament_id]
 
-        events = config_root.get("TournamentConfig", {}).get("TournamentEvents", {})
+        events = TOURNAMENT_EVENTS.get(config_root)
         if not events:
             debug_log(f"No TournamentEvents found for {tournament_id}", "warn")
             return []
@@ -74,7 +86,7 @@ class TournamentParser:
                 name_code = matched_names[0] if isinstance(matched_names, list) and matched_names else matched_names
                 
                 # Translated name
-                nice_name = self.translations.get(name_code, name_code)
+                nice_name = self.resolver.name(name_code)
 
                 # Build display name with raw code in debug mode
                 display_name = nice_name
@@ -100,47 +112,64 @@ class TournamentParser:
 
         return formatted_lines
 
-    def write_to_txt(self, lines):
-        if not lines:
-            debug_log("No data to write for tournaments.", "warn")
-            return
-        path = os.path.join(self.folder, self.output_file)
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write("\n".join(lines))
-        debug_log(f"Tournament output written to {path}", "success")
+    def parse_records(self):
+        return list(self.iter_records())
 
-    def process(self):
+    def iter_records(self):
         debug_log("Starting TournamentParser processing", "info")
 
         config_files = [
-            f for f in os.listdir(self.folder)
-            if os.path.isfile(os.path.join(self.folder, f))
-            and re.search(r'TOURNAMENT_.*\.txt', f, re.IGNORECASE)
+            f for f in self.store.names()
+            if re.search(r'TOURNAMENT_.*\.txt', f, re.IGNORECASE)
             and f.lower() != 'tournament_output.txt'
+            and (not self.file_filter or self.file_filter(f))
         ]
 
         if not config_files:
             debug_log("No tournament config files found.", "warn")
-            return ""
+            return
 
-        all_lines = []
-        for config_file in sorted(config_files):
-            try:
-                debug_log(f"Processing file: {config_file}", "info")
-                with open(os.path.join(self.folder, config_file), 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                lines = self.extract_tournament_data(config_data)
-                all_lines.extend(lines)
-                all_lines.append("=" * 50)  # Separator
-                all_lines.append("")  # Extra spacing
-
-                print("\n".join(lines))
-                print("=" * 50)
-            except Exception as e:
-                debug_log(f"Failed to process {config_file}: {e}", "error")
-                if self.debug:
-                    debug_log(f"Stack trace: {traceback.format_exc()}", "debug")
+        cache = open_cache(self)
+        for config_file in tracer.each(sorted(config_files), "parse.TournamentParser"):
+            record = cache.get(config_file) if cache else None
+            if record is None:
+                try:
+                    debug_log(lambda: f"Processing file: {config_file}", "info")
+                    config_data = self.store.load(config_file)
+                    lines = self.extract_tournament_data(config_data)
+                except Exception as e:
+                    debug_log(f"Failed to process {config_file}: {e}", "error")
+                    if self.debug:
+                        debug_log(f"Stack trace: {traceback.format_exc()}", "debug")
+                    continue
+                record = {"file": config_file, "lines": lines}
+                if cache:
+                    cache.put(config_file, record)
+            yield record
+
+        if cache:
+            cache.close()
+
+    def sections(self, records):
+        return [(r["file"], "\n".join(r["lines"])) for r in sorted(records, key=lambda r: r["file"])]
+
+    def render(self, records, run=None):
+        separator = "=" * 50
+        out = parser_output(self, run, keep_empty=False)
+        with out:
+            for record in by_file(records):
+                lines = record["lines"]
+                # Separator plus extra spacing after every tournament
+                out.add(record["file"], "\n".join(lines), text="\n".join(lines + [separator, ""]),
+                        console="\n".join(lines + [separator]))
+        if not out.count:
+            return ""
 
-        self.write_to_txt(all_lines)
+        out.show()
+        if out.written:
+            debug_log(f"Tournament output written to {out.path}", "success")
         debug_log("TournamentParser processing completed", "success")
-        return "\n".join(all_lines)
\ No newline at end of file
+        return out.text()
+
+    def process(self):
+        return self.render(self.iter_records())
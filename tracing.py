@@ -0,0 +1,123 @@
+# tracing.py
+"""
+Chrome/Perfetto trace-event export (-trace). Spans are recorded as complete ("X") events tagged
+with the process and native thread id; open the file in ui.perfetto.dev or chrome://tracing.
+
+runmetrics.phase() opens a span for every phase, so only work below phase level (bundles,
+per-type extraction, parser files) is instrumented directly. Worker processes record into their
+own tracer and ship the events back with their bundle stats.
+"""
+import os
+import time
+import threading
+import contextlib
+import jsoncodec
+from utils import debug_log
+
+TRACE_FILE = "trace.json"
+# Files a parser skips after a name check would bury the real work, so shorter spans are dropped
+MIN_ITEM_SPAN_US = 20
+
+
+def _now_us():
+    # Wall clock, so spans from spawned workers line up with the main process
+    return time.time_ns() / 1000
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=True):
+        self.enabled = enabled
+
+    def _record(self, name, cat, start_us, dur_us, args):
+        event = {
+            "name": name, "cat": cat, "ph": "X", "ts": start_us, "dur": dur_us,
+            "pid": os.getpid(), "tid": threading.get_native_id(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._threads.setdefault((event["pid"], event["tid"]), threading.current_thread().name)
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, cat="run", **args):
+        if not self.enabled:
+            yield
+            return
+        start = _now_us()
+        began = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._record(name, cat, start, (time.perf_counter_ns() - began) / 1000, args)
+
+    def each(self, items, cat, name=str):
+        """Iterate items with one span per loop body (from one item to the next)."""
+        if not self.enabled:
+            return items
+        return self._each(items, cat, name)
+
+    def _each(self, items, cat, name):
+        for item in items:
+            start = _now_us()
+            began = time.perf_counter_ns()
+            try:
+                yield item
+            finally:
+                dur = (time.perf_counter_ns() - began) / 1000
+                if dur >= MIN_ITEM_SPAN_US:
+                    self._record(name(item), cat, start, dur, None)
+
+    def drain(self):
+        """Hand the recorded events (with thread names) over, e.g. from a worker process."""
+        with self._lock:
+            events = self.events + [
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}}
+                for (pid, tid), thread in self._threads.items()
+            ]
+            self.events, self._threads = [], {}
+        return events
+
+    def extend(self, events):
+        if self.enabled and events:
+            with self._lock:
+                self.events.extend(events)
+
+    def write(self, path):
+        if not self.enabled:
+            return None
+        events = self.drain()
+        # Workers send their thread names with every drain; keep one per thread
+        named = set()
+        for event in events:
+            key = (event["ph"], event["pid"], event["tid"])
+            event["_drop"] = event["ph"] == "M" and key in named
+            named.add(key)
+        events = [e for e in events if not e.pop("_drop")]
+        main_pid = os.getpid()
+        for pid in sorted({e["pid"] for e in events}):
+            label = "main" if pid == main_pid else f"extract worker {pid}"
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": label}})
+        tmp_path = path + ".tmp"
+        jsoncodec.dump_file({"traceEvents": events, "displayTimeUnit": "ms"}, tmp_path)
+        os.replace(tmp_path, path)
+        debug_log(f"Trace with {sum(1 for e in events if e['ph'] == 'X')} span(s) written to {path}", "info", force=True)
+        return path
+
+
+tracer = Tracer()
+
+
+def configure(enabled=True):
+    tracer.configure(enabled)
+    return tracer
+
+
+def span(name, cat="run", **args):
+    return tracer.span(name, cat, **args)
@@ -2,29 +2,63 @@
 import os
 import re
 import json
+import jsoncodec
 import traceback
 import sys
 from datetime import datetime, timezone
-from colorama import Fore, Style, init
-
-init(autoreset=True)
-
-# Toggle debug output here
-DEBUG = True
-
-def debug_log(msg, level="info", force=False):
-    """Colored debug logging used across modules."""
-    if not DEBUG and not force:
-        return
-    colors = {
-        "info": Fore.CYAN,
-        "warn": Fore.YELLOW,
-        "success": Fore.GREEN,
-        "error": Fore.RED,
-        "debug": Fore.MAGENTA,
-    }
-    color = colors.get(level, Fore.WHITE)
-    print(f"{color}[{level.upper()}]{Style.RESET_ALL} {msg}")
+from colorama import Fore, Style
+from logs import debug_log
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def get_arg_value(flag, default=None, cast=str):
+    """Return the value following a CLI flag (e.g. -recycle 25), or default."""
+    if flag not in sys.argv:
+        return default
+    idx = sys.argv.index(flag)
+    if idx + 1 >= len(sys.argv):
+        debug_log(f"Missing value for {flag}, using default {default}", "warn", force=True)
+        return default
+    try:
+        return cast(sys.argv[idx + 1])
+    except (TypeError, ValueError):
+        debug_log(f"Invalid value for {flag}: {sys.argv[idx + 1]}, using default {default}", "warn", force=True)
+        return default
+
+# ---------------- Memory accounting ----------------
+def get_rss_mb():
+    """Current resident set size of this process in MB."""
+    if psutil:
+        try:
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except Exception:
+            pass
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        return get_peak_rss_mb()
+
+def get_peak_rss_mb():
+    """Peak resident set size of this process in MB (0.0 if unavailable)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    if psutil:
+        try:
+            info = psutil.Process().memory_info()
+            return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+        except Exception:
+            pass
+    return 0.0
 
 def epoch_to_gmt(epoch):
     try:
@@ -69,18 +103,55 @@ def find_translation_file(folder="MonoBehaviour"):
             debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
         return None
 
+LOCALISATION_NAMES = [
+    "Localisation_EN.json",           # New name (current)
+    "Localisation_en.json",           # Possible lowercase variant
+    "Localisation.json",
+    "TranslationDataAsset.json",      # Old name (legacy)
+    "TranslationData.json",
+]
+
+def is_localisation_name(filename):
+    lower = filename.lower()
+    return filename in LOCALISATION_NAMES or (lower.endswith(".json") and ("localisation" in lower or "translation" in lower))
+
+def find_localisation_name(filenames):
+    """Pick the Localisation/TranslationDataAsset file among extracted MonoBehaviour file names."""
+    for filename in filenames:
+        if filename in LOCALISATION_NAMES:
+            return filename
+
+    # Optional: fallback to any file containing "localisation" or "translation"
+    for filename in filenames:
+        if is_localisation_name(filename):
+            debug_log(f"Found possible translation file via fuzzy match: {filename}", "info")
+            return filename
+    return None
+
+def translation_mapping(translations):
+    """Build the lookup from an already loaded Localisation/TranslationDataAsset object."""
+    from_keys = translations.get("TranslationsFrom", [])
+    to_values = translations.get("TranslationsTo", [])
+    mapping = {}
+
+    for k, v in zip(from_keys, to_values):
+        if k.startswith("TEXT_CAR_") and k.endswith("_LONG"):
+            code = k[len("TEXT_CAR_"):-len("_LONG")]
+            mapping[code] = v
+        else:
+            mapping[k] = v
+    return mapping
+
 def build_translation_lookup(translation_path):
     if not translation_path or not os.path.exists(translation_path):
         debug_log("TranslationDataAsset.json not found. Car names will be untranslated.", "warn")
         return {}
 
     try:
-        with open(translation_path, "r", encoding="utf-8") as fh:
-            translations = json.load(fh)
-    except UnicodeDecodeError:
+        translations = jsoncodec.load_file(translation_path)
+    except ValueError:
         try:
-            with open(translation_path, "r", encoding="utf-8-sig") as fh:
-                translations = json.load(fh)
+            translations = jsoncodec.load_file(translation_path, strip_bom=True)
         except Exception as e:
             debug_log(f"Failed to load translation file {translation_path}: {e}", "error", force=True)
             if "-debug" in sys.argv:
@@ -92,17 +163,7 @@ def build_translation_lookup(translation_path):
             debug_log(f"Stack trace: {traceback.format_exc()}", "debug", force=True)
         return {}
 
-    from_keys = translations.get("TranslationsFrom", [])
-    to_values = translations.get("TranslationsTo", [])
-    mapping = {}
-
-    for k, v in zip(from_keys, to_values):
-        if k.startswith("TEXT_CAR_") and k.endswith("_LONG"):
-            code = k[len("TEXT_CAR_"):-len("_LONG")]
-            mapping[code] = v
-        else:
-            mapping[k] = v
-
+    mapping = translation_mapping(translations)
     file_date = datetime.fromtimestamp(os.path.getmtime(translation_path)).strftime("%Y/%m/%d")
     filename = os.path.basename(translation_path)
     debug_log(f"Translation lookup built with {len(mapping)} entries from {filename} (File Date - {file_date})", "success")
@@ -121,29 +182,37 @@ def find_collection_file(folder="MetaData"):
         debug_log(f"Error accessing collection folder {folder}: {e}", "error", force=True)
         return None
 
+def collection_mapping(collection_slots):
+    """Build the slot -> car names lookup from an already loaded CollectionSlots object."""
+    lookup = {}
+    for key, slot in collection_slots.get("CollectionSlots", {}).items():
+        for milestone in slot.get("milestones", []):
+            names = milestone.get("names")
+            if names:
+                lookup[key] = names
+    return lookup
+
 def build_collection_lookup(collection_path):
     if not collection_path or not os.path.exists(collection_path):
         debug_log("CollectionSlots.meta not found. Slot names will default to 'Unknown'.", "warn")
         return {}
     try:
-        with open(collection_path, "r", encoding="utf-8") as fh:
-            collection_slots = json.load(fh)
+        collection_slots = jsoncodec.load_file(collection_path)
     except Exception as e:
         debug_log(f"Failed to load collection file {collection_path}: {e}", "error", force=True)
         return {}
 
-    lookup = {}
-    for key, slot in collection_slots.get("CollectionSlots", {}).items():
-        for milestone in slot.get("milestones", []):
-            names = milestone.get("names")
-            if names:
-                lookup[key] = names
-
+    lookup = collection_mapping(collection_slots)
     file_date = datetime.fromtimestamp(os.path.getmtime(collection_path)).strftime("%Y/%m/%d")
     filename = os.path.basename(collection_path)
     debug_log(f"Collection lookup built with {len(lookup)} entries from {filename} (File Date - {file_date})", "success")
     return lookup
 
+def shop_index(data):
+    """Keep only the car promotions of an already loaded ShopTimeGatedEvents object."""
+    promos = data.get("ShopTimeGatedEvents", {}).get("GENERATED_TimeGatedCarPromotions", {})
+    return {"ShopTimeGatedEvents": {"GENERATED_TimeGatedCarPromotions": promos}}
+
 def load_shop_time_gated_events(folder="MetaData"):
     if not os.path.exists(folder):
         debug_log(f"Shop folder {folder} not found.", "warn", force=True)
@@ -156,12 +225,10 @@ def load_shop_time_gated_events(folder="MetaData"):
         for fname in sorted(candidates):
             path = os.path.join(folder, fname)
             try:
-                with open(path, "r", encoding="utf-8") as fh:
-                    data = json.load(fh)
+                data = jsoncodec.load_file(path)
                 file_date = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y/%m/%d")
                 debug_log(f"Loaded {fname} (File Date - {file_date})", "success")
-                promos = data.get("ShopTimeGatedEvents", {}).get("GENERATED_TimeGatedCarPromotions", {})
-                return {"ShopTimeGatedEvents": {"GENERATED_TimeGatedCarPromotions": promos}}, file_date
+                return shop_index(data), file_date
             except Exception as e:
                 debug_log(f"Failed to load {fname}: {e}", "warn")
                 continue
@@ -170,6 +237,36 @@ def load_shop_time_gated_events(folder="MetaData"):
         return None, None
     return None, None
 
+# ---------------- TextAsset sniffing ----------------
+TEXTASSET_HEAD_BYTES = 512
+TEXTASSET_HEAD_MAX_BYTES = 64 * 1024
+_ROOT_KEY_RE = re.compile(rb'\s*\{\s*"((?:[^"\\]|\\.)+)"\s*:\s*(\S)')
+_SHAPES = {b"{": "object", b"[": "array", b'"': "string"}
+
+def sniff_stream(fh, head_bytes=TEXTASSET_HEAD_BYTES):
+    """Read only the head of a TextAsset (any binary file object) and return (root_key, shape)
+    of its first JSON entry.
+
+    shape is "object", "array", "string" or "scalar"; (None, None) means the file does not
+    start like a JSON object.
+    """
+    head = fh.read(head_bytes)
+    m = _ROOT_KEY_RE.match(head)
+    # Only keep reading while the head could still be the start of a very long key
+    while not m and head.lstrip()[:1] == b"{" and len(head) < TEXTASSET_HEAD_MAX_BYTES:
+        more = fh.read(len(head))
+        if not more:
+            break
+        head += more
+        m = _ROOT_KEY_RE.match(head)
+    if not m:
+        return None, None
+    try:
+        root_key = json.loads(b'"' + m.group(1) + b'"')
+    except ValueError:
+        root_key = m.group(1).decode("utf-8", errors="replace")
+    return root_key, _SHAPES.get(m.group(2), "scalar")
+
 # ---------------- Matching utilities ----------------
 def _normalize(s: str) -> str:
     if s is None:
@@ -208,19 +305,22 @@ def translate_event_name(event_key: str, translations: dict):
     return event_key
 
 # ---------------- translate_model_name_with_suffix ----------------
-def translate_model_name_with_suffix(model, translations, debug_mode=False):
+_GOLD_SUFFIX_RE = re.compile(r"(RewardRecycled|Gold)", re.IGNORECASE)
+
+def car_suffix(name):
+    """(plain, colored) GS/PS suffix for a car key."""
+    if _GOLD_SUFFIX_RE.search(name):
+        return "(GS)", f"{Fore.YELLOW}(GS){Style.RESET_ALL}"
+    return "(PS)", f"{Fore.MAGENTA}(PS){Style.RESET_ALL}"
+
+def translate_model_name_with_suffix(model, translations, debug_mode=False, keys=None):
+    """keys may pass a prebuilt list(translations) to skip rebuilding it on every call (see CarResolver)."""
 
     if not model:
         return []
 
-    keys = list(translations.keys())
-
-    def colored_suffix_for(name):
-        if re.search(r"(RewardRecycled|Gold)", name, re.IGNORECASE):
-            return "(GS)", f"{Fore.YELLOW}(GS){Style.RESET_ALL}"
-        if re.search(r"Reward", name, re.IGNORECASE):
-            return "(PS)", f"{Fore.MAGENTA}(PS){Style.RESET_ALL}"
-        return "(PS)", f"{Fore.MAGENTA}(PS){Style.RESET_ALL}"
+    if keys is None:
+        keys = list(translations.keys())
 
     results = []
 
@@ -236,14 +336,14 @@ def translate_model_name_with_suffix(model, translations, debug_mode=False):
 
         if not candidates:
             pretty = translations.get(model, model.replace("_", " "))
-            _, color_suffix = colored_suffix_for(model)
+            _, color_suffix = car_suffix(model)
             display = pretty + (f" ({model})" if debug_mode else "")
             results.append((display, color_suffix, model))
             return results
 
         for k in sorted(candidates):
             pretty = translations.get(k, k.replace("_", " "))
-            _, color_suffix = colored_suffix_for(k)
+            _, color_suffix = car_suffix(k)
             display = pretty
             if debug_mode:
                 display += f" ({k})"
@@ -259,7 +359,7 @@ def translate_model_name_with_suffix(model, translations, debug_mode=False):
         chosen_key = starts[0] if starts else (contains[0] if contains else model)
 
     pretty = translations.get(chosen_key, model.replace("_", " "))
-    _, color_suffix = colored_suffix_for(chosen_key)
+    _, color_suffix = car_suffix(chosen_key)
     display = pretty
     if debug_mode:
         display = f"{display} ({model})"
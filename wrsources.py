@@ -0,0 +1,204 @@
+# wrsources.py
+"""
+Where the WR table comes from. Every configured source (http(s) URLs and local files) is fetched
+at the same time and the first one that yields a valid WR list wins; the others are told to stop
+at their next chunk or retry. HTTP goes through one pooled session with retries and backoff, and
+each payload is decoded element by element while it streams in instead of after the whole body
+has been read.
+"""
+import json
+import queue
+import codecs
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from logs import debug_log
+
+DEFAULT_WR_URL = "https://raw.githubusercontent.com/Nitro4CSR/CSR2WorldRecordsDB/refs/heads/main/JessWR.json"
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class FetchCancelled(Exception):
+    """Raised inside a fetch once another source has already won."""
+
+
+def get_session():
+    """The shared requests session (keep-alive connection pool); fetch_source does the retrying."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def reset_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def iter_json_array(chunks):
+    """
+    Yield the elements of a JSON array from an iterable of byte chunks as soon as each one is
+    complete. Raises ValueError if the payload is not a JSON array.
+
+    This stays on the stdlib decoder rather than jsoncodec: raw_decode is the only decoder API
+    that reports where an element ends inside a partial buffer. orjson/msgspec need the exact
+    slice of each element, and finding those boundaries in Python costs ~4x what raw_decode does.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, started, done = "", 0, False, False
+    chunks = iter(chunks)
+    eof = False
+    while True:
+        # Skip whitespace, the opening bracket and separators
+        while pos < len(buf) and not done:
+            ch = buf[pos]
+            if ch in " \t\r\n,":
+                pos += 1
+            elif not started:
+                if ch != "[":
+                    raise ValueError("WR payload is not a JSON array")
+                started = True
+                pos += 1
+            elif ch == "]":
+                done = True
+            else:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise ValueError(f"Truncated or invalid WR payload at offset {pos}")
+                    break
+                # A number could continue in the next chunk ("2.5" of "2.5e3"), so it only counts
+                # once a delimiter follows; containers and strings end unambiguously
+                if not eof and not isinstance(item, (dict, list, str)) and (end == len(buf) or buf[end] not in " \t\r\n,]"):
+                    break
+                yield item
+                pos = end
+        if done:
+            return
+        if eof:
+            raise ValueError("WR payload ended before the closing bracket")
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b"", final=True)
+        else:
+            buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+
+
+def is_local(source):
+    return not source.startswith(("http://", "https://"))
+
+
+def _local_path(source):
+    return source[len("file://"):] if source.startswith("file://") else source
+
+
+def _file_chunks(path):
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            yield chunk
+
+
+def _until_stopped(chunks, stop):
+    for chunk in chunks:
+        if stop is not None and stop.is_set():
+            raise FetchCancelled()
+        yield chunk
+
+
+def _backoff(attempt, stop, retry_after=None):
+    """Sleep before the next attempt; raises FetchCancelled as soon as stop is set."""
+    delay = BACKOFF_FACTOR * (2 ** attempt)
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    if stop is None:
+        threading.Event().wait(delay)
+    elif stop.wait(delay):
+        raise FetchCancelled()
+
+
+def fetch_source(source, build, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, stop=None):
+    """
+    Stream one source through build(iterable of WR rows); build's result is returned. Connection
+    errors and RETRY_STATUSES are retried up to retries times with exponential backoff. Setting
+    the stop event ends the fetch with FetchCancelled at its next chunk or retry.
+    """
+    if is_local(source):
+        return build(iter_json_array(_until_stopped(_file_chunks(_local_path(source)), stop)))
+    session = get_session()
+    for attempt in range(retries + 1):
+        if stop is not None and stop.is_set():
+            raise FetchCancelled()
+        try:
+            with session.get(source, timeout=timeout, stream=True) as r:
+                if r.status_code in RETRY_STATUSES and attempt < retries:
+                    debug_log(f"WR source {source} answered {r.status_code}, retrying", "info")
+                    retry_after = r.headers.get("Retry-After")
+                else:
+                    r.raise_for_status()
+                    return build(iter_json_array(_until_stopped(r.iter_content(CHUNK_SIZE), stop)))
+        except RETRY_ERRORS as e:
+            if attempt == retries:
+                raise
+            debug_log(f"WR source {source} failed ({e}), retrying", "info")
+            retry_after = None
+        _backoff(attempt, stop, retry_after)
+
+
+def fetch_first(sources, build, valid=bool, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """
+    Fetch every source concurrently and return (source, result) for the first one whose result
+    passes valid, or (None, None) when all of them fail.
+    """
+    sources = list(dict.fromkeys(s for s in sources if s))
+    if not sources:
+        return None, None
+    stop = threading.Event()
+    results = queue.Queue()
+
+    def worker(source):
+        try:
+            results.put((source, fetch_source(source, build, timeout, retries, stop), None))
+        except Exception as e:
+            results.put((source, None, e))
+
+    # Daemon threads: a loser stuck in a read until its timeout must not hold the process open
+    for i, source in enumerate(sources):
+        threading.Thread(target=worker, args=(source,), name=f"wr-fetch-{i}", daemon=True).start()
+    try:
+        for _ in sources:
+            source, result, error = results.get()
+            if error is not None:
+                debug_log(f"WR source {source} failed: {error}", "warn")
+            elif valid(result):
+                return source, result
+            else:
+                debug_log(f"WR source {source} returned no entries", "warn")
+        return None, None
+    finally:
+        stop.set()
+
+
+def parse_sources(value, default=None):
+    """Comma-separated -wrsources value → list of sources (default when empty)."""
+    sources = [s.strip() for s in (value or "").split(",") if s.strip()]
+    return sources or list(default or [])
@@ -0,0 +1,216 @@
+# wrtable.py
+"""
+The WR table ShowdownParser fetches, as {car id: (display_time, star, tier, is_ec, source)}.
+
+With numpy installed it is held as a WRTable: one array per column plus an id → row index.
+Lookups still return those tuples, and whole showdowns (or every showdown of every season) can be
+looked up and summarised at once. Without numpy it stays a plain dict.
+"""
+from collections.abc import Mapping
+from logs import debug_log
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HALF_MILE_TIERS = (4, 5)
+QUARTER_MILE_TIERS = (1, 2, 3)
+
+
+def parse_wr_entries(wr_data):
+    """
+    {car id: (display_time, star, tier, is_ec, source)} from the WR sheet rows, plus how many _EC
+    rows overwrote a base entry and how many added a car of their own.
+    """
+    car_stats_map = {}
+    ec_overwrite = 0
+    ec_only_add = 0
+
+    for entry in wr_data:
+        car_id = entry.get("DB Name")
+        if not car_id:
+            continue
+
+        dyno_raw = entry.get("WR-DYNO")
+        best_et_raw = entry.get("WR-BEST ET")
+
+        try:
+            dyno = float(dyno_raw) if dyno_raw not in (None, "", "n.A.") else None
+        except (TypeError, ValueError):
+            dyno = None
+
+        try:
+            best_et = float(best_et_raw) if best_et_raw not in (None, "", "n.A.", "0.000") else None
+        except (TypeError, ValueError):
+            best_et = None
+
+        # Prefer valid Best ET (>0), otherwise fall back to Dyno
+        display_time = best_et if best_et is not None and best_et > 0 else dyno
+        source = "ET" if best_et is not None and best_et > 0 else "Dyno"
+
+        tier = entry.get("Un")
+        star = entry.get("★")
+
+        if car_id.endswith("_EC"):
+            base_id = car_id[:-3]
+            if base_id in car_stats_map:
+                ec_overwrite += 1
+            else:
+                ec_only_add += 1
+            car_stats_map[base_id] = (display_time, star, tier, True, source)
+        elif car_id not in car_stats_map:
+            car_stats_map[car_id] = (display_time, star, tier, False, source)
+
+    return car_stats_map, ec_overwrite, ec_only_add
+
+
+def tier_number(tier):
+    """4 for "T4"; 0 when the tier is missing or not of that form."""
+    return int(tier[1]) if isinstance(tier, str) and tier.startswith("T") and tier[1:2].isdigit() else 0
+
+
+def _codes(values):
+    """Dictionary-encode a column: (int32 codes, labels)."""
+    labels, lookup, codes = [], {}, []
+    for value in values:
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(labels)
+            labels.append(value)
+        codes.append(code)
+    return np.array(codes, dtype=np.int32), labels
+
+
+def _float_or_nan(value):
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class WRTable(Mapping):
+    """
+    Columnar WR table; reads like the car_stats_map dict it is built from. times, tiers (4 for
+    "T4") and ec end with one extra "no WR data" row, so row -1 from rows() needs no masking.
+    """
+
+    def __init__(self, car_stats_map):
+        self.ids = list(car_stats_map)
+        self.index = {car_id: row for row, car_id in enumerate(self.ids)}
+        entries = list(car_stats_map.values())
+        self.star_codes, self.star_labels = _codes(e[1] for e in entries)
+        self.tier_codes, self.tier_labels = _codes(e[2] for e in entries)
+        self.source_codes, self.source_labels = _codes(e[4] for e in entries)
+        self.times = np.array([_float_or_nan(e[0]) for e in entries] + [np.nan], dtype=np.float64)
+        tier_numbers = np.array([tier_number(t) for t in self.tier_labels], dtype=np.int8)
+        self.tiers = np.append(tier_numbers[self.tier_codes], np.int8(0))
+        self.ec = np.array([bool(e[3]) for e in entries] + [False], dtype=bool)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, car_id):
+        return car_id in self.index
+
+    def __getitem__(self, car_id):
+        row = self.index[car_id]
+        time_value = self.times[row]
+        return (
+            None if np.isnan(time_value) else float(time_value),
+            self.star_labels[self.star_codes[row]],
+            self.tier_labels[self.tier_codes[row]],
+            bool(self.ec[row]),
+            self.source_labels[self.source_codes[row]],
+        )
+
+    def rows(self, car_ids):
+        """Row of each car id in one array, -1 for cars without WR data."""
+        car_ids = list(car_ids)
+        return np.fromiter((self.index.get(c, -1) for c in car_ids), dtype=np.int64, count=len(car_ids))
+
+    def lookup(self, car_ids):
+        """Batch lookup: {"rows", "times", "tiers", "ec"} arrays aligned with car_ids (NaN/0 when missing)."""
+        rows = self.rows(car_ids)
+        return {"rows": rows, "times": self.times[rows], "tiers": self.tiers[rows], "ec": self.ec[rows]}
+
+    def showdown_stats(self, car_ids):
+        return self.season_stats({None: car_ids})[None]
+
+    def season_stats(self, showdowns):
+        """
+        {name: stats} for {name: [car ids]} in one vectorized pass. Each car counts once per
+        showdown. stats has the car count, how many have a WR time, the half- (T4/T5) and
+        quarter-mile (T1-T3) counts and per tier the fastest, median and spread of the WR times.
+        """
+        names = list(showdowns)
+        cars = [list(dict.fromkeys(c for c in showdowns[name] if c)) for name in names]
+        sizes = np.array([len(c) for c in cars], dtype=np.int64)
+        group = np.repeat(np.arange(len(names)), sizes)
+        found = self.lookup(c for ids in cars for c in ids)
+        times, tiers = found["times"], found["tiers"].astype(np.int64)
+        timed = ~np.isnan(times)
+        count = lambda mask: np.bincount(group[mask], minlength=len(names))
+        with_time = count(timed)
+        half = count(np.isin(tiers, HALF_MILE_TIERS))
+        quarter = count(np.isin(tiers, QUARTER_MILE_TIERS))
+
+        # Sort timed cars by (showdown, tier, time); each (showdown, tier) run is one segment
+        g, t, v = group[timed], tiers[timed], times[timed]
+        order = np.lexsort((v, t, g))
+        g, t, v = g[order], t[order], v[order]
+        per_tier = [{} for _ in names]
+        if len(v):
+            starts = np.flatnonzero(np.r_[True, (g[1:] != g[:-1]) | (t[1:] != t[:-1])])
+            ends = np.r_[starts[1:], len(v)]
+            n = ends - starts
+            median = (v[starts + (n - 1) // 2] + v[starts + n // 2]) / 2
+            for s, e, k, med in zip(starts.tolist(), ends.tolist(), n.tolist(), median.tolist()):
+                per_tier[g[s]][f"T{t[s]}" if t[s] else "?"] = {
+                    "cars": k, "fastest": float(v[s]), "median": med, "spread": float(v[e - 1] - v[s]),
+                }
+
+        return {
+            name: {
+                "cars": int(sizes[i]),
+                "with_time": int(with_time[i]),
+                "half_mile": int(half[i]),
+                "quarter_mile": int(quarter[i]),
+                "tiers": per_tier[i],
+            }
+            for i, name in enumerate(names)
+        }
+
+
+def wr_table(car_stats_map):
+    """A WRTable for car_stats_map, or None without numpy."""
+    if isinstance(car_stats_map, WRTable):
+        return car_stats_map
+    if np is None:
+        return None
+    return WRTable(car_stats_map or {})
+
+
+def build_wr_data(parsed):
+    """car_stats_map from a parse_wr_entries result: a WRTable with numpy, otherwise the plain dict."""
+    car_stats_map, ec_overwrite, ec_only_add = parsed
+    debug_log(
+        f"Total WR entries processed: {len(car_stats_map)} (EC overwrote {ec_overwrite}, EC-only added {ec_only_add})",
+        "success"
+    )
+    return WRTable(car_stats_map) if np is not None else car_stats_map
+
+
+def format_stats(stats):
+    """Text lines for a showdown's stats block."""
+    lines = [
+        f"Stats: {stats['cars']} cars, {stats['with_time']} with WR time, "
+        f"{stats['half_mile']} 1/2 mile, {stats['quarter_mile']} 1/4 mile"
+    ]
+    for tier in sorted(stats["tiers"], reverse=True):
+        s = stats["tiers"][tier]
+        lines.append(f"  {tier}: {s['cars']} cars, fastest {s['fastest']:.3f}, median {s['median']:.3f}, spread {s['spread']:.3f}")
+    return lines